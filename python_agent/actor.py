@@ -1,9 +1,46 @@
+"""
+actor.py — Society 에이전트의 Actor 런타임
+
+- 에이전트마다 크기 제한이 있는 asyncio.Queue mailbox와 전용 worker task(역할별 ACTOR_CONCURRENCY 개)를 가짐
+- send_message()는 메시지를 Registry에 넘기고 즉시 응답 future를 반환. 수신자 worker가 athink()를 마치면
+  future가 완료됨 (Registry가 대화 단위 context_id 안에서 메시지별 message_id로 대응)
+- mailbox가 가득 차면 송신자가 자리가 날 때까지 대기 (배압). 처리한 메시지는 큐에서 빠지므로 누적되지 않음
+- 감독(supervision): athink()가 예외를 던지면 해당 요청 future에 예외를 전달하고 worker를 재시작 (on_restart 훅)
+- mailbox는 처음 메시지를 받을 때 현재 이벤트 루프에 만들어짐. 그 루프가 아직 실행 중이면(웹 서버 lifespan 등)
+  다른 루프·스레드에서 온 메시지는 Registry가 그 루프로 넘겨 처리하고 결과만 돌려줌 (run_coroutine_threadsafe).
+  그 루프가 끝난 뒤라면(CLI의 run_sync처럼 호출마다 새 루프) 현재 루프에 새로 만듦
+- 동기 래퍼(receive_message / think / AgentRegistry.dispatch)는 이벤트 루프 밖(CLI, 스케줄러 스레드)에서만 사용
+"""
+import asyncio
+import contextvars
+import time
 import uuid
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 
+import llm
+import telemetry
+from config import ACTOR_CONCURRENCY, ACTOR_MAILBOX_SIZE
+from tracing import span
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def ensure_outside_loop(owner: Optional[asyncio.AbstractEventLoop]):
+    """
+    동기 래퍼 공용 검사 — 에이전트가 실행 중인 루프의 스레드에서 부르면 그 루프를 막은 채 응답을 기다리게 되어
+    교착되므로 대신 async 버전을 쓰라고 알림
+    """
+    if owner is not None and owner is _running_loop():
+        raise RuntimeError("Synchronous actor calls cannot run on the agent's own event loop; await the async version.")
+
+
 @dataclass
 class AgentMessage:
     """에이전트 간 통신을 위한 메시지 규격"""
@@ -14,31 +51,153 @@ class AgentMessage:
     context_id: str = field(default_factory=lambda: str(uuid.uuid4()))
     timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
     metadata: Dict[str, Any] = field(default_factory=dict)
+    # 같은 context_id로 여러 에이전트에 동시에 보낸 메시지(fan-out)의 응답을 구분하는 키
+    message_id: str = field(default_factory=lambda: uuid.uuid4().hex)
 
 class AgentActor(ABC):
     """
     모든 에이전트의 기본 클래스 (Actor Model)
     - 독립적인 상태(State)와 도구(Tools)를 가짐
-    - 메시지를 주고받으며 협업
+    - 메시지를 주고받으며 협업 — 수신 메시지는 mailbox에 쌓이고 전용 worker task가 하나씩 처리
     """
-    def __init__(self, name: str, persona: str, tools: Dict[str, Any] = None):
+    def __init__(self, name: str, persona: str, tools: Dict[str, Any] = None,
+                 concurrency: int = None, mailbox_size: int = ACTOR_MAILBOX_SIZE):
         self.name = name
         self.persona = persona
         self.tools = tools or {}
-        self.inbox: List[AgentMessage] = []
         self.registry = None  # AgentRegistry 참조 (나중에 주입)
+        # 동시에 처리할 메시지 수 — 기본값은 역할("Researcher-2" → "Researcher")별 설정
+        self.concurrency = max(1, concurrency or ACTOR_CONCURRENCY.get(name.split("-")[0], 1))
+        self.mailbox_size = mailbox_size
+        self.mailbox: Optional[asyncio.Queue] = None   # (message, context, enqueued_at)
+        self._workers: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.active = 0
+        self.processed = 0
+        self.failed = 0
+        self.restarts = 0
 
     def set_registry(self, registry):
         self.registry = registry
 
-    def send_message(self, recipient_name: str, content: str, msg_type: str = "REQUEST", context_id: str = None, **kwargs) -> Any:
+    # ── 런타임 (mailbox + worker) ────────────────────────────────────────────
+
+    def start(self):
+        """현재 이벤트 루프에 mailbox와 worker task를 만듦 (이미 실행 중이면 무시)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        if self.owner_loop() is not None:
+            # Registry.adispatch가 소유 루프로 넘기므로 여기 오면 호출 경로 오류
+            raise RuntimeError(f"Agent {self.name} is already running on another event loop.")
+        self._loop = loop
+        self.mailbox = asyncio.Queue(maxsize=self.mailbox_size)
+        self._workers = [self._spawn_worker(slot) for slot in range(self.concurrency)]
+
+    def owner_loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        """mailbox가 묶여 있고 아직 실행 중인, 현재와 다른 이벤트 루프 (없으면 None) — 메시지를 그 루프로 넘겨야 함"""
+        loop = self._loop
+        if loop is None or loop.is_closed() or not loop.is_running():
+            return None
+        return None if loop is _running_loop() else loop
+
+    async def astop(self):
+        """worker를 멈추고 아직 처리하지 못한 메시지의 송신자에게 실패를 알림"""
+        if self._loop is not asyncio.get_running_loop():
+            return
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        while not self.mailbox.empty():
+            message, _, _ = self.mailbox.get_nowait()
+            self.registry.reject(message, RuntimeError(f"Agent {self.name} stopped."))
+        telemetry.record_actor_depth(self.name, 0)
+        self._loop = None
+
+    async def deliver(self, message: AgentMessage):
+        """mailbox에 넣기 — 가득 차면 자리가 날 때까지 대기. 송신 시점의 트레이스 컨텍스트를 함께 보관"""
+        self.start()
+        await self.mailbox.put((message, contextvars.copy_context(), time.monotonic()))
+        telemetry.record_actor_depth(self.name, self.mailbox.qsize())
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.mailbox.qsize() if self.mailbox else 0,
+            "capacity": self.mailbox_size,
+            "concurrency": self.concurrency,
+            "active": self.active,
+            "processed": self.processed,
+            "failed": self.failed,
+            "restarts": self.restarts,
+        }
+
+    def _spawn_worker(self, slot: int) -> asyncio.Task:
+        worker = asyncio.get_running_loop().create_task(self._worker(), name=f"actor:{self.name}:{slot}")
+        worker.add_done_callback(lambda task: self._on_worker_exit(slot, task))
+        return worker
+
+    async def _worker(self):
+        while True:
+            message, context, enqueued = await self.mailbox.get()
+            telemetry.record_actor_depth(self.name, self.mailbox.qsize())
+            waited = time.monotonic() - enqueued
+            self.active += 1
+            try:
+                # 송신자의 컨텍스트에서 실행 → actor.handle 스팬이 요청 트레이스에 이어짐
+                result = await asyncio.create_task(self._handle(message), context=context)
+            except asyncio.CancelledError:
+                self.registry.reject(message, RuntimeError(f"Agent {self.name} stopped."))
+                raise
+            except Exception as e:
+                self.failed += 1
+                telemetry.record_actor_message(self.name, waited, error=True)
+                self.registry.reject(message, e)
+                raise   # worker 종료 → _on_worker_exit 가 재시작
+            finally:
+                self.active -= 1
+                self.mailbox.task_done()
+            self.processed += 1
+            telemetry.record_actor_message(self.name, waited)
+            self.registry.resolve(message, result)
+
+    async def _handle(self, message: AgentMessage):
+        with span("actor.handle", actor=self.name, sender=message.sender, msg_type=message.msg_type,
+                  context_id=message.context_id):
+            return await self.athink(message)
+
+    def _on_worker_exit(self, slot: int, task: asyncio.Task):
+        """감독 — 예외로 끝난 worker를 같은 자리에 다시 띄움 (정지·루프 종료로 취소된 경우는 제외)"""
+        if task.cancelled() or slot >= len(self._workers) or self._workers[slot] is not task:
+            return
+        error = task.exception()
+        self.restarts += 1
+        telemetry.record_actor_restart(self.name)
+        print(f"[Actor] {self.name} worker crashed ({type(error).__name__}: {error}), restarting")
+        self.on_restart(error)
+        self._workers[slot] = self._spawn_worker(slot)
+
+    def on_restart(self, error: BaseException):
+        """worker 재시작 직전에 호출 — 손상됐을 수 있는 상태를 초기화해야 하면 하위 클래스에서 재정의"""
+        pass
+
+    # ── 메시지 송수신 ────────────────────────────────────────────────────────
+
+    def send_message(self, recipient_name: str, content: str, msg_type: str = "REQUEST", context_id: str = None, **kwargs) -> asyncio.Future:
+        """
+        다른 에이전트에게 메시지를 보내고 응답 future를 바로 반환 (실행 중인 이벤트 루프 안에서 호출).
+        await 하면 수신자의 처리 결과, 수신자가 예외를 던졌으면 그 예외.
+        """
+        return asyncio.ensure_future(self.asend_message(recipient_name, content, msg_type, context_id, **kwargs))
+
+    async def asend_message(self, recipient_name: str, content: str, msg_type: str = "REQUEST", context_id: str = None, **kwargs) -> Any:
         """
-        다른 에이전트에게 메시지를 보냄.
-        Registry의 dispatch가 동기식으로 결과를 반환하면, 그 값을 리턴함.
+        다른 에이전트에게 메시지를 보내고 처리 결과를 기다림.
+        Registry는 라우팅만 하고, 결과는 수신자 worker가 응답 future로 돌려줌.
         """
         if not self.registry:
             raise RuntimeError(f"Agent {self.name} is not registered in any registry.")
-        
+
         msg = AgentMessage(
             sender=self.name,
             recipient=recipient_name,
@@ -47,18 +206,33 @@ class AgentActor(ABC):
             context_id=context_id or str(uuid.uuid4()),
             metadata=kwargs
         )
-        return self.registry.dispatch(msg)
+        reply = await self.registry.adispatch(msg)
+        return await reply
 
     def receive_message(self, message: AgentMessage):
-        """메시지를 수신함 (Inbox에 저장)"""
-        self.inbox.append(message)
-        # 즉시 think()를 호출하고 결과를 반환 (동기 체인)
-        return self.think(message)
+        """areceive_message 의 동기 래퍼 (에이전트가 다른 루프에서 실행 중이면 Registry가 그 루프로 넘김)"""
+        ensure_outside_loop(self._loop)
+        return llm.run_sync(self.areceive_message(message))
+
+    async def areceive_message(self, message: AgentMessage):
+        """외부(사용자 등)에서 온 메시지를 이 에이전트의 mailbox로 보내고 처리 결과를 기다림"""
+        if not self.registry:
+            raise RuntimeError(f"Agent {self.name} is not registered in any registry.")
+        message.recipient = self.name
+        reply = await self.registry.adispatch(message)
+        return await reply
 
-    @abstractmethod
     def think(self, message: AgentMessage) -> Optional[str]:
+        """athink 의 동기 래퍼"""
+        ensure_outside_loop(self._loop)
+        return llm.run_sync(self.athink(message))
+
+    @abstractmethod
+    async def athink(self, message: AgentMessage) -> Optional[str]:
         """
         메시지를 받고 스스로 생각하고 행동하는 메서드
         - 하위 클래스에서 ReAct 루프 등을 구현해야 함
+        - LLM 호출은 llm.achat 등 비동기 게이트웨이를 사용
+        - worker task에서 호출되며, 반환값이 송신자의 응답 future 결과가 됨
         """
         pass
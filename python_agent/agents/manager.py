@@ -1,13 +1,17 @@
+import asyncio
 import json
-import ollama
+import llm
 from actor import AgentActor, AgentMessage
-from config import MODEL_NAME
+from config import MODEL_NAME, SOCIETY_MAX_SUBQUESTIONS, SOCIETY_STREAM_HANDOFF
+from tracing import span
 
 
 class ManagerAgent(AgentActor):
     """
     관리자 에이전트 (Brain)
     - 사용자 입력을 분석하여 하위 에이전트(Researcher, Writer)에게 위임
+    - 조사가 필요한 요청은 서로 독립적인 하위 질문으로 나눠 Researcher 풀에 동시에 배분하고,
+      끝나는 조사 결과부터 Writer에게 넘겨 섹션 단위로 이어서 작성 (RESEARCH)
     - 작업 결과를 취합하여 최종 답변 생성
     """
 
@@ -20,7 +24,7 @@ class ManagerAgent(AgentActor):
             ),
         )
 
-    def think(self, message: AgentMessage) -> str:
+    async def athink(self, message: AgentMessage) -> str:
         # 하위 에이전트의 RESPONSE — 결과를 그대로 반환 (이미 send_message 반환값으로 처리됨)
         if message.msg_type == "RESPONSE":
             print(f"[Manager] Received report from {message.sender}")
@@ -32,14 +36,21 @@ class ManagerAgent(AgentActor):
 
 다음 JSON 형식으로만 응답하세요:
 {{
-    "action": "DELEGATE" or "ANSWER",
+    "action": "RESEARCH" or "DELEGATE" or "ANSWER",
     "target": "Researcher" or "Writer" or "None",
+    "sub_questions": ["서로 독립적으로 조사할 수 있는 하위 질문", "..."],
     "instruction": "하위 에이전트에게 내릴 구체적인 지시 사항"
-}}"""
+}}
+
+- RESEARCH: 여러 측면의 조사가 필요한 요청. sub_questions에 1~{SOCIETY_MAX_SUBQUESTIONS}개의 독립적인 하위 질문을 쓰고,
+  instruction에는 조사 결과로 Writer가 작성할 글의 지시를 쓰세요. (하위 질문은 동시에 조사됩니다)
+- DELEGATE: 한 명의 전문가(target)에게 맡기면 되는 요청.
+- ANSWER: 위임 없이 instruction에 바로 답변."""
 
         # fix: format은 ollama.chat() 최상위 인자로 전달해야 함
-        response = ollama.chat(
+        response = await llm.achat(
             model=MODEL_NAME,
+            site="manager.plan",
             format="json",
             messages=[{"role": "user", "content": prompt}],
         )
@@ -52,16 +63,119 @@ class ManagerAgent(AgentActor):
         action = plan.get("action", "ANSWER")
         target = plan.get("target", "None")
         instruction = plan.get("instruction", message.content)
+        sub_questions = [q.strip() for q in plan.get("sub_questions") or [] if isinstance(q, str) and q.strip()]
+
+        if action == "RESEARCH" and sub_questions:
+            return await self._research(sub_questions[:SOCIETY_MAX_SUBQUESTIONS], instruction, message)
 
         if action == "DELEGATE" and target in ("Researcher", "Writer"):
             print(f"[Manager] → {target}에게 위임: {instruction!r}")
-            result = self.send_message(
+            # 진행 이벤트 큐는 스트리밍 요청일 때만 — 빈 메타데이터여야 Society 결과 캐시 대상이 됨
+            events = message.metadata.get("events")
+            result = await self.asend_message(
                 recipient_name=target,
                 content=instruction,
                 msg_type="REQUEST",
                 context_id=message.context_id,
+                **({"events": events} if events is not None else {}),
             )
             return f"[{target} 결과]\n\n{result}"
 
         # ANSWER — Manager가 직접 답변
         return instruction
+
+    async def _research(self, sub_questions: list[str], instruction: str, message: AgentMessage) -> str:
+        """
+        하위 질문 동시 조사(fan-out) → Writer 종합(fan-in).
+        SOCIETY_STREAM_HANDOFF: 조사 결과가 하나 나올 때마다 handoff 큐로 넘겨 Writer가 조사와 겹쳐서 섹션을 작성.
+        꺼져 있으면 조사가 모두 끝난 뒤 Writer에게 한 번에 요청.
+        message.metadata["events"] 큐가 있으면 진행 상황(action/observation)과 Writer 토큰(final) 프레임을 넣음
+        """
+        events = message.metadata.get("events")
+        has_writer = self.registry.get_agent("Writer") is not None
+        handoff = asyncio.Queue() if has_writer and SOCIETY_STREAM_HANDOFF else None
+
+        report = None
+        if handoff is not None:
+            print(f"[Manager] → Writer에게 {len(sub_questions)}개 섹션 스트리밍 작성 요청")
+            report = self.send_message(
+                recipient_name="Writer",
+                content=f"{instruction}\n\n[원래 요청] {message.content}",
+                msg_type="REQUEST",
+                context_id=message.context_id,
+                sections=handoff,
+                events=events,
+            )
+        try:
+            findings = await self._fan_out(sub_questions, message.context_id, events, handoff)
+        finally:
+            if handoff is not None:
+                handoff.put_nowait(None)   # 조사 끝 — Writer가 결론을 쓰고 마무리
+
+        sections = "\n\n".join(
+            f"[하위 질문 {i}] {question}\n{finding}"
+            for i, (question, finding) in enumerate(zip(sub_questions, findings), start=1)
+        )
+        if not has_writer:
+            return sections
+
+        try:
+            if report is None:
+                print(f"[Manager] → Writer에게 {len(findings)}건의 조사 결과 종합 요청")
+                report = self.send_message(
+                    recipient_name="Writer",
+                    content=(
+                        f"{instruction}\n\n[원래 요청] {message.content}\n\n[조사 결과]\n{sections}\n\n"
+                        "위 조사 결과를 모두 종합해 하나의 글로 작성하세요."
+                    ),
+                    msg_type="REQUEST",
+                    context_id=message.context_id,
+                    events=events,
+                )
+            text = await report
+        except Exception as e:
+            print(f"[Manager] Writer failed: {e}")
+            return f"[Researcher ×{len(findings)} 결과 (Writer 실패: {e})]\n\n{sections}"
+        return f"[Researcher ×{len(findings)} → Writer 결과]\n\n{text}"
+
+    async def _fan_out(self, sub_questions: list[str], context_id: str,
+                       events: asyncio.Queue | None = None, handoff: asyncio.Queue | None = None) -> list[str]:
+        """
+        하위 질문을 Researcher 풀("Researcher", "Researcher-2", ...)에 배분해 동시에 조사.
+        한 Researcher는 한 번에 한 질문만 맡으며(idle 큐), 질문이 풀보다 많으면 먼저 끝난 Researcher가 다음 질문을 받음.
+        결과는 질문 순서대로 반환하고, 실패한 질문은 오류 문구로 대체 (나머지 결과는 유지).
+        handoff 큐가 있으면 끝나는 순서대로 (질문, 결과)를 바로 넣음
+        """
+        idle: asyncio.Queue[str] = asyncio.Queue()
+        for name in self.registry.find("Researcher"):
+            idle.put_nowait(name)
+        if idle.empty():
+            return ["(Researcher가 등록되어 있지 않습니다)"] * len(sub_questions)
+
+        async def research(question: str) -> str:
+            name = await idle.get()
+            try:
+                print(f"[Manager] → {name}: {question!r}")
+                if events is not None:
+                    events.put_nowait({"type": "action", "tool": name, "input": {"question": question}})
+                result = await self.asend_message(
+                    recipient_name=name,
+                    content=question,
+                    msg_type="REQUEST",
+                    context_id=context_id,
+                )
+                finding = str(result) if result is not None else "(결과 없음)"
+            except Exception as e:
+                print(f"[Manager] {name} failed: {e}")
+                finding = f"(조사 실패: {e})"
+            finally:
+                idle.put_nowait(name)
+            if events is not None:
+                events.put_nowait({"type": "observation", "content": f"[{name}] {question}\n{finding}"})
+            if handoff is not None:
+                handoff.put_nowait((question, finding))
+            return finding
+
+        with span("society.fanout", questions=len(sub_questions), workers=idle.qsize(),
+                  streaming=handoff is not None):
+            return await asyncio.gather(*(research(q) for q in sub_questions))
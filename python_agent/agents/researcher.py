@@ -1,14 +1,26 @@
-import ollama
+import asyncio
+import re
+
+import llm
 from actor import AgentActor, AgentMessage
-from tools.web_scraper import web_scrape_tool
+from tools.web_scraper import web_scrape_tool, new_async_client, afetch_page
 from tools.file_reader import read_file_tool
-from config import MODEL_NAME
+from passages import prepare_passages, arank_passages, pack_passages
+from tracing import span
+from config import (
+    MODEL_NAME, RESEARCHER_MAX_SOURCES, RESEARCHER_FETCH_TIMEOUT, RESEARCHER_CHUNK_TOKENS,
+    RESEARCHER_MAX_PASSAGES, RESEARCHER_DEDUP_THRESHOLD, RESEARCHER_CONTEXT_TOKENS, RESEARCHER_RERANK_TOP_K,
+)
+
+_RE_URL = re.compile(r"https?://[^\s'\"<>)\]]+")
 
 
 class ResearcherAgent(AgentActor):
     """
     조사 전문가 에이전트
     - web_scrape / read_file 도구 사용
+    - 계획에 나온 모든 URL·경로를 한 번에 동시에 가져오고(공유 httpx.AsyncClient),
+      거의 같은 문단은 제거한 뒤 요청과 가까운 조각부터 토큰 예산만큼 종합 프롬프트에 넣음
     - 팩트 위주의 정보 수집 후 결과 반환
     """
 
@@ -19,10 +31,10 @@ class ResearcherAgent(AgentActor):
             tools={"web_scrape": web_scrape_tool, "read_file": read_file_tool},
         )
 
-    def think(self, message: AgentMessage) -> str:
+    async def athink(self, message: AgentMessage) -> str:
         """
         도구를 활용해 조사하고 결과를 문자열로 반환합니다.
-        반환값은 send_message() 호출 체인을 통해 호출자(Manager)에게 전달되므로
+        반환값은 asend_message() 호출 체인을 통해 호출자(Manager)에게 전달되므로
         별도로 send_message를 다시 호출하지 않습니다. (double-dispatch 방지)
         """
         # 1단계: 도구 사용 여부 결정
@@ -30,52 +42,90 @@ class ResearcherAgent(AgentActor):
 [Request] {message.content}
 
 사용 가능한 도구: web_scrape(url), read_file(path)
-도구를 사용해야 하면 다음 형식으로 응답하세요:
+도구를 사용해야 하면 필요한 출처마다 다음 형식으로 나열하세요 (최대 {RESEARCHER_MAX_SOURCES}개, 동시에 가져옵니다):
   TOOL: web_scrape
   INPUT: <URL>
 도구가 불필요하면 바로 답변을 작성하세요."""
 
-        plan_response = ollama.chat(
+        plan_response = await llm.achat(
             model=MODEL_NAME,
+            site="researcher.plan",
             messages=[{"role": "user", "content": prompt_plan}],
         )
         plan_text = plan_response["message"]["content"]
 
-        # 도구 호출 파싱
-        tool_result = ""
-        if "TOOL: web_scrape" in plan_text:
-            lines = plan_text.splitlines()
-            for i, line in enumerate(lines):
-                if line.strip().startswith("INPUT:") and i > 0:
-                    url = line.replace("INPUT:", "").strip()
-                    tool_result = self.tools["web_scrape"]({"url": url})
-                    print(f"[Researcher] web_scrape({url!r}) → {len(tool_result)}자")
-                    break
-        elif "TOOL: read_file" in plan_text:
-            lines = plan_text.splitlines()
-            for i, line in enumerate(lines):
-                if line.strip().startswith("INPUT:") and i > 0:
-                    path = line.replace("INPUT:", "").strip()
-                    tool_result = self.tools["read_file"]({"path": path})
-                    print(f"[Researcher] read_file({path!r}) → {len(tool_result)}자")
-                    break
-
-        # 2단계: 수집 결과를 바탕으로 최종 정리
-        if tool_result:
-            synthesis_prompt = f"""다음 수집 자료를 바탕으로 '{message.content}' 요청에 답하세요.
+        sources = self._plan_sources(plan_text, message.content)
+        if not sources:
+            # 도구 없이 LLM 지식 활용
+            print(f"[Researcher] 조사 완료 ({len(plan_text)}자)")
+            return plan_text
 
-[수집 자료]
-{tool_result[:2000]}
+        # 2단계: 모든 출처를 동시에 수집 → 중복 제거 → 요청과 가까운 조각을 예산만큼
+        material = await self._gather(message.content, sources)
+        if not material:
+            print("[Researcher] 수집 실패 — 계획 응답으로 대체")
+            return plan_text
 
-팩트 위주로 간결하게 정리해주세요."""
-            synth = ollama.chat(
-                model=MODEL_NAME,
-                messages=[{"role": "user", "content": synthesis_prompt}],
-            )
-            answer = synth["message"]["content"]
-        else:
-            # 도구 없이 LLM 지식 활용
-            answer = plan_text
+        # 3단계: 수집 결과를 바탕으로 최종 정리
+        synthesis_prompt = f"""다음 수집 자료를 바탕으로 '{message.content}' 요청에 답하세요.
+
+[수집 자료]
+{material}
 
+팩트 위주로 간결하게 정리하고, 각 내용의 출처를 밝혀주세요."""
+        synth = await llm.achat(
+            model=MODEL_NAME,
+            site="researcher.synth",
+            messages=[{"role": "user", "content": synthesis_prompt}],
+        )
+        answer = synth["message"]["content"]
         print(f"[Researcher] 조사 완료 ({len(answer)}자)")
         return answer
+
+    @staticmethod
+    def _plan_sources(plan_text: str, request: str) -> list[tuple[str, str]]:
+        """
+        계획의 TOOL/INPUT 쌍과 계획·요청 본문에 나온 URL을 (도구, 입력) 목록으로 (중복 제거, 최대 RESEARCHER_MAX_SOURCES개).
+        INPUT 앞에 TOOL이 없으면 URL은 web_scrape, 그 외는 read_file로 취급
+        """
+        sources: list[tuple[str, str]] = []
+        tool = None
+        for line in plan_text.splitlines():
+            line = line.strip()
+            if line.startswith("TOOL:"):
+                tool = line.replace("TOOL:", "").strip()
+            elif line.startswith("INPUT:"):
+                value = line.replace("INPUT:", "").strip().strip("<>\"'")
+                if not value:
+                    continue
+                if tool not in ("web_scrape", "read_file"):
+                    tool = "web_scrape" if _RE_URL.match(value) else "read_file"
+                sources.append((tool, value))
+        sources += [("web_scrape", url.rstrip(".,")) for url in _RE_URL.findall(f"{plan_text}\n{request}")]
+        return list(dict.fromkeys(sources))[:RESEARCHER_MAX_SOURCES]
+
+    async def _gather(self, request: str, sources: list[tuple[str, str]]) -> str:
+        with span("researcher.gather", sources=len(sources)) as gather_span:
+            async with new_async_client(timeout=RESEARCHER_FETCH_TIMEOUT) as client:
+                texts = await asyncio.gather(*(
+                    afetch_page(client, value) if tool == "web_scrape"
+                    else asyncio.to_thread(self.tools["read_file"], {"path": value})
+                    for tool, value in sources
+                ))
+
+            documents = []
+            for (tool, value), text in zip(sources, texts):
+                print(f"[Researcher] {tool}({value!r}) → {len(text)}자")
+                if not text.startswith(("ERROR", "DENIED")):
+                    documents.append((value, text))
+
+            # 분할·MinHash 중복 제거는 CPU 작업 — 다른 에이전트와 API 요청이 멈추지 않도록 스레드에서
+            total, unique = await asyncio.to_thread(
+                prepare_passages, documents, RESEARCHER_CHUNK_TOKENS, RESEARCHER_MAX_PASSAGES,
+                RESEARCHER_DEDUP_THRESHOLD,
+            )
+            ranked = await arank_passages(request, unique, RESEARCHER_RERANK_TOP_K)
+            material = pack_passages(ranked, RESEARCHER_CONTEXT_TOKENS)
+            gather_span.set(passages=total, unique=len(unique))
+            print(f"[Researcher] 조각 {total}개 → 중복 제거 {len(unique)}개 → 예산 내 선별")
+            return material
@@ -1,6 +1,9 @@
-import ollama
+import asyncio
+
+import llm
 from actor import AgentActor, AgentMessage
 from config import MODEL_NAME
+from context_window import clip
 
 
 class WriterAgent(AgentActor):
@@ -8,6 +11,8 @@ class WriterAgent(AgentActor):
     작가 에이전트
     - 정보를 종합하여 보고서·요약·글 작성
     - 별도 도구 없이 LLM 작문 능력 활용
+    - metadata["sections"] 큐가 오면 조사 결과가 도착하는 대로 섹션을 이어서 작성 (Researcher → Writer 스트리밍 인계)
+    - metadata["events"] 큐가 있으면 작성 중인 토큰을 {"type": "final", "delta"} 프레임으로 넣음
     """
 
     def __init__(self, name: str = "Writer"):
@@ -19,17 +24,77 @@ class WriterAgent(AgentActor):
             ),
         )
 
-    def think(self, message: AgentMessage) -> str:
+    async def athink(self, message: AgentMessage) -> str:
         """
         요청 내용을 잘 정리된 글로 작성하여 반환합니다.
-        반환값은 send_message() 체인을 통해 호출자(Manager)에게 전달되므로
+        반환값은 asend_message() 체인을 통해 호출자(Manager)에게 전달되므로
         별도로 send_message를 다시 호출하지 않습니다. (double-dispatch 방지)
         """
+        events = message.metadata.get("events")
+        sections = message.metadata.get("sections")
+        if sections is not None:
+            return await self._write_sections(message.content, sections, events)
+
         prompt = f"[System] {self.persona}\n[Request] {message.content}"
-        response = ollama.chat(
-            model=MODEL_NAME,
-            messages=[{"role": "user", "content": prompt}],
-        )
-        answer = response["message"]["content"]
+        answer = await self._generate(prompt, "writer", events)
         print(f"[Writer] 작성 완료 ({len(answer)}자)")
         return answer
+
+    async def _write_sections(self, request: str, sections: asyncio.Queue, events: asyncio.Queue | None) -> str:
+        """(질문, 조사 결과)가 들어오는 순서대로 한 섹션씩 작성하고, None(조사 끝)이 오면 결론으로 마무리"""
+        parts = []
+        while (item := await sections.get()) is not None:
+            question, finding = item
+            written = "\n".join(f"- {part.splitlines()[0]}" for part in parts) or "(없음)"
+            prompt = f"""[System] {self.persona}
+[Request] {request}
+
+보고서를 섹션 단위로 이어서 작성하고 있습니다. 이미 작성한 섹션 제목:
+{written}
+
+[이번 섹션 주제] {question}
+[조사 자료]
+{clip(finding, 1500)}
+
+위 자료만으로 보고서의 다음 섹션 하나를 작성하세요. "## 제목" 한 줄로 시작하고, 서론·결론은 쓰지 마세요."""
+            if parts:
+                self._emit(events, "\n\n")
+            parts.append(await self._generate(prompt, "writer.section", events))
+            print(f"[Writer] 섹션 {len(parts)} 작성 ({len(parts[-1])}자)")
+
+        if not parts:
+            return ""
+        drafts = "\n\n".join(clip(part, 600) for part in parts)
+        prompt = f"""[System] {self.persona}
+[Request] {request}
+
+[작성된 섹션]
+{drafts}
+
+위 섹션들을 바탕으로 보고서의 결론을 "## 결론" 제목과 함께 한두 문단으로 작성하세요. 섹션 내용을 반복하지 마세요."""
+        self._emit(events, "\n\n")
+        parts.append(await self._generate(prompt, "writer.conclusion", events))
+        answer = "\n\n".join(parts)
+        print(f"[Writer] 작성 완료 ({len(answer)}자, {len(parts) - 1}개 섹션)")
+        return answer
+
+    async def _generate(self, prompt: str, site: str, events: asyncio.Queue | None) -> str:
+        """events 큐가 있으면 스트리밍으로 생성하며 토큰을 흘려보냄"""
+        messages = [{"role": "user", "content": prompt}]
+        if events is None:
+            response = await llm.achat(model=MODEL_NAME, site=site, messages=messages)
+            return response["message"]["content"]
+
+        stream = await llm.achat(model=MODEL_NAME, site=site, messages=messages, stream=True)
+        parts = []
+        async for chunk in stream:
+            delta = chunk["message"]["content"]
+            if delta:
+                parts.append(delta)
+                self._emit(events, delta)
+        return "".join(parts)
+
+    @staticmethod
+    def _emit(events: asyncio.Queue | None, delta: str):
+        if events is not None:
+            events.put_nowait({"type": "final", "delta": delta})
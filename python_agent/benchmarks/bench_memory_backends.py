@@ -0,0 +1,87 @@
+"""
+bench_memory_backends.py — AgentMemory 저장소 백엔드 비교 (ChromaStore vs NumpyStore)
+
+Ollama 없이 난수 벡터를 저장소에 직접 넣어 다음 항목을 측정합니다.
+  - open  : 기존 데이터가 있는 저장소를 여는 시간 (chromadb import 포함)
+  - add   : 1,000건 배치 기록 처리량 (docs/s)
+  - query : top-5 검색 지연 p50 / p95
+  - recall: NumpyStore 결과가 정확한(brute-force) top-5와 겹치는 비율 — IVF 구간에서 1.0 미만
+
+실행:
+  cd python_agent
+  python benchmarks/bench_memory_backends.py --sizes 1000,10000,50000 --queries 200
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from vector_store import ChromaStore, NumpyStore  # noqa: E402
+
+BACKENDS = {"chroma": ChromaStore, "numpy": NumpyStore}
+
+
+def _fill(store, vectors: np.ndarray, chunk: int = 1000) -> float:
+    """vectors를 chunk 단위로 기록하고 초당 문서 수 반환"""
+    t = time.perf_counter()
+    for start in range(0, len(vectors), chunk):
+        batch = vectors[start:start + chunk]
+        store.add(
+            ids=[str(uuid.uuid4()) for _ in batch],
+            embeddings=batch.tolist(),
+            documents=[f"[Chat] 기억 #{start + i} — 샘플 문서" for i in range(len(batch))],
+            metadatas=[{"type": "chat"} for _ in batch],
+        )
+    return len(vectors) / (time.perf_counter() - t)
+
+
+def _measure(store, queries: np.ndarray) -> tuple[float, float, list[list[str]]]:
+    samples, results = [], []
+    for q in queries:
+        t = time.perf_counter()
+        results.append(store.query(q.tolist(), 5))
+        samples.append((time.perf_counter() - t) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1], results
+
+
+def _exact(vectors: np.ndarray, queries: np.ndarray) -> list[set[str]]:
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    top = np.argsort(-(queries @ normed.T), axis=1)[:, :5]
+    return [{f"[Chat] 기억 #{i} — 샘플 문서" for i in row} for row in top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AgentMemory backend benchmark")
+    parser.add_argument("--sizes", default="1000,10000,50000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=768)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+    print(f"{'backend':>8} {'docs':>8} | {'open ms':>8} {'add/s':>9} | {'p50':>7} {'p95':>7} (ms) | {'recall':>6}")
+    for size in sorted(int(s) for s in args.sizes.split(",")):
+        vectors = rng.standard_normal((size, args.dim), dtype=np.float32)
+        exact = _exact(vectors, queries)
+        for name, cls in BACKENDS.items():
+            with tempfile.TemporaryDirectory() as tmp:
+                throughput = _fill(cls(tmp), vectors)
+                t = time.perf_counter()
+                store = cls(tmp)
+                opened = (time.perf_counter() - t) * 1000
+                p50, p95, results = _measure(store, queries)
+                recall = statistics.mean(len(exact[i] & {doc for _, doc in r}) / 5 for i, r in enumerate(results))
+                print(f"{name:>8} {size:>8} | {opened:>8.1f} {throughput:>9.0f} | {p50:>7.2f} {p95:>7.2f}      | {recall:>6.3f}")
+                del store
+
+
+if __name__ == "__main__":
+    main()
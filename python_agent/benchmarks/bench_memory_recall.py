@@ -0,0 +1,94 @@
+"""
+bench_memory_recall.py — AgentMemory.recall 지연 시간 vs 컬렉션 크기 마이크로 벤치마크
+
+가짜 임베더(해시 시드 기반 결정적 난수 벡터)를 사용하므로 Ollama 없이 실행됩니다.
+같은 컬렉션을 1k → 10k → 100k 로 키워가며 다음 두 경로를 비교합니다.
+  - legacy : count() 2회 + query() (이전 구현)
+  - recall : 문서 카운터 + query() 1회 (현재 구현)
+
+실행:
+  cd python_agent
+  python benchmarks/bench_memory_recall.py --sizes 1000,10000,100000 --queries 200
+"""
+import argparse
+import hashlib
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from memory import AgentMemory  # noqa: E402
+
+
+class FakeEmbedMemory(AgentMemory):
+    """Ollama 대신 텍스트 해시로 결정적인 벡터를 만드는 AgentMemory"""
+
+    def __init__(self, persist_dir: str, dim: int):
+        self.dim = dim
+        super().__init__(persist_dir, backend="chroma")
+
+    def _fake(self, text: str) -> list[float]:
+        rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+        return [rng.uniform(-1.0, 1.0) for _ in range(self.dim)]
+
+    def _embed(self, text: str) -> list[float]:
+        return self._fake(text)
+
+    def _embed_batch(self, texts: list[str]) -> list[list[float]]:
+        return [self._fake(t) for t in texts]
+
+    def legacy_recall(self, query: str, n_results: int = 5) -> list[str]:
+        collection = self.store.collection
+        if collection.count() == 0:
+            return []
+        results = collection.query(
+            query_embeddings=[self._embed(query)],
+            n_results=min(n_results, collection.count()),
+        )
+        return results["documents"][0] if results["documents"] else []
+
+
+def _grow(memory: FakeEmbedMemory, target: int, chunk: int = 1000):
+    while memory.count < target:
+        start = memory.count
+        n = min(chunk, target - start)
+        memory._write_batch([(f"[Chat] 기억 #{i} — 샘플 문서", {"type": "chat"}) for i in range(start, start + n)])
+
+
+def _measure(fn, queries: list[str]) -> tuple[float, float]:
+    samples = []
+    for q in queries:
+        t = time.perf_counter()
+        fn(q)
+        samples.append((time.perf_counter() - t) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AgentMemory recall latency benchmark")
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=256)
+    args = parser.parse_args()
+
+    sizes = sorted(int(s) for s in args.sizes.split(","))
+    queries = [f"질문 {i}" for i in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = FakeEmbedMemory(tmp, args.dim)
+        print(f"{'docs':>8} | {'legacy p50':>10} {'p95':>8} | {'recall p50':>10} {'p95':>8}  (ms)")
+        for size in sizes:
+            _grow(memory, size)
+            legacy = _measure(memory.legacy_recall, queries)
+            current = _measure(memory.recall, queries)
+            print(f"{size:>8} | {legacy[0]:>10.2f} {legacy[1]:>8.2f} | {current[0]:>10.2f} {current[1]:>8.2f}")
+        memory.close()
+
+
+if __name__ == "__main__":
+    main()
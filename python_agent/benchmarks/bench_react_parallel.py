@@ -0,0 +1,130 @@
+"""
+bench_react_parallel.py — ReAct 순차 실행 vs 병렬 멀티 액션(REACT_PARALLEL_ACTIONS) 비교
+
+LLM(llm.achat)을 미리 정해 둔 응답을 돌려주는 가짜로 바꾸고, 도구도 sleep 기반 가짜를 사용하므로
+Ollama·네트워크 없이 실행됩니다. 같은 작업을 두 모드로 실행해 LLM 호출 수와 벽시계 시간을 비교합니다.
+
+실행:
+  cd python_agent
+  python benchmarks/bench_react_parallel.py --llm-latency 0.8
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import react_loop  # noqa: E402
+from react_loop import ReActAgent  # noqa: E402
+
+TOOL_LATENCY = {"web_search": 0.6, "web_scrape": 0.9, "read_file": 0.05, "write_file": 0.05}
+
+
+def _fake_tool(name: str):
+    def tool(args: dict) -> str:
+        time.sleep(TOOL_LATENCY[name])
+        return f"{name} 결과: {args}"
+    tool.__doc__ = f"fake {name}"
+    return tool
+
+
+def _search(q: str) -> dict:
+    return {"tool": "web_search", "input": {"query": q}}
+
+
+# (작업 이름, 순차 모드 LLM 응답들, 병렬 모드 LLM 응답들)
+TASKS = [
+    (
+        "search 3 topics + save",
+        [
+            'Thought: 비트코인 검색\nAction: web_search\nAction Input: {"query": "비트코인"}',
+            'Thought: 이더리움 검색\nAction: web_search\nAction Input: {"query": "이더리움"}',
+            'Thought: 솔라나 검색\nAction: web_search\nAction Input: {"query": "솔라나"}',
+            'Thought: 저장\nAction: write_file\nAction Input: {"path": "a.txt", "content": "..."}',
+            "Thought: 완료\nFinal Answer: 저장했습니다.",
+        ],
+        [
+            "Thought: 독립 검색 3개\nActions: "
+            + json.dumps([_search("비트코인"), _search("이더리움"), _search("솔라나")], ensure_ascii=False),
+            'Thought: 저장\nAction: write_file\nAction Input: {"path": "a.txt", "content": "..."}',
+            "Thought: 완료\nFinal Answer: 저장했습니다.",
+        ],
+    ),
+    (
+        "scrape 4 pages + summarize",
+        [f'Thought: {i}번 페이지\nAction: web_scrape\nAction Input: {{"url": "https://example.com/{i}"}}' for i in range(4)]
+        + ["Thought: 요약\nFinal Answer: 요약입니다."],
+        [
+            "Thought: 4개 동시 수집\nActions: ["
+            + ", ".join(f'{{"tool": "web_scrape", "input": {{"url": "https://example.com/{i}"}}}}' for i in range(4))
+            + "]",
+            "Thought: 요약\nFinal Answer: 요약입니다.",
+        ],
+    ),
+    (
+        "read 2 files + write report",
+        [
+            'Thought: a 읽기\nAction: read_file\nAction Input: {"path": "a.txt"}',
+            'Thought: b 읽기\nAction: read_file\nAction Input: {"path": "b.txt"}',
+            'Thought: 작성\nAction: write_file\nAction Input: {"path": "r.txt", "content": "..."}',
+            "Thought: 완료\nFinal Answer: 보고서를 작성했습니다.",
+        ],
+        [
+            'Thought: 두 파일 동시 읽기\nActions: [{"tool": "read_file", "input": {"path": "a.txt"}}, '
+            '{"tool": "read_file", "input": {"path": "b.txt"}}]',
+            'Thought: 작성\nAction: write_file\nAction Input: {"path": "r.txt", "content": "..."}',
+            "Thought: 완료\nFinal Answer: 보고서를 작성했습니다.",
+        ],
+    ),
+]
+
+
+class ScriptedLLM:
+    """llm.achat 대체 — 호출마다 다음 응답을 한 청크 스트림으로 반환"""
+
+    def __init__(self, outputs: list[str], latency: float):
+        self.outputs = list(outputs)
+        self.latency = latency
+        self.calls = 0
+
+    async def achat(self, **kwargs):
+        await asyncio.sleep(self.latency)
+        self.calls += 1
+        text = self.outputs.pop(0)
+
+        async def stream():
+            yield {"message": {"content": text}, "done": True}
+        return stream()
+
+
+async def _run(script: list[str], parallel: bool, latency: float) -> tuple[int, float]:
+    fake = ScriptedLLM(script, latency)
+    react_loop.llm.achat = fake.achat
+    agent = ReActAgent(tools={name: _fake_tool(name) for name in TOOL_LATENCY}, parallel_actions=parallel)
+    start = time.perf_counter()
+    await agent.arun("benchmark task")
+    return fake.calls, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ReAct parallel multi-action benchmark")
+    parser.add_argument("--llm-latency", type=float, default=0.8, help="seconds per fake LLM call")
+    args = parser.parse_args()
+
+    original = react_loop.llm.achat
+    print(f"{'task':<28} | {'seq calls':>9} {'seq s':>7} | {'par calls':>9} {'par s':>7} | {'saved':>6}")
+    try:
+        for name, sequential, parallel in TASKS:
+            seq_calls, seq_time = asyncio.run(_run(sequential, False, args.llm_latency))
+            par_calls, par_time = asyncio.run(_run(parallel, True, args.llm_latency))
+            saved = 1 - par_time / seq_time
+            print(f"{name:<28} | {seq_calls:>9} {seq_time:>7.2f} | {par_calls:>9} {par_time:>7.2f} | {saved:>6.0%}")
+    finally:
+        react_loop.llm.achat = original
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+bench_react_prefetch.py — ReAct 조기 도구 실행(REACT_EARLY_ACTION)·선읽기(REACT_PREFETCH) 지연 비교
+
+녹화해 둔 작업들의 LLM 출력을 토큰 단위 스트림(첫 토큰 지연 + 토큰 간격)으로 재생하고, 도구는 sleep 기반 가짜를
+사용하므로 Ollama·네트워크 없이 실행됩니다. 같은 작업을 세 가지 설정으로 실행해 작업당 전체 시간을 비교합니다.
+  - baseline : "Observation:" 정지 시퀀스까지 생성을 모두 받은 뒤 도구 실행
+  - early    : Action Input JSON이 완성되는 즉시 스트림을 닫고 도구 실행
+  - prefetch : early + web_search 결과의 상위 URL을 다음 Thought 생성 중에 미리 web_scrape
+
+실행:
+  cd python_agent
+  python benchmarks/bench_react_prefetch.py --first-token 0.3 --token-interval 0.03
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import react_loop  # noqa: E402
+from react_loop import ReActAgent  # noqa: E402
+
+TOOL_LATENCY = {"web_search": 0.8, "web_scrape": 1.2, "list_dir": 0.05, "read_file": 0.05}
+
+# 작은 모델은 Action Input 뒤에 시스템 프롬프트 예시를 흉내 낸 문장을 덧붙인 뒤에야 정지 시퀀스에 도달하는 경우가 많음
+_TAIL = "\n\n(시스템이 Observation 제공)\n\nObservation:"
+
+
+def _search_result(args: dict) -> str:
+    topic = args.get("query", "")
+    return "\n".join(
+        f"[{i}] {topic} 관련 기사 {i}\n    URL: https://news.example.com/{i}\n    요약: ...\n" for i in (1, 2, 3)
+    )
+
+
+def _fake_tool(name: str):
+    def tool(args: dict) -> str:
+        time.sleep(TOOL_LATENCY[name])
+        return _search_result(args) if name == "web_search" else f"{name} 결과: {args}"
+    tool.__doc__ = f"fake {name}"
+    return tool
+
+
+# 녹화된 작업: 단계별 LLM 출력 (Action 단계는 _TAIL까지 생성되던 것을 그대로 재현)
+TASKS = {
+    "news → top article": [
+        '최신 반도체 뉴스를 먼저 검색해야 합니다. 검색 결과에서 가장 관련 있는 기사를 골라 본문을 읽겠습니다.\n'
+        'Action: web_search\nAction Input: {"query": "반도체 뉴스"}' + _TAIL,
+        '검색 결과 중 첫 번째 기사가 가장 최신이고 주제와 직접 관련이 있으므로 본문을 가져와 핵심 내용을 확인합니다.\n'
+        'Action: web_scrape\nAction Input: {"url": "https://news.example.com/1"}' + _TAIL,
+        "기사 본문을 확인했습니다.\nFinal Answer: 반도체 업계 최신 소식을 요약했습니다.",
+    ],
+    "news → two articles": [
+        '두 출처를 비교하려면 먼저 검색이 필요합니다.\n'
+        'Action: web_search\nAction Input: {"query": "금리 전망"}' + _TAIL,
+        '첫 번째 기사부터 읽고 주요 수치를 정리하겠습니다. 이후 두 번째 기사와 비교합니다.\n'
+        'Action: web_scrape\nAction Input: {"url": "https://news.example.com/1"}' + _TAIL,
+        '첫 번째 기사의 전망을 확인했으니 두 번째 기사의 관점을 비교하기 위해 본문을 가져옵니다.\n'
+        'Action: web_scrape\nAction Input: {"url": "https://news.example.com/2"}' + _TAIL,
+        "두 기사를 비교했습니다.\nFinal Answer: 두 기관의 금리 전망을 비교 정리했습니다.",
+    ],
+    "list → read file": [
+        '바탕화면에 어떤 파일이 있는지 확인합니다.\n'
+        'Action: list_dir\nAction Input: {"path": "Desktop"}' + _TAIL,
+        '메모 파일의 내용을 읽어 요약합니다.\n'
+        'Action: read_file\nAction Input: {"path": "Desktop/memo.txt"}' + _TAIL,
+        "파일 내용을 확인했습니다.\nFinal Answer: 메모 내용을 요약했습니다.",
+    ],
+}
+
+CONFIGS = {
+    "baseline": {"early_action": False, "prefetch": False},
+    "early": {"early_action": True, "prefetch": False},
+    "prefetch": {"early_action": True, "prefetch": True},
+}
+
+
+class RecordedLLM:
+    """llm.achat 대체 — 녹화된 출력을 첫 토큰 지연 후 3글자씩 토큰 간격으로 스트리밍 (소비자가 닫으면 즉시 중단)"""
+
+    def __init__(self, outputs: list[str], first_token: float, interval: float):
+        self.outputs = list(outputs)
+        self.first_token = first_token
+        self.interval = interval
+
+    async def achat(self, **kwargs):
+        text = self.outputs.pop(0)
+
+        async def stream():
+            await asyncio.sleep(self.first_token)
+            for i in range(0, len(text), 3):
+                yield {"message": {"content": text[i:i + 3]}, "done": False}
+                await asyncio.sleep(self.interval)
+            yield {"message": {"content": ""}, "done": True}
+        return stream()
+
+
+async def _run(script: list[str], options: dict, first_token: float, interval: float) -> float:
+    react_loop.llm.achat = RecordedLLM(script, first_token, interval).achat
+    agent = ReActAgent(tools={name: _fake_tool(name) for name in TOOL_LATENCY}, **options)
+    start = time.perf_counter()
+    await agent.arun("benchmark task")
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ReAct early action / prefetch latency benchmark")
+    parser.add_argument("--first-token", type=float, default=0.3, help="seconds before the first token")
+    parser.add_argument("--token-interval", type=float, default=0.03, help="seconds between 3-char tokens")
+    args = parser.parse_args()
+
+    original = react_loop.llm.achat
+    totals = dict.fromkeys(CONFIGS, 0.0)
+    rows = []
+    try:
+        for name, script in TASKS.items():
+            row = {}
+            for config_name, options in CONFIGS.items():
+                row[config_name] = asyncio.run(_run(script, options, args.first_token, args.token_interval))
+                totals[config_name] += row[config_name]
+            rows.append((name, row))
+    finally:
+        react_loop.llm.achat = original
+
+    print(f"{'task':<22} | " + " ".join(f"{c:>9}" for c in CONFIGS) + " | saved")
+    for name, row in rows + [("TOTAL", totals)]:
+        saved = 1 - row["prefetch"] / row["baseline"]
+        print(f"{name:<22} | " + " ".join(f"{row[c]:>8.2f}s" for c in CONFIGS) + f" | {saved:>5.0%}")
+
+
+if __name__ == "__main__":
+    main()
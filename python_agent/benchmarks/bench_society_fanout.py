@@ -0,0 +1,91 @@
+"""
+bench_society_fanout.py — Society 조사 fan-out: Researcher 풀 크기(1 → 8)에 따른 전체 처리 시간
+
+llm.achat을 고정 지연의 가짜 응답으로 대체하므로 Ollama 없이 실행됩니다.
+Manager가 N개의 독립 하위 질문(RESEARCH)을 계획하면 Researcher 풀이 동시에 조사하고,
+Writer가 결과를 한 번에 종합합니다. 풀 크기만 바꿔 같은 요청의 처리 시간과 속도 향상을 비교합니다.
+
+실행:
+  cd python_agent
+  python benchmarks/bench_society_fanout.py --questions 8 --latency 0.5
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import llm  # noqa: E402
+from actor import AgentMessage  # noqa: E402
+from registry import AgentRegistry  # noqa: E402
+from agents.manager import ManagerAgent  # noqa: E402
+from agents.researcher import ResearcherAgent  # noqa: E402
+from agents.writer import WriterAgent  # noqa: E402
+import agents.manager  # noqa: E402
+
+POOL_SIZES = (1, 2, 4, 8)
+
+
+class StubLLM:
+    """llm.achat 대체 — 호출 위치(site)별로 고정 지연 후 정해진 응답 반환"""
+
+    def __init__(self, questions: int, latency: float):
+        self.questions = questions
+        self.latency = latency
+
+    async def achat(self, site: str = "", **kwargs):
+        await asyncio.sleep(self.latency)
+        if site == "manager.plan":
+            content = json.dumps({
+                "action": "RESEARCH",
+                "target": "None",
+                "sub_questions": [f"하위 질문 {i}" for i in range(1, self.questions + 1)],
+                "instruction": "조사 결과를 보고서로 정리",
+            }, ensure_ascii=False)
+        elif site == "writer":
+            content = "종합 보고서"
+        else:
+            content = "조사 결과: 관련 사실 정리"
+        return {"message": {"role": "assistant", "content": content}}
+
+
+async def _run(pool_size: int) -> float:
+    registry = AgentRegistry()
+    manager = ManagerAgent()
+    researchers = [ResearcherAgent(name="Researcher" if i == 1 else f"Researcher-{i}") for i in range(1, pool_size + 1)]
+    for agent in (manager, *researchers, WriterAgent()):
+        registry.register(agent)
+
+    start = time.perf_counter()
+    await manager.areceive_message(AgentMessage(sender="User", recipient="Manager", content="benchmark request"))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Society researcher fan-out scaling benchmark")
+    parser.add_argument("--questions", type=int, default=8, help="sub-questions planned by the Manager")
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per stubbed LLM call")
+    args = parser.parse_args()
+
+    original = llm.achat
+    # 벤치마크에서는 하위 질문 상한을 질문 수에 맞추고, 조사 단계만 비교하도록 Writer는 한 번에 종합
+    agents.manager.SOCIETY_MAX_SUBQUESTIONS = max(args.questions, agents.manager.SOCIETY_MAX_SUBQUESTIONS)
+    agents.manager.SOCIETY_STREAM_HANDOFF = False
+    llm.achat = StubLLM(args.questions, args.latency).achat
+    try:
+        results = {n: asyncio.run(_run(n)) for n in POOL_SIZES}
+    finally:
+        llm.achat = original
+
+    baseline = results[POOL_SIZES[0]]
+    print(f"\n{args.questions} sub-questions, {args.latency:.2f}s per LLM call")
+    print(f"{'researchers':>11} | {'wall':>7} | speedup")
+    for n, elapsed in results.items():
+        print(f"{n:>11} | {elapsed:>6.2f}s | {baseline / elapsed:>5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
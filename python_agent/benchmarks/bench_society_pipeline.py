@@ -0,0 +1,138 @@
+"""
+bench_society_pipeline.py — Society 보고서의 첫 문단 도착 시간: 순차 종합 vs Researcher → Writer 스트리밍 인계
+
+llm.achat을 지연을 흉내 낸 가짜 응답(조사: 질문마다 다른 소요 시간, Writer: 첫 토큰 지연 + 토큰 간격 스트리밍)으로
+대체하므로 Ollama 없이 실행됩니다. 같은 요청을 두 방식으로 처리하고, 클라이언트가 받는 프레임 기준으로 비교합니다.
+  - sequential : 조사가 모두 끝난 뒤 Writer가 보고서를 한 번에 작성 (SOCIETY_STREAM_HANDOFF = False)
+  - streaming  : 먼저 끝난 조사 결과부터 Writer가 섹션 단위로 이어서 작성 (SOCIETY_STREAM_HANDOFF = True)
+지표: 첫 토큰, 첫 문단(빈 줄로 끝난 첫 문단), 전체 완료 시간
+
+실행:
+  cd python_agent
+  python benchmarks/bench_society_pipeline.py --questions 4 --research 1.0 --spread 0.5
+"""
+import argparse
+import asyncio
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import llm  # noqa: E402
+from actor import AgentMessage  # noqa: E402
+from registry import AgentRegistry  # noqa: E402
+from agents.manager import ManagerAgent  # noqa: E402
+from agents.researcher import ResearcherAgent  # noqa: E402
+from agents.writer import WriterAgent  # noqa: E402
+import agents.manager  # noqa: E402
+
+_PARAGRAPH = "조사 자료에 따르면 이 주제는 최근 몇 년 사이 빠르게 변하고 있으며 주요 수치와 근거는 다음과 같습니다."
+
+
+class StubLLM:
+    """llm.achat 대체 — 조사(researcher.plan)는 질문 번호에 비례한 지연, Writer 호출은 토큰 스트리밍"""
+
+    def __init__(self, questions: int, research: float, spread: float, first_token: float, interval: float):
+        self.questions = questions
+        self.research = research
+        self.spread = spread
+        self.first_token = first_token
+        self.interval = interval
+
+    async def achat(self, site: str = "", messages=(), stream: bool = False, **kwargs):
+        if site == "manager.plan":
+            await asyncio.sleep(self.first_token)
+            return self._reply(json.dumps({
+                "action": "RESEARCH",
+                "target": "None",
+                "sub_questions": [f"하위 질문 {i}" for i in range(1, self.questions + 1)],
+                "instruction": "조사 결과를 보고서로 정리",
+            }, ensure_ascii=False))
+        if site.startswith("researcher"):
+            number = int(re.search(r"하위 질문 (\d+)", messages[-1]["content"]).group(1))
+            await asyncio.sleep(self.research * (1 + self.spread * (number - 1)))
+            return self._reply(f"하위 질문 {number} 조사 결과: 관련 사실 정리")
+
+        # Writer — 섹션은 두 문단, 한 번에 쓰는 보고서는 질문 수 × 두 문단
+        paragraphs = 2 * (self.questions if site == "writer" else 1)
+        text = "\n\n".join([f"## {site}"] + [_PARAGRAPH] * paragraphs)
+        if not stream:
+            await asyncio.sleep(self.first_token + self.interval * len(text) / 3)
+            return self._reply(text)
+
+        async def chunks():
+            await asyncio.sleep(self.first_token)
+            for i in range(0, len(text), 3):
+                yield {"message": {"content": text[i:i + 3]}, "done": False}
+                await asyncio.sleep(self.interval)
+            yield {"message": {"content": ""}, "done": True}
+        return chunks()
+
+    @staticmethod
+    def _reply(content: str) -> dict:
+        return {"message": {"role": "assistant", "content": content}}
+
+
+async def _run(questions: int) -> dict:
+    registry = AgentRegistry()
+    manager = ManagerAgent()
+    researchers = [ResearcherAgent(name="Researcher" if i == 1 else f"Researcher-{i}") for i in range(1, questions + 1)]
+    for agent in (manager, *researchers, WriterAgent()):
+        registry.register(agent)
+
+    events: asyncio.Queue = asyncio.Queue()
+    start = time.perf_counter()
+    task = asyncio.ensure_future(manager.areceive_message(AgentMessage(
+        sender="User", recipient="Manager", content="benchmark request", metadata={"events": events},
+    )))
+    task.add_done_callback(lambda _: events.put_nowait(None))
+
+    timings = {}
+    text = ""
+    while (event := await events.get()) is not None:
+        if event["type"] != "final":
+            continue
+        timings.setdefault("first_token", time.perf_counter() - start)
+        text += event["delta"]
+        # "## 제목" 다음의 본문 문단이 빈 줄로 끝나면 첫 문단 도착
+        if "first_paragraph" not in timings and re.search(r"\n\n[^#\n][^\n]*\n\n", text):
+            timings["first_paragraph"] = time.perf_counter() - start
+    await task
+    timings["total"] = time.perf_counter() - start
+    await registry.astop()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Society sequential vs streaming handoff benchmark")
+    parser.add_argument("--questions", type=int, default=4, help="sub-questions (one researcher each)")
+    parser.add_argument("--research", type=float, default=1.0, help="seconds for the fastest research")
+    parser.add_argument("--spread", type=float, default=0.5, help="extra research time per later question (x base)")
+    parser.add_argument("--first-token", type=float, default=0.3, help="seconds before the first token")
+    parser.add_argument("--token-interval", type=float, default=0.01, help="seconds between 3-char tokens")
+    args = parser.parse_args()
+
+    original = llm.achat
+    llm.achat = StubLLM(args.questions, args.research, args.spread, args.first_token, args.token_interval).achat
+    agents.manager.SOCIETY_MAX_SUBQUESTIONS = max(args.questions, agents.manager.SOCIETY_MAX_SUBQUESTIONS)
+    results = {}
+    try:
+        for name, streaming in (("sequential", False), ("streaming", True)):
+            agents.manager.SOCIETY_STREAM_HANDOFF = streaming
+            results[name] = asyncio.run(_run(args.questions))
+    finally:
+        llm.achat = original
+
+    print(f"\n{args.questions} sub-questions, research {args.research:.1f}s + {args.spread:.0%} per question")
+    print(f"{'mode':<11} | {'first token':>11} | {'first paragraph':>15} | {'total':>7}")
+    for name, t in results.items():
+        print(f"{name:<11} | {t['first_token']:>10.2f}s | {t['first_paragraph']:>14.2f}s | {t['total']:>6.2f}s")
+    saved = 1 - results["streaming"]["first_paragraph"] / results["sequential"]["first_paragraph"]
+    print(f"time-to-first-paragraph: {saved:.0%} sooner with streaming handoff")
+
+
+if __name__ == "__main__":
+    main()
@@ -84,7 +84,7 @@ def cli_main(agent):
                 elif intent == "SOCIETY":
                     response = handle_society(user_input)
                 elif intent == "PERSONA":
-                    response = "persona.yaml 파일을 직접 수정한 후 재시작해 주세요."
+                    response = "persona.yaml 파일을 수정하거나 PUT /api/persona 를 호출하면 재시작 없이 바로 적용됩니다."
                 else:
                     response = handle_chat(user_input)
 
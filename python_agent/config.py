@@ -1,9 +1,128 @@
 # config.py — 모델 및 전역 설정
 # 모델 변경 시 이 파일만 수정하면 됩니다.
 
+import os
 from pathlib import Path
 from dotenv import load_dotenv
 
 load_dotenv(Path(__file__).parent.parent / ".env")
 
 MODEL_NAME = "qwen2.5:3b"
+EMBED_MODEL = "nomic-embed-text"   # 임베딩 모델 (기억 저장 / 의도 분류 공용)
+
+# ─── Ollama 호출 공통값 (llm.py) ─────────────────────────────────────────────
+# num_ctx가 호출마다 다르면 Ollama가 모델을 다시 올리며 KV 캐시(프롬프트 접두사 재사용)가 사라집니다.
+LLM_NUM_CTX = 4096                 # chat/generate 기본 컨텍스트 길이 (모든 호출에서 동일하게 유지)
+LLM_KEEP_ALIVE = "30m"             # 마지막 호출 후 모델(과 KV 캐시)을 메모리에 유지할 시간
+LLM_MEASURE = os.getenv("AGEIS_LLM_MEASURE") == "1"   # 호출마다 prompt_eval_count / duration 출력
+
+# ─── ReAct 도구 호출 (react_loop.py) ────────────────────────────────────────
+# "text"  : Thought / Action / Action Input 텍스트를 정규식으로 파싱 (모든 모델)
+# "native": ollama.chat(tools=...) 의 구조화된 tool_calls 사용 — 형식 오류 재시도가 없음.
+#           도구를 지원하지 않는 모델이면 자동으로 "text" 로 전환 (/api/metrics 의 ageis_react_* 로 비교)
+REACT_TOOL_MODE = os.getenv("AGEIS_REACT_TOOL_MODE", "text")
+REACT_PARALLEL_ACTIONS = False     # True면 모델이 "Actions: [...]" 로 독립 도구 여러 개를 한 단계에 요청 가능
+REACT_MAX_PARALLEL = 4             # 한 단계에서 동시에 실행할 최대 도구 수 (도구별 기본 상한도 이 값)
+TOOL_CONCURRENCY_LIMITS = {        # 도구별 동시 실행 상한 — 여러 ReAct 실행이 함께 공유
+    "web_search": 2,
+    "web_scrape": 3,
+    "vision_analyze": 1,
+    "stt_record": 1,
+    "stt_file": 1,
+    "tts_speak": 1,
+}
+REACT_EARLY_ACTION = True          # Action Input JSON이 완성되는 즉시 스트림을 닫고 도구 실행 (나머지 생성 대기 안 함)
+REACT_PREFETCH = False             # 예측 가능한 다음 도구 호출(검색 → 상위 URL 수집)을 모델 생성 중에 미리 실행
+REACT_PREFETCH_TOP_URLS = 2        # web_search 결과 중 미리 web_scrape 할 상위 URL 수
+REACT_LOOP_MAX_REPEATS = 2         # 같은 (도구, 입력) 반복이 이 횟수에 도달하면 도구 없이 Final Answer를 강제
+
+# ─── 도구 결과 캐시 (tool_cache.py) ──────────────────────────────────────────
+# 정책이 없는 도구(write_file, tts_speak, stt_record, 플러그인 등 부작용 가능)는 캐시하지 않음.
+# "file": 입력 경로의 mtime·size가 같을 때만 재사용 / "web": ttl 후 ETag·Last-Modified 재검증 / "ttl": 시간만
+TOOL_CACHE_ENABLED = True
+TOOL_CACHE_MAX_ENTRIES = 512
+TOOL_CACHE_POLICIES = {
+    "read_file": {"kind": "file", "ttl": None},
+    "list_dir": {"kind": "file", "ttl": 60},        # 디렉토리 mtime은 파일 크기 변화를 반영하지 않음
+    "dir_size": {"kind": "ttl", "ttl": 300},        # 하위 폴더 전체를 훑으므로 비싸고, 변화는 mtime으로 알 수 없음
+    "vision_analyze": {"kind": "file", "ttl": None},
+    "stt_file": {"kind": "file", "ttl": None},
+    "web_scrape": {"kind": "web", "ttl": 600},
+    "web_search": {"kind": "ttl", "ttl": 1800},
+}
+
+# ─── ReAct 컨텍스트 창 관리 (context_window.py) ─────────────────────────────
+REACT_OBSERVATION_TOKENS = 1200    # Observation 1건이 대화에 들어갈 최대 추정 토큰 (넘으면 앞·뒤만 남기고 생략)
+REACT_KEEP_RECENT_STEPS = 2        # 예산 초과 시에도 원문 그대로 두는 최근 단계 수 (그 이전은 한 줄 요약으로 압축)
+REACT_REPLY_RESERVE = 512          # num_ctx 중 응답 생성용으로 비워 둘 토큰
+REACT_NUM_CTX_MAX = 8192           # 압축해도 넘칠 때 num_ctx를 LLM_NUM_CTX 단위로 늘릴 상한 (늘리면 모델 재로드 1회)
+
+# ─── 트레이싱 (tracing.py) ───────────────────────────────────────────────────
+TRACE_ENABLED = os.getenv("AGEIS_TRACE", "1") != "0"
+TRACE_KEEP_IN_MEMORY = 200         # /api/traces/{id} 로 바로 조회할 최근 트레이스 수 (나머지는 파일 검색)
+TRACE_MAX_FILE_BYTES = 20_000_000  # .traces.jsonl 이 이 크기를 넘으면 .traces.jsonl.1 로 교체
+
+# ─── 라우터 (의도 분류) ───────────────────────────────────────────────────────
+# 임베딩 단계는 최고 유사도가 THRESHOLD 이상이고 2위와의 차이가 MARGIN 이상일 때만 채택,
+# 그렇지 않으면 LLM 분류로 넘어갑니다. /api/router/stats 의 점수 분포를 보고 조정하세요.
+ROUTER_EMBED_THRESHOLD = 0.80
+ROUTER_EMBED_MARGIN = 0.05
+ROUTER_EMBED_RETRY_SECONDS = 60    # 임베딩 서버 오류로 2단계를 건너뛴 뒤 다시 시도하기까지 대기 시간(초)
+
+# 의도 분류 결과 캐시 (정규화된 입력 기준 LRU + TTL)
+INTENT_CACHE_SIZE = 512
+INTENT_CACHE_TTL = 3600            # 초
+INTENT_CACHE_SIMILARITY = 0.97     # 임베딩 유사도 기반 근사 적중 기준 (None이면 비활성화)
+
+# ─── 멀티 에이전트 Society (agents/) ──────────────────────────────────────────
+SOCIETY_RESEARCHERS = 4            # Researcher 인스턴스 수 — Manager가 하위 질문을 이 수만큼 동시에 조사
+SOCIETY_MAX_SUBQUESTIONS = 6       # Manager가 한 요청을 나눌 최대 하위 질문 수
+SOCIETY_STREAM_HANDOFF = True      # 조사 결과가 하나 나올 때마다 Writer가 바로 해당 섹션 작성 (False: 조사가 모두 끝난 뒤 한 번에 작성)
+RESEARCHER_MAX_SOURCES = 5         # Researcher가 계획에서 뽑은 URL·경로 중 한 번에 동시에 가져올 최대 수
+RESEARCHER_FETCH_TIMEOUT = 10      # 초 — 출처 하나당
+RESEARCHER_CHUNK_TOKENS = 200      # 가져온 본문을 나누는 조각 크기 (추정 토큰)
+RESEARCHER_MAX_PASSAGES = 30       # 출처 하나에서 중복 제거·순위 대상으로 삼을 최대 조각 수 (앞에서부터)
+RESEARCHER_DEDUP_THRESHOLD = 0.8   # MinHash 추정 자카드 유사도가 이 이상인 조각은 하나만 유지
+RESEARCHER_CONTEXT_TOKENS = 2000   # 종합 프롬프트에 넣을 자료의 토큰 예산 (요청과 가까운 조각부터)
+RESEARCHER_RERANK_TOP_K = 16       # BM25로 추린 뒤 임베딩으로 재정렬할 조각 수 (예산의 조각 수보다 약간 크게)
+SOCIETY_CACHE_TTL = {              # 하위 작업 결과 캐시 대상 역할 → TTL(초). 같은 조사 지시는 Manager 계획이 달라도 재사용
+    "Researcher": 3600,
+}
+SOCIETY_CACHE_MAX_ENTRIES = 256
+SOCIETY_CACHE_SIMILARITY = None    # 지시문 임베딩 코사인 유사도 기준 (예: 0.95) — 거의 같은 지시도 적중 (None이면 정확히 같은 지시만)
+ACTOR_MAILBOX_SIZE = 32            # 에이전트별 mailbox 최대 길이 — 가득 차면 송신자가 자리가 날 때까지 대기 (배압)
+ACTOR_CONCURRENCY = {              # 역할별 동시 처리 메시지 수 ("Researcher-2" → "Researcher", 없으면 1)
+    "Manager": 4,
+    "Researcher": 1,
+    "Writer": 2,
+}
+
+# ─── 장기 기억 (write-behind 배치 저장) ───────────────────────────────────────
+MEMORY_BACKEND = "chroma"          # 저장소: "chroma" (.chroma) | "numpy" (.vecstore, 메모리 맵 인덱스)
+MEMORY_IVF_MIN_ROWS = 20000        # numpy 백엔드: 이 문서 수 이상이면 IVF 검색, 미만은 brute-force
+MEMORY_IVF_NPROBE = 8              # numpy 백엔드: IVF 쿼리당 탐색할 버킷 수 (클수록 정확·느림)
+MEMORY_BATCH_SIZE = 16             # 한 번에 임베딩·기록할 최대 건수
+MEMORY_FLUSH_INTERVAL = 2.0        # 배치가 덜 찼어도 이 시간(초)이 지나면 기록
+MEMORY_QUEUE_MAX = 256             # 대기 큐 상한 — 초과 시 save()가 대기 (backpressure)
+EMBED_CACHE_MAX_ENTRIES = 50000    # 임베딩 영구 캐시(SQLite) 최대 항목 수 (LRU 삭제)
+
+# ─── 기억 회수 (시스템 프롬프트용 RAG) ─────────────────────────────────────────
+MEMORY_RECALL_TOKEN_BUDGET = 600   # 시스템 프롬프트에 넣을 기억의 최대 추정 토큰 수
+MEMORY_RECALL_TYPES = {            # 모드별로 회수할 기억 type — vision 캡션·society 보고서가 끼어드는 것 방지
+    "chat": ["chat", "society", "digest"],
+    "task": ["task", "chat", "digest"],
+}
+
+# ─── 장기 기억 압축 / 보존 정책 (memory_compaction.py) ───────────────────────
+MEMORY_COMPACTION_CRON = "30 3 * * *"   # 매일 03:30 실행
+MEMORY_RETENTION_DAYS = {               # type별 최대 보관 일수 (None = 무기한)
+    "chat": 90,
+    "task": 180,
+    "vision": 30,
+    "society": 180,
+    "digest": None,
+}
+MEMORY_DEDUP_THRESHOLD = 0.97           # 이 코사인 유사도 이상이면 중복으로 보고 최신 1건만 유지
+MEMORY_SUMMARIZE_AFTER_DAYS = 14        # 이보다 오래된 기억은 묶어서 요약(digest) 대상
+MEMORY_CLUSTER_THRESHOLD = 0.85         # 요약 묶음(cluster) 기준 유사도
+MEMORY_CLUSTER_MIN_SIZE = 3             # 이 개수 이상 모인 묶음만 요약
@@ -0,0 +1,120 @@
+"""
+context_window.py — ReAct 대화의 토큰 예산 관리
+
+num_ctx(LLM_NUM_CTX, 기본 4096)를 넘는 메시지는 Ollama가 앞에서부터 조용히 잘라내므로,
+긴 Observation이 몇 번 쌓이면 시스템 프롬프트(도구 설명·형식 규칙)가 사라지고 형식 오류와 반복이 늘어납니다.
+ContextWindow는 LLM 호출 직전에 다음을 적용합니다.
+
+1. estimate_tokens(): 토크나이저 없이 UTF-8 바이트 수로 추정 (호출마다 수십 μs)
+2. clip(): Observation 1건을 REACT_OBSERVATION_TOKENS 이내로 — 앞부분과 끝부분만 남기고 가운데 생략
+3. fit(): 예산을 넘으면 오래된 단계(Assistant 응답 + Observation)를 한 줄 요약으로 압축
+   — 최근 REACT_KEEP_RECENT_STEPS 단계는 원문 유지, 압축은 messages를 직접 바꾸므로 이후 호출의 접두사도 고정
+4. 압축 후에도 넘치면 num_ctx를 LLM_NUM_CTX의 배수 단위로 REACT_NUM_CTX_MAX까지 늘림
+   — 한 실행 안에서는 줄이지 않음 (num_ctx가 바뀔 때마다 Ollama가 모델과 KV 캐시를 다시 올리므로)
+"""
+import re
+
+from config import (LLM_NUM_CTX, REACT_KEEP_RECENT_STEPS, REACT_NUM_CTX_MAX, REACT_OBSERVATION_TOKENS,
+                    REACT_REPLY_RESERVE)
+
+_MESSAGE_OVERHEAD = 4        # 역할 태그 등 메시지당 템플릿 토큰
+_SUMMARY_HEADER = "[이전 단계 요약 — 컨텍스트 절약을 위해 압축됨]"
+
+
+def estimate_tokens(text: str) -> int:
+    """토크나이저 없이 쓰는 토큰 수 추정 — UTF-8 4바이트당 1토큰 (영문 ~4자, 한글 ~1.3자)"""
+    return max(1, len(text.encode("utf-8")) // 4)
+
+
+def clip(text: str, max_tokens: int) -> str:
+    """추정 토큰이 max_tokens를 넘으면 앞 2/3 · 뒤 1/3만 남기고 가운데를 생략"""
+    tokens = estimate_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    keep = max(1, int(len(text) * max_tokens / tokens) - 40)
+    head, tail = keep * 2 // 3, keep // 3
+    omitted = len(text) - head - tail
+    return f"{text[:head]}\n... (중략: {omitted}자) ...\n{text[len(text) - tail:] if tail else ''}"
+
+
+def _message_tokens(message: dict) -> int:
+    tokens = estimate_tokens(message.get("content") or "") + _MESSAGE_OVERHEAD
+    for call in message.get("tool_calls") or []:
+        function = call["function"]
+        tokens += estimate_tokens(f"{function['name']}{function.get('arguments')}")
+    return tokens
+
+
+def _one_line(text: str, max_tokens: int) -> str:
+    return clip(re.sub(r"\s+", " ", text).strip(), max_tokens).replace("\n", " ")
+
+
+def _summarize_step(step: list[dict]) -> str:
+    """Assistant 응답 1개와 뒤따른 Observation들 → "- 생각 | 도구(인자) → 결과 앞부분" 한 줄"""
+    assistant, observations = step[0], step[1:]
+    content = assistant.get("content") or ""
+    thought = re.search(r"Thought:\s*(.+)", content)
+    if assistant.get("tool_calls"):
+        actions = ", ".join(f"{c['function']['name']}({c['function'].get('arguments')})" for c in assistant["tool_calls"])
+    else:
+        action = re.search(r"Actions?:\s*(.+)", content)
+        action_input = re.search(r"Action Input:\s*(.+)", content)
+        actions = " ".join(m.group(1) for m in (action, action_input) if m)
+    result = " / ".join((m.get("content") or "").removeprefix("Observation:") for m in observations)
+    parts = [_one_line(thought.group(1), 40) if thought else "", _one_line(actions, 40)]
+    line = " | ".join(p for p in parts if p) or _one_line(content, 40)
+    return f"- {line} → {_one_line(result, 60)}" if result else f"- {line}"
+
+
+class ContextWindow:
+    """ReAct 실행 1회 동안의 컨텍스트 예산. 실행마다 새로 만들어 사용합니다."""
+
+    def __init__(self, overhead_tokens: int = 0):
+        self.overhead_tokens = overhead_tokens   # 메시지 밖에서 프롬프트에 들어가는 양 (네이티브 모드의 도구 스키마)
+        self.num_ctx = LLM_NUM_CTX
+        self.compressed_steps = 0
+
+    def clip_observation(self, text: str, share: int = 1) -> str:
+        """대화에 넣을 Observation — 한 단계에 share개가 함께 들어가면 예산을 나눠 가짐"""
+        return clip(text, max(REACT_OBSERVATION_TOKENS // share, 200))
+
+    def used_tokens(self, messages: list[dict]) -> int:
+        return self.overhead_tokens + sum(_message_tokens(m) for m in messages)
+
+    def fit(self, messages: list[dict]) -> tuple[int, int]:
+        """
+        messages([system, task, 단계...])를 예산에 맞게 압축(제자리 수정)하고 (num_ctx, 추정 사용 토큰)을 반환.
+        단계 = assistant 메시지 1개 + 뒤따르는 user/tool 메시지들. 요약 메시지는 task 바로 뒤에 1개만 유지.
+        """
+        used = self.used_tokens(messages)
+        budget = self.num_ctx - REACT_REPLY_RESERVE
+        if used > budget:
+            used = self._compress(messages, budget)
+        while used > self.num_ctx - REACT_REPLY_RESERVE and self.num_ctx < REACT_NUM_CTX_MAX:
+            self.num_ctx = min(self.num_ctx + LLM_NUM_CTX, REACT_NUM_CTX_MAX)
+        return self.num_ctx, used
+
+    def _compress(self, messages: list[dict], budget: int) -> int:
+        start = 2
+        summary_lines = []
+        if len(messages) > start and (messages[start].get("content") or "").startswith(_SUMMARY_HEADER):
+            summary_lines = messages[start]["content"].splitlines()[1:]
+            start += 1
+
+        steps, current = [], None
+        for message in messages[start:]:
+            if message["role"] == "assistant" or current is None:
+                current = [message]
+                steps.append(current)
+            else:
+                current.append(message)
+
+        head = messages[:2]
+        while len(steps) > REACT_KEEP_RECENT_STEPS:
+            summary_lines.append(_summarize_step(steps.pop(0)))
+            self.compressed_steps += 1
+            summary = {"role": "user", "content": "\n".join([_SUMMARY_HEADER, *summary_lines])}
+            messages[:] = head + [summary] + [m for step in steps for m in step]
+            if self.used_tokens(messages) <= budget:
+                break
+        return self.used_tokens(messages)
@@ -6,15 +6,20 @@ UI(CLI, Web, Scheduler, EventMonitor)에서 공통으로 사용하는
 
 Phase 8에서 Multi-Agent Society가 추가되었으나,
 기존 handle_chat / handle_task / handle_vision / handle_voice는 그대로 유지합니다.
+
+ahandle_chat / ahandle_task / ahandle_society 가 본 구현(async)이며 FastAPI가 직접 await 합니다.
+동기 handle_* 는 CLI·스케줄러·이벤트 모니터용 얇은 래퍼입니다.
 """
+import asyncio
 from datetime import datetime
-import ollama
+from typing import AsyncIterator
 
-from config import MODEL_NAME
+import llm
+from config import MODEL_NAME, SOCIETY_RESEARCHERS
 from router import classify_intent
 from react_loop import ReActAgent
 from memory import AgentMemory
-from persona import build_system_prompt
+from persona import abuild_system_prompt
 from tools.file_reader import read_file_tool, write_file_tool, list_dir_tool, dir_size_tool
 from tools.web_scraper import web_scrape_tool
 from tools.web_search import web_search_tool
@@ -22,6 +27,8 @@ from tools.vision_tool import analyze_image_tool
 from tools.stt_tool import record_and_transcribe_tool, transcribe_file_tool
 from tools.tts_tool import speak_tool
 from plugin_loader import load_plugins
+from tool_cache import wrap_tools
+from society_cache import society_cache
 
 # Phase 8: Multi-Agent Society
 from actor import AgentMessage
@@ -50,6 +57,9 @@ if plugin_tools:
     print(f"[Core] Loaded {len(plugin_tools)} plugins: {', '.join(plugin_tools.keys())}")
     TOOLS.update(plugin_tools)
 
+# 결과 캐시 계층 — 파일·웹 도구의 반복 호출 재사용, 부작용 있는 도구는 그대로 통과 (config.TOOL_CACHE_POLICIES)
+TOOLS = wrap_tools(TOOLS)
+
 # ─── 단일 에이전트 (ReAct) ────────────────────────────────────────────────────
 
 memory = AgentMemory()
@@ -57,42 +67,86 @@ agent = ReActAgent(tools=TOOLS, model_name=MODEL_NAME, memory=memory)
 
 # ─── Phase 8: Multi-Agent Society ────────────────────────────────────────────
 
-_registry = AgentRegistry()
+# 하위 작업 결과 캐시 — 같은 조사 지시는 Manager 계획이 달라도 재사용 (config.SOCIETY_CACHE_TTL)
+society_registry = AgentRegistry(cache=society_cache)
 _manager = ManagerAgent()
-_researcher = ResearcherAgent()
+# Researcher 풀 — "Researcher", "Researcher-2", ... (Manager가 하위 질문을 나눠 동시에 배분)
+_researchers = [
+    ResearcherAgent(name="Researcher" if i == 1 else f"Researcher-{i}")
+    for i in range(1, max(1, SOCIETY_RESEARCHERS) + 1)
+]
 _writer = WriterAgent()
 
-for _a in (_manager, _researcher, _writer):
-    _registry.register(_a)
+for _a in (_manager, *_researchers, _writer):
+    society_registry.register(_a)
 
-print(f"[Core] Society Formed: [{_manager.name}, {_researcher.name}, {_writer.name}]")
+print(f"[Core] Society Formed: [{_manager.name}, {', '.join(r.name for r in _researchers)}, {_writer.name}]")
 
 
 # ─── 핸들러 함수 ─────────────────────────────────────────────────────────────
 
-def handle_chat(user_input: str) -> str:
-    """단순 대화 처리 — ReAct 루프 없이 바로 응답, 페르소나+기억 적용."""
+async def _final_content(events: AsyncIterator[dict]) -> str:
+    """스트리밍 프레임을 끝까지 소비하고 "done" 프레임의 최종 답변을 반환합니다."""
+    answer = ""
+    async for event in events:
+        if event["type"] == "done":
+            answer = event["content"]
+    return answer
+
+
+async def ahandle_chat_stream(user_input: str) -> AsyncIterator[dict]:
+    """
+    단순 대화를 스트리밍으로 처리 — {"type": "final", "delta"} 프레임을 토큰 단위로 yield 하고
+    마지막에 {"type": "done", "content"} 를 보냅니다.
+    """
     print("[Core] Mode: CHAT")
-    system_prompt = build_system_prompt(user_input, memory)
-    response = ollama.chat(
+    system_prompt = await abuild_system_prompt(user_input, memory, mode="chat")
+    stream = await llm.achat(
         model=MODEL_NAME,
+        site="chat",
         messages=[
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_input},
         ],
+        stream=True,
     )
-    answer = response["message"]["content"]
-    memory.save(
+    parts = []
+    async for chunk in stream:
+        delta = chunk["message"]["content"]
+        if delta:
+            parts.append(delta)
+            yield {"type": "final", "delta": delta}
+    answer = "".join(parts)
+    await memory.asave(
         f"[Chat] User: {user_input}\nAgent: {answer}",
         metadata={"type": "chat", "timestamp": datetime.now().isoformat()},
     )
-    return answer
+    yield {"type": "done", "content": answer}
+
+
+async def ahandle_chat(user_input: str) -> str:
+    return await _final_content(ahandle_chat_stream(user_input))
+
+
+def handle_chat(user_input: str) -> str:
+    """단순 대화 처리 — ReAct 루프 없이 바로 응답, 페르소나+기억 적용."""
+    return llm.run_sync(ahandle_chat(user_input))
+
+
+async def ahandle_task_stream(user_input: str) -> AsyncIterator[dict]:
+    """복합 작업을 스트리밍으로 처리 — ReActAgent.arun_stream 프레임을 그대로 전달."""
+    print("[Core] Mode: TASK (ReAct)")
+    async for event in agent.arun_stream(user_input):
+        yield event
+
+
+async def ahandle_task(user_input: str) -> str:
+    return await _final_content(ahandle_task_stream(user_input))
 
 
 def handle_task(user_input: str) -> str:
     """복합 작업 처리 — ReAct 루프 사용."""
-    print("[Core] Mode: TASK (ReAct)")
-    return agent.run(user_input)
+    return llm.run_sync(ahandle_task(user_input))
 
 
 def handle_vision(image_path: str = "", base64_image: str = "", prompt: str = "") -> str:
@@ -138,18 +192,36 @@ def handle_voice(duration_sec: float = 5.0, language: str = "ko", tts_response:
     return f"[음성 입력] {transcribed}\n\n{response}"
 
 
-def handle_society(user_input: str) -> str:
-    """멀티에이전트 처리 — Phase 8: Manager → Researcher/Writer 위임."""
+async def ahandle_society_stream(user_input: str) -> AsyncIterator[dict]:
+    """
+    멀티에이전트 처리를 스트리밍으로 — Researcher 배분/결과는 action·observation 프레임으로,
+    Writer가 작성 중인 보고서는 {"type": "final", "delta"} 토큰으로 전달하고 마지막에 "done" 프레임.
+    """
     print("[Core] Mode: SOCIETY (Multi-Agent)")
+    events: asyncio.Queue = asyncio.Queue()
     msg = AgentMessage(
         sender="User",
         recipient="Manager",
         content=user_input,
         msg_type="REQUEST",
+        metadata={"events": events},
     )
-    result = _manager.receive_message(msg)
-    memory.save(
+    task = asyncio.ensure_future(_manager.areceive_message(msg))
+    task.add_done_callback(lambda _: events.put_nowait(None))
+    while (event := await events.get()) is not None:
+        yield event
+    result = await task
+    await memory.asave(
         f"[Society] User: {user_input}\nResult: {str(result)[:300]}",
         metadata={"type": "society", "timestamp": datetime.now().isoformat()},
     )
-    return result or "멀티에이전트 처리 중 오류가 발생했습니다."
+    yield {"type": "done", "content": result or "멀티에이전트 처리 중 오류가 발생했습니다."}
+
+
+async def ahandle_society(user_input: str) -> str:
+    """멀티에이전트 처리 — Phase 8: Manager → Researcher 풀 → Writer."""
+    return await _final_content(ahandle_society_stream(user_input))
+
+
+def handle_society(user_input: str) -> str:
+    return llm.run_sync(ahandle_society(user_input))
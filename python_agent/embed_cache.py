@@ -0,0 +1,161 @@
+"""
+embed_cache.py — 임베딩 영구 캐시 (SQLite)
+
+역할:
+- (모델명, sha256(텍스트)) → float32 벡터를 Agent_Workspace/.embed_cache.sqlite3 에 저장
+- 항목 수 상한(EMBED_CACHE_MAX_ENTRIES) 초과 시 가장 오래 사용하지 않은 항목부터 삭제 (LRU)
+- 적중/미스/삭제 통계 제공 — 매일 같은 프롬프트를 반복하는 스케줄 작업은 임베딩 호출이 거의 사라짐
+
+적중 조회는 SELECT 한 번(로컬 파일 읽기, 수백 μs)뿐이라 async 코드에서도 직접 호출합니다.
+조회 시의 last_used 갱신은 메모리에 모아 두었다가 다음 put(이미 쓰기 트랜잭션)·퇴출·종료 때 함께 기록하고,
+WAL + synchronous=NORMAL 이라 커밋마다 디스크 동기화를 기다리지 않습니다.
+"""
+import atexit
+import hashlib
+import sqlite3
+import sys
+import threading
+import time
+from array import array
+from pathlib import Path
+
+from config import EMBED_CACHE_MAX_ENTRIES
+
+
+def _default_cache_path() -> Path:
+    if getattr(sys, 'frozen', False):
+        base = Path(sys.executable).parent
+    else:
+        base = Path(__file__).resolve().parent.parent
+    return base / "Agent_Workspace" / ".embed_cache.sqlite3"
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    # 매 put마다 COUNT(*)를 하지 않도록 이 횟수마다 한 번씩 상한 검사
+    _EVICT_EVERY = 64
+    # 조회로 갱신된 last_used가 이만큼 쌓이면 put을 기다리지 않고 기록 (put 없이 조회만 계속되는 경우)
+    _TOUCH_FLUSH_EVERY = 1024
+
+    def __init__(self, path: str | Path = None, max_entries: int = EMBED_CACHE_MAX_ENTRIES):
+        self.path = Path(path) if path else _default_cache_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")   # WAL에서는 전원 장애 시 마지막 커밋만 잃을 수 있음 (캐시라 무해)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                   model TEXT NOT NULL,
+                   digest TEXT NOT NULL,
+                   vector BLOB NOT NULL,
+                   last_used REAL NOT NULL,
+                   PRIMARY KEY (model, digest)
+               )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings(last_used)")
+        self._conn.commit()
+        self._puts_since_evict = 0
+        self._touched: dict[tuple[str, str], float] = {}   # (model, digest) → 조회 시각 (아직 기록 안 한 last_used)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        atexit.register(self.flush)
+
+    def get_many(self, model: str, texts: list[str]) -> dict[str, list[float]]:
+        """캐시에 있는 텍스트만 {text: vector} 로 반환 (last_used 갱신은 메모리에 기록해 두고 나중에 일괄 반영)"""
+        by_digest = {_digest(t): t for t in texts}
+        if not by_digest:
+            return {}
+        placeholders = ",".join("?" * len(by_digest))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT digest, vector FROM embeddings WHERE model = ? AND digest IN ({placeholders})",
+                (model, *by_digest),
+            ).fetchall()
+            now = time.time()
+            for digest, _ in rows:
+                self._touched[(model, digest)] = now
+            if len(self._touched) >= self._TOUCH_FLUSH_EVERY:
+                self._flush_touched_locked()
+                self._conn.commit()
+            self.hits += len(rows)
+            self.misses += len(by_digest) - len(rows)
+
+        found = {}
+        for digest, blob in rows:
+            vec = array("f")
+            vec.frombytes(blob)
+            found[by_digest[digest]] = vec.tolist()
+        return found
+
+    def get(self, model: str, text: str) -> list[float] | None:
+        return self.get_many(model, [text]).get(text)
+
+    def put_many(self, model: str, items: dict[str, list[float]]):
+        if not items:
+            return
+        now = time.time()
+        rows = [(model, _digest(t), array("f", vec).tobytes(), now) for t, vec in items.items()]
+        with self._lock:
+            self._flush_touched_locked()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, digest, vector, last_used) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._puts_since_evict += len(rows)
+            if self._puts_since_evict >= self._EVICT_EVERY:
+                self._puts_since_evict = 0
+                self._evict_locked()
+            self._conn.commit()
+
+    def put(self, model: str, text: str, vector: list[float]):
+        self.put_many(model, {text: vector})
+
+    def flush(self):
+        """모아 둔 last_used 갱신을 기록 (종료 시 atexit)"""
+        with self._lock:
+            if self._touched:
+                self._flush_touched_locked()
+                self._conn.commit()
+
+    def _flush_touched_locked(self):
+        if not self._touched:
+            return
+        touched, self._touched = self._touched, {}
+        self._conn.executemany(
+            "UPDATE embeddings SET last_used = ? WHERE model = ? AND digest = ?",
+            [(used, model, digest) for (model, digest), used in touched.items()],
+        )
+
+    def _evict_locked(self):
+        (size,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        overflow = size - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE rowid IN "
+                "(SELECT rowid FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                (overflow,),
+            )
+            self.evictions += overflow
+
+    def stats(self) -> dict:
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "size": size,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+# 기억(memory)과 라우터가 함께 쓰는 프로세스 전역 캐시
+embedding_cache = EmbeddingCache()
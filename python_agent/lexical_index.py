@@ -0,0 +1,96 @@
+"""
+lexical_index.py — 장기 기억용 BM25 역색인 (인메모리)
+
+역할:
+- AgentMemory가 저장소(vector_store)와 함께 갱신하는 키워드 검색 색인
+- 파일명·명령어·고유명사처럼 임베딩이 놓치기 쉬운 정확한 단어 일치를 보완
+- 한국어 조사 대응: 한글이 포함된 단어는 2-gram도 색인 ("파일을" → 파일을, 파일, 일을)
+- where 필터(vector_store.match_where)를 적용한 검색
+
+첫 검색 때 저장소의 전체 문서로 한 번 구축하며(AgentMemory가 지연 생성) 별도 파일로 저장하지 않습니다.
+"""
+import math
+import re
+import threading
+from collections import Counter
+
+from vector_store import match_where
+
+_WORD = re.compile(r"\w+")
+_HANGUL = re.compile(r"[가-힣]")
+
+
+def tokenize(text: str) -> list[str]:
+    tokens = []
+    for word in _WORD.findall(text.lower()):
+        tokens.append(word)
+        if len(word) > 2 and _HANGUL.search(word):
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+class BM25Index:
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: dict[str, dict[str, int]] = {}   # term → {doc id: tf}
+        self._terms: dict[str, list[str]] = {}            # doc id → 고유 term (삭제용)
+        self._lengths: dict[str, int] = {}
+        self._documents: dict[str, str] = {}
+        self._metadatas: dict[str, dict] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, ids: list[str], documents: list[str], metadatas: list[dict]):
+        with self._lock:
+            for id_, document, metadata in zip(ids, documents, metadatas):
+                if id_ in self._lengths:
+                    self._remove(id_)
+                counts = Counter(tokenize(document))
+                for term, tf in counts.items():
+                    self._postings.setdefault(term, {})[id_] = tf
+                self._terms[id_] = list(counts)
+                self._lengths[id_] = sum(counts.values())
+                self._total_length += self._lengths[id_]
+                self._documents[id_] = document
+                self._metadatas[id_] = metadata or {}
+
+    def _remove(self, id_: str):
+        for term in self._terms.pop(id_):
+            postings = self._postings[term]
+            del postings[id_]
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._lengths.pop(id_)
+        del self._documents[id_]
+        del self._metadatas[id_]
+
+    def remove(self, ids: list[str]):
+        with self._lock:
+            for id_ in ids:
+                if id_ in self._lengths:
+                    self._remove(id_)
+
+    def search(self, query: str, n_results: int, where: dict = None) -> list[tuple[str, str]]:
+        """BM25 점수 상위 n_results개의 (id, document) — 검색어와 겹치는 단어가 없는 문서는 제외"""
+        with self._lock:
+            n_docs = len(self._lengths)
+            if n_docs == 0:
+                return []
+            avg_length = self._total_length / n_docs
+            scores: dict[str, float] = {}
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for id_, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[id_] / avg_length)
+                    scores[id_] = scores.get(id_, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+            if where:
+                scores = {id_: s for id_, s in scores.items() if match_where(self._metadatas[id_], where)}
+            ranked = sorted(scores, key=scores.get, reverse=True)[:n_results]
+            return [(id_, self._documents[id_]) for id_ in ranked]
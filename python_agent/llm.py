@@ -0,0 +1,198 @@
+"""
+llm.py — 공용 LLM 게이트웨이 (Ollama 동기 / 비동기 클라이언트)
+
+역할:
+- 프로세스 전역 ollama.Client 1개와 이벤트 루프별 ollama.AsyncClient 1개를 공유 (HTTP 커넥션 재사용)
+- chat / generate / embeddings / embed 의 동기 버전과 a- 접두사 비동기 버전 제공
+- run_sync(): async로 구현된 핸들러를 CLI·스케줄러 같은 동기 호출부에서 쓰기 위한 얇은 래퍼
+- 공통 기본값: keep_alive(LLM_KEEP_ALIVE), chat/generate의 options.num_ctx(LLM_NUM_CTX)
+  — 호출마다 값이 같아야 Ollama가 모델과 KV 캐시를 유지해 공통 프롬프트 접두사를 재평가하지 않습니다.
+- 계측: 모든 호출의 모델·호출 위치(site)·토큰 수·Ollama 시간·벽시계 시간을 telemetry.py에 기록 (/api/metrics)
+- 측정 모드(AGEIS_LLM_MEASURE=1): 호출마다 prompt_eval_count / prompt_eval_duration 출력 (접두사 재사용 확인용)
+
+FastAPI 엔드포인트는 a- 버전을 await 하므로 Ollama 응답을 기다리는 동안 스레드를 점유하지 않습니다.
+"""
+import asyncio
+import threading
+import time
+import weakref
+from collections.abc import AsyncIterator, Iterator
+from concurrent.futures import ThreadPoolExecutor
+
+import ollama
+
+from config import LLM_KEEP_ALIVE, LLM_MEASURE, LLM_NUM_CTX
+from telemetry import record_llm_call
+
+_sync_client: ollama.Client | None = None
+_sync_lock = threading.Lock()
+
+# AsyncClient(httpx.AsyncClient)는 생성된 이벤트 루프에 묶이므로 루프마다 따로 보관
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, ollama.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def get_client() -> ollama.Client:
+    global _sync_client
+    if _sync_client is None:
+        with _sync_lock:
+            if _sync_client is None:
+                _sync_client = ollama.Client()
+    return _sync_client
+
+
+def get_async_client() -> ollama.AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = ollama.AsyncClient()
+        _async_clients[loop] = client
+    return client
+
+
+async def close_async_client():
+    """현재 루프의 AsyncClient를 닫습니다 (run_sync 종료 시, FastAPI shutdown 시)."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    http_client = getattr(client, "_client", None)
+    if http_client is not None:
+        await http_client.aclose()
+
+
+# ─── 공통 기본값 / 계측 ──────────────────────────────────────────────────────
+
+def _with_defaults(kwargs: dict, generation: bool) -> dict:
+    kwargs.setdefault("keep_alive", LLM_KEEP_ALIVE)
+    if generation:
+        kwargs["options"] = {"num_ctx": LLM_NUM_CTX, **(kwargs.get("options") or {})}
+    return kwargs
+
+
+def _finish(kind: str, model: str, site: str, start: float, response=None, error: bool = False):
+    """완료된 응답(또는 스트림의 마지막 청크)을 telemetry에 기록하고, 측정 모드면 프롬프트 평가 통계 출력"""
+    record_llm_call(kind, model, site, time.perf_counter() - start, response, error)
+    if not LLM_MEASURE or not response:
+        return
+    prompt_tokens = response.get("prompt_eval_count") or 0
+    prompt_ms = (response.get("prompt_eval_duration") or 0) / 1e6
+    eval_tokens = response.get("eval_count") or 0
+    print(f"[LLM] {kind} {model} @{site}: prompt_eval_count={prompt_tokens} prompt_eval={prompt_ms:.0f}ms "
+          f"eval_count={eval_tokens}")
+
+
+def _call(kind: str, method, kwargs: dict, generation: bool):
+    site = kwargs.pop("site", "unknown")
+    model = kwargs.get("model", "")
+    start = time.perf_counter()
+    try:
+        response = method(**_with_defaults(kwargs, generation))
+    except Exception:
+        _finish(kind, model, site, start, error=True)
+        raise
+    if isinstance(response, Iterator):
+        return _measure_stream(kind, model, site, start, response)
+    _finish(kind, model, site, start, response)
+    return response
+
+
+def _measure_stream(kind: str, model: str, site: str, start: float, stream):
+    last, failed = None, False
+    try:
+        for chunk in stream:
+            last = chunk
+            yield chunk
+    except Exception:
+        failed = True
+        raise
+    finally:
+        _finish(kind, model, site, start, last if last and last.get("done") else None, failed)
+
+
+async def _acall(kind: str, method, kwargs: dict, generation: bool):
+    site = kwargs.pop("site", "unknown")
+    model = kwargs.get("model", "")
+    start = time.perf_counter()
+    try:
+        response = await method(**_with_defaults(kwargs, generation))
+    except Exception:
+        _finish(kind, model, site, start, error=True)
+        raise
+    if isinstance(response, AsyncIterator):
+        return _ameasure_stream(kind, model, site, start, response)
+    _finish(kind, model, site, start, response)
+    return response
+
+
+async def _ameasure_stream(kind: str, model: str, site: str, start: float, stream):
+    """스트림을 끝까지 읽거나 중간에 닫을 때(aclose) 한 번 기록 — 벽시계 시간은 첫 요청부터 마지막 청크까지"""
+    last, failed = None, False
+    try:
+        async for chunk in stream:
+            last = chunk
+            yield chunk
+    except Exception:
+        failed = True
+        raise
+    finally:
+        if hasattr(stream, "aclose"):
+            await stream.aclose()
+        _finish(kind, model, site, start, last if last and last.get("done") else None, failed)
+
+
+# ─── 동기 API ────────────────────────────────────────────────────────────────
+# 모든 함수는 ollama 인자 외에 site="router" 처럼 호출 위치 라벨을 받습니다 (telemetry 용, Ollama로 전달 안 함).
+
+def chat(**kwargs):
+    return _call("chat", get_client().chat, kwargs, generation=True)
+
+
+def generate(**kwargs):
+    return _call("generate", get_client().generate, kwargs, generation=True)
+
+
+def embeddings(**kwargs):
+    return _call("embeddings", get_client().embeddings, kwargs, generation=False)
+
+
+def embed(**kwargs):
+    return _call("embed", get_client().embed, kwargs, generation=False)
+
+
+# ─── 비동기 API ──────────────────────────────────────────────────────────────
+
+async def achat(**kwargs):
+    """stream=True 이면 async iterator를 반환합니다."""
+    return await _acall("chat", get_async_client().chat, kwargs, generation=True)
+
+
+async def agenerate(**kwargs):
+    return await _acall("generate", get_async_client().generate, kwargs, generation=True)
+
+
+async def aembeddings(**kwargs):
+    return await _acall("embeddings", get_async_client().embeddings, kwargs, generation=False)
+
+
+async def aembed(**kwargs):
+    return await _acall("embed", get_async_client().embed, kwargs, generation=False)
+
+
+# ─── 동기 래퍼 ───────────────────────────────────────────────────────────────
+
+async def _run_and_close(coro):
+    try:
+        return await coro
+    finally:
+        await close_async_client()
+
+
+def run_sync(coro):
+    """
+    코루틴을 동기적으로 실행해 결과를 반환합니다.
+    - 이벤트 루프가 없는 스레드(CLI, run_in_executor 워커): asyncio.run
+    - 이미 루프가 도는 스레드: 별도 스레드에서 새 루프로 실행 (현재 루프를 막지 않도록 가급적 a- 버전 사용)
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(_run_and_close(coro))
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, _run_and_close(coro)).result()
@@ -1,61 +1,321 @@
 """
-memory.py — 장기 기억 모듈 (ChromaDB + Ollama 임베딩)
+memory.py — 장기 기억 모듈 (벡터 저장소 + Ollama 임베딩)
 
 역할:
 - 대화 내용을 벡터 DB에 저장 (save)
-- 유사도 검색으로 관련 기억 회수 (recall)
+- 하이브리드 검색으로 관련 기억 회수 (recall) — 벡터 유사도 + BM25 키워드(lexical_index.py)를
+  reciprocal-rank fusion으로 합치고, where 메타데이터 필터와 토큰 예산을 적용
+- 저장소는 config.MEMORY_BACKEND로 선택 (vector_store.py — ChromaDB 또는 NumPy 메모리 맵)
 - RAG 파이프라인의 핵심 컴포넌트
+- asave / arecall: 임베딩은 AsyncClient로 await, 저장소 호출은 스레드로 넘기는 비동기 버전
+
+저장은 write-behind 방식입니다. save()는 큐에 넣고 바로 반환하며, 백그라운드 스레드가
+여러 건을 모아 한 번의 배치 임베딩(ollama embed, list 입력) + 한 번의 store.add로 기록합니다.
+재시도 후에도 기록하지 못한 배치(Ollama 중단 등)는 버리지 않고 저장소 옆 .pending.jsonl 파일에 보관했다가
+다음 기록이 성공하거나 다시 시작할 때 재기록합니다.
 """
 
-import sys
+import asyncio
+import atexit
+import json
+import queue
+import threading
+import time
 import uuid
 from pathlib import Path
-import chromadb
-import ollama
 
+import llm
+import telemetry
+from context_window import estimate_tokens
+from embed_cache import embedding_cache
+from lexical_index import BM25Index
+from tracing import span
+from vector_store import default_store_dir, open_store
+from config import EMBED_MODEL, MEMORY_BACKEND, MEMORY_BATCH_SIZE, MEMORY_FLUSH_INTERVAL, MEMORY_QUEUE_MAX
+
+
+_FLUSH = object()   # 워커에게 "지금 모인 배치를 즉시 기록" 신호
+_STOP = object()    # 워커 종료 신호
+
+_RRF_K = 60         # reciprocal-rank fusion 상수 (순위 1과 10의 가중치 차이를 완만하게)
 
-def _default_chroma_dir() -> str:
-    """번들(frozen) 여부에 따라 ChromaDB 저장 경로 반환."""
-    if getattr(sys, 'frozen', False):
-        base = Path(sys.executable).parent
-    else:
-        base = Path(__file__).resolve().parent.parent
-    return str(base / "Agent_Workspace" / ".chroma")
+
+def reciprocal_rank_fusion(rankings: list[list[tuple[str, str]]]) -> list[str]:
+    """여러 (id, document) 순위 목록을 RRF 점수 Σ 1/(k + rank) 순으로 합친 문서 목록"""
+    scores: dict[str, float] = {}
+    documents: dict[str, str] = {}
+    for ranking in rankings:
+        for rank, (id_, document) in enumerate(ranking, start=1):
+            scores[id_] = scores.get(id_, 0.0) + 1.0 / (_RRF_K + rank)
+            documents[id_] = document
+    return [documents[id_] for id_ in sorted(scores, key=scores.get, reverse=True)]
 
 
 class AgentMemory:
-    def __init__(self, persist_dir: str = None):
-        if persist_dir is None:
-            persist_dir = _default_chroma_dir()
-        self.client = chromadb.PersistentClient(path=persist_dir)
-        self.collection = self.client.get_or_create_collection(
-            name="agent_memory",
-            metadata={"hnsw:space": "cosine"}
-        )
+    def __init__(self, persist_dir: str = None, backend: str = MEMORY_BACKEND):
+        # 저장소 백엔드 (vector_store.py) — persist_dir가 없으면 Agent_Workspace 아래 백엔드별 기본 경로
+        self.store = open_store(backend, persist_dir)
+        # 기록 실패 배치 보관 파일 (저장소 디렉토리 옆) — 워커 스레드와 종료 후 직접 기록이 함께 쓰므로 잠금
+        self._spill_path = Path(f"{persist_dir or default_store_dir(backend)}.pending.jsonl")
+        self._spill_lock = threading.Lock()
+        # 문서 수는 시작 시 한 번만 조회하고 이후 add/delete에서 직접 갱신 (recall마다 count 왕복 방지)
+        self._count = self.store.count()
+        self._count_lock = threading.Lock()
+        # 키워드 검색용 BM25 색인 — 시작을 늦추지 않도록 첫 recall 때 저장소 문서로 구축(_lexical_index)하고
+        # 이후 add/delete와 함께 갱신. 구축 전의 add/delete는 저장소에 반영돼 있으므로 구축 시 함께 읽힘
+        self._lexical: BM25Index | None = None
+        self._lexical_lock = threading.Lock()
+
+        # write-behind 큐 — 가득 차면 save()가 대기(backpressure)
+        self._queue: queue.Queue = queue.Queue(maxsize=MEMORY_QUEUE_MAX)
+        self._writer = threading.Thread(target=self._writer_loop, name="memory-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
 
     def _embed(self, text: str) -> list[float]:
-        """Ollama 임베딩 모델로 텍스트를 벡터로 변환"""
-        response = ollama.embeddings(model="nomic-embed-text", prompt=text)
-        return response["embedding"]
+        """Ollama 임베딩 모델로 텍스트를 벡터로 변환 (embed_cache 우선)"""
+        cached = embedding_cache.get(EMBED_MODEL, text)
+        if cached is not None:
+            return cached
+        embedding = llm.embeddings(model=EMBED_MODEL, prompt=text, site="memory.embed")["embedding"]
+        embedding_cache.put(EMBED_MODEL, text, embedding)
+        return embedding
+
+    async def _aembed(self, text: str) -> list[float]:
+        cached = embedding_cache.get(EMBED_MODEL, text)
+        if cached is not None:
+            return cached
+        embedding = (await llm.aembeddings(model=EMBED_MODEL, prompt=text, site="memory.embed"))["embedding"]
+        embedding_cache.put(EMBED_MODEL, text, embedding)
+        return embedding
+
+    def _embed_batch(self, texts: list[str]) -> list[list[float]]:
+        """여러 텍스트를 한 번의 요청으로 임베딩 (캐시에 없는 것만 요청)"""
+        found = embedding_cache.get_many(EMBED_MODEL, texts)
+        missing = list(dict.fromkeys(t for t in texts if t not in found))
+        if missing:
+            response = llm.embed(model=EMBED_MODEL, input=missing, site="memory.embed")
+            fresh = dict(zip(missing, response["embeddings"]))
+            embedding_cache.put_many(EMBED_MODEL, fresh)
+            found.update(fresh)
+        return [found[t] for t in texts]
+
+    # ── write-behind 배치 기록 ───────────────────────────────────────────────
+
+    def _write_batch(self, items: list[tuple[str, dict]]):
+        texts = [text for text, _ in items]
+        ids = [str(uuid.uuid4()) for _ in items]
+        metadatas = [metadata or {} for _, metadata in items]
+        self.store.add(ids=ids, embeddings=self._embed_batch(texts), documents=texts, metadatas=metadatas)
+        with self._lexical_lock:
+            if self._lexical is not None:
+                self._lexical.add(ids, texts, metadatas)
+        with self._count_lock:
+            self._count += len(items)
+        print(f"[Memory] Saved {len(items)} item(s): {texts[0][:80]}...")
+
+    def _write_with_retry(self, items: list[tuple[str, dict]], outcome: str = "ok") -> bool:
+        """두 번 시도하고, 그래도 실패하면 보관 파일로 (성공 여부 반환)"""
+        for attempt in (1, 2):
+            try:
+                self._write_batch(items)
+                telemetry.record_memory_write(outcome, len(items))
+                return True
+            except Exception as e:
+                print(f"[Memory] Batch write failed ({len(items)} item(s), attempt {attempt}/2): {e}")
+                time.sleep(1.0)
+        self._spill(items)
+        return False
+
+    def _spill(self, items: list[tuple[str, dict]]):
+        if not items:
+            return
+        try:
+            with self._spill_lock, self._spill_path.open("a", encoding="utf-8") as f:
+                for text, metadata in items:
+                    f.write(json.dumps({"text": text, "metadata": metadata}, ensure_ascii=False, default=str) + "\n")
+        except OSError as e:
+            print(f"[Memory] Could not keep {len(items)} unsaved item(s) in {self._spill_path}: {e}")
+            return
+        telemetry.record_memory_write("spilled", len(items))
+        print(f"[Memory] Kept {len(items)} unsaved item(s) in {self._spill_path.name} for a later retry")
+
+    def _replay_spilled(self):
+        """보관 파일의 항목을 배치 단위로 다시 기록 (또 실패한 배치는 다시 보관)"""
+        with self._spill_lock:
+            if not self._spill_path.exists():
+                return
+            try:
+                lines = self._spill_path.read_text(encoding="utf-8").splitlines()
+                self._spill_path.unlink()
+            except OSError as e:
+                print(f"[Memory] Could not read {self._spill_path}: {e}")
+                return
+        items = []
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue   # 기록 도중 끊긴 마지막 줄
+            items.append((record["text"], record.get("metadata") or {}))
+        print(f"[Memory] Replaying {len(items)} unsaved item(s)")
+        for start in range(0, len(items), MEMORY_BATCH_SIZE):
+            if not self._write_with_retry(items[start:start + MEMORY_BATCH_SIZE], outcome="replayed"):
+                # 저장소·임베딩이 아직 불가 — 나머지도 그대로 다시 보관하고 다음 기회에
+                self._spill(items[start + MEMORY_BATCH_SIZE:])
+                return
+
+    def _writer_loop(self):
+        """크기(MEMORY_BATCH_SIZE) 또는 시간(MEMORY_FLUSH_INTERVAL) 기준으로 모아서 기록"""
+        self._replay_spilled()   # 이전 실행에서 남은 보관분
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+            batch, signals = [], [item]
+            if item is not _FLUSH:
+                batch.append(item)
+            deadline = time.monotonic() + MEMORY_FLUSH_INTERVAL
+            while item is not _FLUSH and len(batch) < MEMORY_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                signals.append(item)
+                if item is _STOP:
+                    break
+                if item is not _FLUSH:
+                    batch.append(item)
+
+            if batch and self._write_with_retry(batch):
+                self._replay_spilled()   # 기록이 다시 되기 시작함 — 보관분도 이어서
+            for signal in signals:
+                self._queue.task_done()
+            if signals[-1] is _STOP:
+                return
 
     def save(self, text: str, metadata: dict = {}):
-        """대화 또는 설정을 임베딩하여 저장"""
-        self.collection.add(
-            ids=[str(uuid.uuid4())],
-            embeddings=[self._embed(text)],
-            documents=[text],
-            metadatas=[metadata] if metadata else [{}]
-        )
-        print(f"[Memory] Saved: {text[:80]}...")
-
-    def recall(self, query: str, n_results: int = 5) -> list[str]:
-        """관련 기억 검색 (RAG)"""
-        # 컬렉션이 비어있으면 빈 리스트 반환
-        if self.collection.count() == 0:
+        """대화 또는 설정을 저장 큐에 넣음 (임베딩·기록은 백그라운드에서 배치 처리)"""
+        # 스팬은 요청 경로에서 드는 시간(큐 대기·backpressure)만 측정 — 실제 임베딩·기록은 워커 스레드
+        with span("memory.save", type=metadata.get("type", ""), queued=self._queue.qsize()):
+            self._enqueue((text, dict(metadata)))
+
+    def _enqueue(self, item: tuple[str, dict]):
+        if not self._writer.is_alive():
+            self._write_with_retry([item])   # 종료 이후의 저장은 즉시 기록
+            return
+        self._queue.put(item)
+
+    async def asave(self, text: str, metadata: dict = {}):
+        with span("memory.save", type=metadata.get("type", ""), queued=self._queue.qsize()):
+            item = (text, dict(metadata))
+            if self._writer.is_alive():
+                try:
+                    self._queue.put_nowait(item)
+                    return
+                except queue.Full:
+                    pass
+            # backpressure 또는 워커 종료 이후 — 이벤트 루프 대신 스레드에서 (_enqueue가 워커 상태 확인)
+            await asyncio.to_thread(self._enqueue, item)
+
+    def save_batch(self, items: list[tuple[str, dict]]):
+        """큐를 거치지 않고 즉시 기록 (압축 작업 등 결과 확인이 필요한 경우). 실패 시 예외 전파."""
+        self._write_batch([(text, dict(metadata)) for text, metadata in items])
+
+    def flush(self):
+        """대기 중인 저장을 모두 기록할 때까지 블로킹"""
+        if self._writer.is_alive():
+            self._queue.put(_FLUSH)
+            self._queue.join()
+
+    def close(self):
+        """남은 큐를 기록하고 워커를 종료 (atexit / FastAPI shutdown)"""
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._queue.join()
+            self._writer.join(timeout=5)
+
+    @property
+    def count(self) -> int:
+        """기록 완료된 문서 수 (큐에서 대기 중인 항목 제외)"""
+        return self._count
+
+    def delete(self, ids: list[str]):
+        """문서 삭제 — 저장소, BM25 색인, 문서 카운터를 함께 갱신"""
+        if not ids:
+            return
+        deleted = self.store.delete(ids)
+        with self._lexical_lock:
+            if self._lexical is not None:
+                self._lexical.remove(ids)
+        if deleted:
+            with self._count_lock:
+                self._count -= deleted
+
+    def get_all(self, include_embeddings: bool = False) -> list[dict]:
+        """전체 문서를 [{id, document, metadata, embedding?}] 로 반환 (유지보수 작업용)"""
+        return self.store.get_all(include_embeddings=include_embeddings)
+
+    # ── 검색 ────────────────────────────────────────────────────────────────
+
+    def _lexical_index(self) -> BM25Index:
+        """BM25 색인 (첫 호출 때 구축 — 구축 중의 기록·삭제는 잠금으로 대기했다가 완성된 색인에 반영)"""
+        with self._lexical_lock:
+            if self._lexical is None:
+                with span("memory.lexical_build") as s:
+                    index = BM25Index()
+                    records = self.store.get_all()
+                    index.add([r["id"] for r in records], [r["document"] for r in records],
+                              [r["metadata"] for r in records])
+                    s.set(documents=len(index))
+                self._lexical = index
+            return self._lexical
+
+    def _query(self, embedding: list[float], query: str, n_results: int,
+               where: dict | None, token_budget: int | None) -> list[str]:
+        # 컬렉션이 비어있으면 빈 리스트 반환 — 벡터 검색 1회 외에 DB 왕복 없음
+        count = self._count
+        if count == 0:
             return []
 
-        results = self.collection.query(
-            query_embeddings=[self._embed(query)],
-            n_results=min(n_results, self.collection.count())
-        )
-        return results["documents"][0] if results["documents"] else []
+        # 두 검색 모두 넉넉히 가져와 융합한 뒤 n_results / 토큰 예산으로 자름
+        depth = min(max(n_results * 4, 20), count)
+        fused = reciprocal_rank_fusion([
+            self.store.query(embedding, depth, where),
+            self._lexical_index().search(query, depth, where),
+        ])
+        if token_budget is None:
+            return fused[:n_results]
+
+        # 순위대로 담되 예산을 넘는 문서는 건너뛰고 다음 후보를 시도
+        selected, remaining = [], token_budget
+        for document in fused:
+            cost = estimate_tokens(document)
+            if cost <= remaining:
+                selected.append(document)
+                remaining -= cost
+                if len(selected) == n_results:
+                    break
+        return selected
+
+    def recall(self, query: str, n_results: int = 5, where: dict = None, token_budget: int = None) -> list[str]:
+        """
+        관련 기억 검색 (RAG)
+        where: 메타데이터 필터 — 예) {"type": {"$in": ["chat", "task"]}, "timestamp": {"$gte": "2026-01-01"}}
+        token_budget: 반환 문서의 추정 토큰 합 상한 (None이면 n_results개까지)
+        """
+        with span("memory.recall", n_results=n_results, where=json.dumps(where, ensure_ascii=False)) as s:
+            recalled = self._query(self._embed(query), query, n_results, where, token_budget)
+            s.set(hits=len(recalled))
+            return recalled
+
+    async def arecall(self, query: str, n_results: int = 5, where: dict = None, token_budget: int = None) -> list[str]:
+        with span("memory.recall", n_results=n_results, where=json.dumps(where, ensure_ascii=False)) as s:
+            embedding = await self._aembed(query)
+            recalled = await asyncio.to_thread(self._query, embedding, query, n_results, where, token_budget)
+            s.set(hits=len(recalled))
+            return recalled
@@ -0,0 +1,189 @@
+"""
+memory_compaction.py — 장기 기억 압축 · 요약 · 보존 정책
+
+역할:
+- 보존 기간: metadata["type"]별 최대 보관 일수(MEMORY_RETENTION_DAYS)를 넘긴 기억 삭제
+- 중복 제거: 같은 type 안에서 코사인 유사도 MEMORY_DEDUP_THRESHOLD 이상인 기억은 최신 1건만 유지
+- 요약: MEMORY_SUMMARIZE_AFTER_DAYS 보다 오래된 기억을 유사도로 묶어(cluster) LLM 요약 1건(digest)으로 교체
+- 회수한 문서 수 / 바이트 추정치를 보고서(dict)로 반환
+
+AgentScheduler.add_maintenance_job()으로 매일 새벽 실행되며, /api/memory/compact 로 수동 실행할 수 있습니다.
+"""
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import llm
+from config import (
+    MODEL_NAME,
+    MEMORY_RETENTION_DAYS,
+    MEMORY_DEDUP_THRESHOLD,
+    MEMORY_SUMMARIZE_AFTER_DAYS,
+    MEMORY_CLUSTER_THRESHOLD,
+    MEMORY_CLUSTER_MIN_SIZE,
+)
+from memory import AgentMemory
+
+DIGEST_PROMPT = """다음은 에이전트의 오래된 기억 {count}건입니다. 서로 관련된 내용이므로,
+나중에 참고할 수 있도록 핵심 사실·사용자 선호·결과만 남겨 한국어로 간결하게 하나의 요약으로 정리하세요.
+
+{memories}
+
+요약:"""
+
+
+def _parse_time(metadata: dict) -> datetime | None:
+    try:
+        return datetime.fromisoformat(metadata.get("timestamp", ""))
+    except (TypeError, ValueError):
+        return None
+
+
+def _doc_bytes(document: str, metadata: dict, dim: int) -> int:
+    """문서 1건이 차지하는 대략적인 크기 (본문 + 메타데이터 JSON + float32 벡터)"""
+    return len(document.encode("utf-8")) + len(json.dumps(metadata, ensure_ascii=False)) + dim * 4
+
+
+class MemoryCompactor:
+    def __init__(self, memory: AgentMemory, model_name: str = MODEL_NAME):
+        self.memory = memory
+        self.model_name = model_name
+
+    # ── 단계별 선택 ─────────────────────────────────────────────────────────
+
+    def _expired(self, records: list[dict], now: datetime) -> set[str]:
+        expired = set()
+        for r in records:
+            days = MEMORY_RETENTION_DAYS.get(r["metadata"].get("type", ""))
+            ts = r["time"]
+            if days is not None and ts is not None and now - ts > timedelta(days=days):
+                expired.add(r["id"])
+        return expired
+
+    def _duplicates(self, records: list[dict]) -> set[str]:
+        """최신순으로 정렬했을 때 앞(더 최신)에 거의 같은 기억이 있으면 중복으로 판단"""
+        duplicates = set()
+        for group in self._by_type(records).values():
+            if len(group) < 2:
+                continue
+            group.sort(key=lambda r: r["time"] or datetime.max, reverse=True)
+            vectors = self._normalized([r["embedding"] for r in group])
+            for start in range(0, len(group), 1024):
+                sims = vectors[start:start + 1024] @ vectors.T
+                for offset, row in enumerate(sims):
+                    i = start + offset
+                    if i and np.any(row[:i] >= MEMORY_DEDUP_THRESHOLD):
+                        duplicates.add(group[i]["id"])
+        return duplicates
+
+    def _clusters(self, records: list[dict], now: datetime) -> list[list[dict]]:
+        """오래된 기억을 type별로 탐욕적 클러스터링 — MEMORY_CLUSTER_MIN_SIZE 이상인 묶음만 반환"""
+        cutoff = now - timedelta(days=MEMORY_SUMMARIZE_AFTER_DAYS)
+        clusters = []
+        for type_, group in self._by_type(records).items():
+            old = [r for r in group if type_ != "digest" and r["time"] is not None and r["time"] < cutoff]
+            if len(old) < MEMORY_CLUSTER_MIN_SIZE:
+                continue
+            vectors = self._normalized([r["embedding"] for r in old])
+            unassigned = np.ones(len(old), dtype=bool)
+            for i in range(len(old)):
+                if not unassigned[i]:
+                    continue
+                members = np.where(unassigned & (vectors @ vectors[i] >= MEMORY_CLUSTER_THRESHOLD))[0]
+                unassigned[members] = False
+                if len(members) >= MEMORY_CLUSTER_MIN_SIZE:
+                    clusters.append([old[j] for j in members])
+        return clusters
+
+    @staticmethod
+    def _by_type(records: list[dict]) -> dict[str, list[dict]]:
+        grouped: dict[str, list[dict]] = {}
+        for r in records:
+            grouped.setdefault(r["metadata"].get("type", ""), []).append(r)
+        return grouped
+
+    @staticmethod
+    def _normalized(embeddings: list) -> np.ndarray:
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1.0, norms)
+
+    def _summarize(self, cluster: list[dict]) -> str:
+        newest_first = sorted(cluster, key=lambda r: r["time"], reverse=True)[:20]
+        memories = "\n".join(f"- {r['document'][:300]}" for r in newest_first)
+        response = llm.chat(
+            model=self.model_name,
+            site="compaction",
+            messages=[{"role": "user", "content": DIGEST_PROMPT.format(count=len(cluster), memories=memories)}],
+            options={"temperature": 0.2},
+        )
+        return response["message"]["content"].strip()
+
+    # ── 실행 ────────────────────────────────────────────────────────────────
+
+    def run(self) -> dict:
+        """압축을 1회 수행하고 보고서를 반환합니다. (동기 — 스케줄러가 스레드에서 호출)"""
+        self.memory.flush()
+        now = datetime.now()
+        records = [
+            {**r, "time": _parse_time(r["metadata"])}
+            for r in self.memory.get_all(include_embeddings=True)
+        ]
+        before = len(records)
+        dim = len(records[0]["embedding"]) if records else 0
+
+        expired = self._expired(records, now)
+        alive = [r for r in records if r["id"] not in expired]
+        duplicates = self._duplicates(alive)
+        alive = [r for r in alive if r["id"] not in duplicates]
+
+        summarized: set[str] = set()
+        digests: list[tuple[str, dict]] = []
+        for cluster in self._clusters(alive, now):
+            try:
+                digest = self._summarize(cluster)
+            except Exception as e:
+                print(f"[Compaction] Summarize failed ({len(cluster)} docs): {e}")
+                continue
+            if not digest:
+                continue
+            newest = max(r["time"] for r in cluster)
+            digests.append((
+                f"[Digest] {digest}",
+                {
+                    "type": "digest",
+                    "source_type": cluster[0]["metadata"].get("type", ""),
+                    "members": len(cluster),
+                    "timestamp": newest.isoformat(),
+                },
+            ))
+            summarized.update(r["id"] for r in cluster)
+
+        if digests:
+            try:
+                self.memory.save_batch(digests)
+            except Exception as e:
+                # 요약본 기록에 실패하면 원본을 지우지 않음
+                print(f"[Compaction] Digest write failed: {e}")
+                summarized.clear()
+                digests = []
+
+        removed_ids = expired | duplicates | summarized
+        removed = [r for r in records if r["id"] in removed_ids]
+        self.memory.delete(list(removed_ids))
+
+        reclaimed = sum(_doc_bytes(r["document"], r["metadata"], dim) for r in removed)
+        added = sum(_doc_bytes(text, meta, dim) for text, meta in digests)
+        report = {
+            "documents_before": before,
+            "documents_after": self.memory.count,
+            "expired": len(expired),
+            "duplicates": len(duplicates),
+            "summarized": len(summarized),
+            "digests_created": len(digests),
+            "documents_reclaimed": len(removed) - len(digests),
+            "bytes_reclaimed": reclaimed - added,
+        }
+        print(f"[Compaction] {report}")
+        return report
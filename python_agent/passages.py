@@ -0,0 +1,175 @@
+"""
+passages.py — 여러 출처에서 모은 본문을 종합 프롬프트용 자료로 정리 (Researcher 다중 출처 수집)
+
+1. split_passages: 본문을 문단 경계 기준 max_tokens 이하 조각으로 분할
+2. dedup_passages: 글자 k-gram shingle의 MinHash 서명으로 자카드 유사도를 추정해 거의 같은 조각(미러 기사,
+   공통 머리말·면책 문구 등)은 먼저 나온 하나만 유지
+3. arank_passages: BM25(lexical_index)로 상위 조각만 추린 뒤 요청과의 임베딩 코사인 유사도로 재정렬
+   (조각 벡터는 캐시에 남기지 않음, 임베딩을 못 쓰면 BM25 순서로 대체)
+   (1~2는 순수 Python CPU 작업이므로 prepare_passages로 묶어 스레드에서 실행)
+4. pack_passages: 점수 순으로 토큰 예산까지 담고, 출처별로 원래 순서를 살려 프롬프트 문자열로 조립
+"""
+import asyncio
+import hashlib
+import math
+import re
+from dataclasses import dataclass
+
+import llm
+from config import EMBED_MODEL
+from context_window import clip, estimate_tokens
+from embed_cache import embedding_cache
+from lexical_index import BM25Index
+
+_SHINGLE_SIZE = 5          # 글자 단위 shingle 길이 (공백 정규화 후)
+_NUM_PERMUTATIONS = 64     # MinHash 서명 길이 — 자카드 추정 오차 약 ±0.06
+_MERSENNE = (1 << 61) - 1
+# 고정 시드의 (a, b) 해시 계수 — 실행마다 같은 서명
+_COEFFS = [
+    (int.from_bytes(hashlib.blake2b(f"a{i}".encode(), digest_size=8).digest(), "big") % (_MERSENNE - 1) + 1,
+     int.from_bytes(hashlib.blake2b(f"b{i}".encode(), digest_size=8).digest(), "big") % _MERSENNE)
+    for i in range(_NUM_PERMUTATIONS)
+]
+_RE_SPACES = re.compile(r"\s+")
+
+
+@dataclass
+class Passage:
+    source: str
+    text: str
+    position: int = 0      # 출처 안에서의 순서
+    score: float = 0.0
+
+
+# ── 분할 ─────────────────────────────────────────────────────────────────────
+
+def split_passages(source: str, text: str, max_tokens: int) -> list[Passage]:
+    """빈 줄·줄바꿈 경계로 문단을 모아 max_tokens 이하 조각으로 나눔 (한 문단이 넘치면 clip)"""
+    passages, current, current_tokens = [], [], 0
+    for paragraph in (p.strip() for p in re.split(r"\n\s*\n|\n", text)):
+        if not paragraph:
+            continue
+        tokens = estimate_tokens(paragraph)
+        if current and current_tokens + tokens > max_tokens:
+            passages.append("\n".join(current))
+            current, current_tokens = [], 0
+        current.append(clip(paragraph, max_tokens))
+        current_tokens += min(tokens, max_tokens)
+    if current:
+        passages.append("\n".join(current))
+    return [Passage(source=source, text=p, position=i) for i, p in enumerate(passages)]
+
+
+# ── 중복 제거 (MinHash) ──────────────────────────────────────────────────────
+
+def _shingles(text: str) -> set[int]:
+    normalized = _RE_SPACES.sub(" ", text.lower()).strip()
+    if len(normalized) <= _SHINGLE_SIZE:
+        normalized = normalized.ljust(_SHINGLE_SIZE)
+    return {
+        int.from_bytes(hashlib.blake2b(normalized[i:i + _SHINGLE_SIZE].encode("utf-8"), digest_size=8).digest(), "big")
+        for i in range(len(normalized) - _SHINGLE_SIZE + 1)
+    }
+
+
+def minhash_signature(text: str) -> list[int]:
+    shingles = _shingles(text)
+    return [min((a * s + b) % _MERSENNE for s in shingles) for a, b in _COEFFS]
+
+
+def estimated_jaccard(sig_a: list[int], sig_b: list[int]) -> float:
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / len(sig_a)
+
+
+def dedup_passages(passages: list[Passage], threshold: float) -> list[Passage]:
+    """추정 자카드 유사도가 threshold 이상인 조각은 먼저 나온 것만 남김"""
+    kept, signatures = [], []
+    for passage in passages:
+        signature = minhash_signature(passage.text)
+        if any(estimated_jaccard(signature, other) >= threshold for other in signatures):
+            continue
+        kept.append(passage)
+        signatures.append(signature)
+    return kept
+
+
+def prepare_passages(documents: list[tuple[str, str]], max_tokens: int, per_source: int,
+                     threshold: float) -> tuple[int, list[Passage]]:
+    """
+    (출처, 본문) 목록을 분할하고(출처당 앞 per_source개) 중복을 제거 → (분할된 조각 수, 남은 조각).
+    이벤트 루프를 막지 않도록 asyncio.to_thread로 호출합니다.
+    """
+    passages = []
+    for source, text in documents:
+        passages += split_passages(source, text, max_tokens)[:per_source]
+    return len(passages), dedup_passages(passages, threshold)
+
+
+# ── 순위 ─────────────────────────────────────────────────────────────────────
+
+async def _aembed_query(query: str) -> list[float]:
+    """요청(질문) 벡터는 공유 임베딩 캐시 사용 — 같은 하위 질문이 다시 오면 재사용"""
+    cached = embedding_cache.get(EMBED_MODEL, query)
+    if cached is not None:
+        return cached
+    embedding = (await llm.aembed(model=EMBED_MODEL, input=[query], site="researcher.embed"))["embeddings"][0]
+    embedding_cache.put(EMBED_MODEL, query, embedding)
+    return embedding
+
+
+def _cosine(a: list[float], b: list[float]) -> float:
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return sum(x * y for x, y in zip(a, b)) / norm if norm else 0.0
+
+
+def _lexical_order(query: str, passages: list[Passage]) -> list[Passage]:
+    """BM25 점수 순 (검색어와 겹치는 단어가 없는 조각은 원래 순서로 뒤에)"""
+    index = BM25Index()
+    index.add([str(i) for i in range(len(passages))], [p.text for p in passages], [{}] * len(passages))
+    matched = [int(id_) for id_, _ in index.search(query, len(passages))]
+    rest = sorted(set(range(len(passages))) - set(matched))
+    return [passages[i] for i in matched + rest]
+
+
+async def arank_passages(query: str, passages: list[Passage], top_k: int) -> list[Passage]:
+    """
+    요청과 가까운 순으로 정렬. BM25로 먼저 상위 top_k개만 추린 뒤 그 조각만 임베딩해 코사인 유사도로 재정렬
+    (나머지는 BM25 순으로 뒤에 붙음 — 예산이 남을 때만 쓰임).
+    조각 벡터는 이번 순위에만 쓰고 공유 임베딩 캐시에 저장하지 않음 (기억·라우터 임베딩이 밀려나지 않도록).
+    임베딩을 못 쓰면 BM25 순서 그대로
+    """
+    if not passages:
+        return []
+    lexical = await asyncio.to_thread(_lexical_order, query, passages)
+    candidates, rest = lexical[:top_k], lexical[top_k:]
+    try:
+        query_vec = await _aembed_query(query)
+        response = await llm.aembed(model=EMBED_MODEL, input=[p.text for p in candidates], site="researcher.embed")
+    except Exception as e:
+        print(f"[Passages] Embedding failed, ranking by BM25: {e}")
+        return lexical
+    for passage, vector in zip(candidates, response["embeddings"]):
+        passage.score = _cosine(query_vec, vector)
+    return sorted(candidates, key=lambda p: p.score, reverse=True) + rest
+
+
+# ── 조립 ─────────────────────────────────────────────────────────────────────
+
+def pack_passages(ranked: list[Passage], budget_tokens: int) -> str:
+    """점수 순으로 예산까지 고른 뒤, 출처별로 묶어 원래 순서대로 "[출처] ..." 블록을 만듦"""
+    chosen, used = [], 0
+    for passage in ranked:
+        tokens = estimate_tokens(passage.text)
+        if used + tokens > budget_tokens:
+            continue
+        chosen.append(passage)
+        used += tokens
+
+    by_source: dict[str, list[Passage]] = {}
+    for passage in chosen:
+        by_source.setdefault(passage.source, []).append(passage)
+    blocks = []
+    for source, items in by_source.items():
+        body = "\n...\n".join(p.text for p in sorted(items, key=lambda p: p.position))
+        blocks.append(f"[출처] {source}\n{body}")
+    return "\n\n".join(blocks)
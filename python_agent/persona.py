@@ -4,11 +4,15 @@ persona.py — 동적 시스템 프롬프트 (페르소나) 모듈
 역할:
 - persona.yaml 파일에서 에이전트 성격/제약 설정 로드
 - RAG 기억 + 페르소나 설정을 결합하여 최종 시스템 프롬프트 생성
+- PersonaManager: 파싱·정적 렌더링 결과를 캐시하고 파일 mtime이 바뀌면 자동으로 다시 로드
 """
 
+import os
 import sys
+import threading
 from pathlib import Path
 import yaml
+from config import MEMORY_RECALL_TOKEN_BUDGET, MEMORY_RECALL_TYPES
 from memory import AgentMemory
 
 
@@ -30,13 +34,118 @@ def load_persona(path: str = None) -> dict:
         return yaml.safe_load(f)
 
 
-def build_system_prompt(user_query: str, memory: AgentMemory) -> str:
-    """페르소나 설정 + RAG 결과를 조합하여 시스템 프롬프트 문자열 반환"""
-    persona = load_persona()
-    recalled_memories = memory.recall(user_query)
-    memories_text = "\n".join(f"- {m}" for m in recalled_memories)
+def _deep_merge(base: dict, changes: dict) -> dict:
+    merged = dict(base)
+    for key, value in changes.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _deep_merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
 
-    system_prompt = f"""당신의 이름은 {persona['name']}입니다.
+
+class PersonaManager:
+    """
+    persona.yaml을 한 번만 파싱하고 RAG 섹션을 제외한 프롬프트(정적 부분)를 미리 렌더링해 둡니다.
+    매 요청은 파일 mtime만 확인(stat 1회)하고, 바뀌었으면 다시 읽습니다 — 수정 즉시 반영, 재시작 불필요.
+    """
+
+    def __init__(self, path: str = None):
+        self._path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self._mtime: float | None = None
+        self._persona: dict = {}
+        self._prefix = ""
+
+    @property
+    def path(self) -> Path:
+        return self._path or _default_persona_path()
+
+    def _writable_path(self) -> Path:
+        # 번들 실행 시 _MEIPASS 내장본은 읽기 전용 — exe 옆 Agent_Workspace에 기록
+        if self._path is None and getattr(sys, 'frozen', False):
+            return Path(sys.executable).parent / "Agent_Workspace" / "persona.yaml"
+        return self.path
+
+    def _compile(self, persona: dict):
+        self._prefix = _render_static(persona)
+        self._persona = persona
+
+    def _refresh(self):
+        path = self.path
+        mtime = path.stat().st_mtime
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            if mtime != self._mtime:
+                self._compile(load_persona(str(path)))
+                self._mtime = mtime
+                print(f"[Persona] Loaded {path.name} ({self._persona.get('name')})")
+
+    def get(self) -> dict:
+        self._refresh()
+        return self._persona
+
+    def render(self, recalled_memories: list[str]) -> str:
+        """미리 렌더링한 정적 부분 뒤에 RAG 결과만 붙임 — 요청마다 바뀌는 내용이 항상 끝에 오도록"""
+        self._refresh()
+        memories_text = "\n".join(f"- {m}" for m in recalled_memories)
+        return self._prefix + (memories_text if memories_text else "관련 기억 없음")
+
+    def update(self, changes: dict) -> dict:
+        """
+        변경 사항을 현재 페르소나에 병합(중첩 dict는 키 단위)하고 persona.yaml에 저장합니다.
+        렌더링에 필요한 항목이 빠지면 ValueError — 파일은 그대로 유지됩니다. (YAML 주석은 보존되지 않음)
+        """
+        self._refresh()
+        with self._lock:
+            persona = _deep_merge(self._persona, changes)
+            try:
+                _render_static(persona)
+            except (KeyError, TypeError) as e:
+                raise ValueError(f"Invalid persona: missing or malformed field {e}") from e
+
+            path = self._writable_path()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".yaml.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                yaml.safe_dump(persona, f, allow_unicode=True, sort_keys=False)
+            os.replace(tmp, path)
+            self._compile(persona)
+            self._mtime = path.stat().st_mtime
+        print(f"[Persona] Updated: {', '.join(changes)}")
+        return persona
+
+
+persona_manager = PersonaManager()
+
+
+def _recall_where(mode: str | None) -> dict | None:
+    types = MEMORY_RECALL_TYPES.get(mode) if mode else None
+    return {"type": {"$in": types}} if types else None
+
+
+def build_system_prompt(user_query: str, memory: AgentMemory, mode: str = None) -> str:
+    """
+    페르소나 설정 + RAG 결과를 조합하여 시스템 프롬프트 문자열 반환
+    mode: "chat" / "task" — MEMORY_RECALL_TYPES에 따라 회수할 기억 type을 제한
+    """
+    recalled = memory.recall(user_query, where=_recall_where(mode), token_budget=MEMORY_RECALL_TOKEN_BUDGET)
+    return persona_manager.render(recalled)
+
+
+async def abuild_system_prompt(user_query: str, memory: AgentMemory, mode: str = None) -> str:
+    """build_system_prompt 의 비동기 버전 (기억 검색을 await)."""
+    recalled = await memory.arecall(user_query, where=_recall_where(mode), token_budget=MEMORY_RECALL_TOKEN_BUDGET)
+    return persona_manager.render(recalled)
+
+
+def _render_static(persona: dict) -> str:
+    """
+    RAG 섹션 앞까지의 프롬프트 — 페르소나가 바뀔 때만 다시 만듦.
+    Ollama는 직전 요청과 겹치는 프롬프트 앞부분의 KV 캐시를 재사용하므로 고정 내용을 앞에 둡니다.
+    """
+    return f"""당신의 이름은 {persona['name']}입니다.
 성격: {persona['personality']['description']}
 말투: {persona['personality']['tone']} / 언어: {persona['personality']['language']}
 상세도: {persona['personality']['verbosity']}
@@ -47,9 +156,7 @@ def build_system_prompt(user_query: str, memory: AgentMemory) -> str:
 [콘텐츠 정책]
 {chr(10).join(f"- {r}" for r in persona['restrictions']['content_policy'])}
 
-[관련 기억 (RAG 검색 결과)]
-{memories_text if memories_text else "관련 기억 없음"}
-
-위 페르소나와 기억을 바탕으로 사용자 요청에 응답하세요."""
+위 페르소나와 아래 기억을 바탕으로 사용자 요청에 응답하세요.
 
-    return system_prompt
+[관련 기억 (RAG 검색 결과)]
+"""
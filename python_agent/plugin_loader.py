@@ -51,7 +51,10 @@ def load_plugins() -> dict:
                     # 도구 설명이 있으면 함수 docstring으로 설정 (ReAct 루프가 사용)
                     if hasattr(module, "TOOL_DESCRIPTION"):
                         tool_func.__doc__ = module.TOOL_DESCRIPTION
-                        
+                    # 인자 스키마(JSON Schema)가 있으면 네이티브 도구 호출 모드에서 그대로 사용
+                    if hasattr(module, "TOOL_PARAMETERS"):
+                        tool_func.parameters = module.TOOL_PARAMETERS
+
                     tools[tool_name] = tool_func
                     print(f"  [+] Loaded Plugin: {tool_name}")
                 else:
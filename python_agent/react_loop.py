@@ -1,7 +1,20 @@
+import asyncio
+import inspect
 import json
 import re
-import ollama
+import threading
 from datetime import datetime
+from typing import AsyncIterator
+
+import llm
+from config import (REACT_PARALLEL_ACTIONS, REACT_MAX_PARALLEL, REACT_TOOL_MODE, TOOL_CONCURRENCY_LIMITS,
+                    REACT_EARLY_ACTION, REACT_PREFETCH, REACT_PREFETCH_TOP_URLS, REACT_LOOP_MAX_REPEATS,
+                    TOOL_CACHE_POLICIES)
+from context_window import ContextWindow, estimate_tokens
+from telemetry import record_react_iteration, record_react_repeat, record_react_task
+from tool_cache import BYPASS_FLAG
+from tool_schema import build_tool_definitions
+from tracing import span
 
 MAX_ITERATIONS = 10
 
@@ -34,7 +47,7 @@ STRICT RULES:
 - Do NOT write "Observation:" yourself. The system provides it.
 - Action must be one of the listed tool names exactly.
 - Action Input must be valid JSON on a single line.
-- Do NOT generate multiple Actions at once.
+{multi_action_rule}
 - If no tool is needed, go directly to Final Answer.
 
 ---
@@ -74,15 +87,238 @@ Thought: 파일 저장이 완료되었습니다.
 Final Answer: 오늘 환율 정보를 바탕화면의 환율.txt에 저장했습니다.
 """
 
+SINGLE_ACTION_RULE = "- Do NOT generate multiple Actions at once."
+
+# 병렬 모드(REACT_PARALLEL_ACTIONS)에서만 시스템 프롬프트 끝에 추가
+PARALLEL_ACTION_RULE = """- If several tool calls do NOT depend on each other's results, you may request them together
+  in ONE step using the "Actions:" format below instead of Action / Action Input."""
+
+PARALLEL_ACTIONS_PROMPT = """
+---
+
+PARALLEL ACTIONS (independent tool calls only):
+
+Thought: [한국어로 계획]
+Actions: [{{"tool": "tool_name", "input": {{"key": "value"}}}}, {{"tool": "tool_name", "input": {{"key": "value"}}}}]
+
+The system runs them at the same time and returns one Observation numbered [1], [2], ... in the same order.
+If a call needs the result of another call, use separate steps.
+
+[Example 3 — 여러 주제 동시 검색]
+User: 비트코인, 이더리움, 솔라나 시세를 찾아서 바탕화면에 저장해줘
+
+Thought: 세 가지 검색은 서로 독립적이므로 한 번에 요청합니다.
+Actions: [{{"tool": "web_search", "input": {{"query": "비트코인 시세"}}}}, {{"tool": "web_search", "input": {{"query": "이더리움 시세"}}}}, {{"tool": "web_search", "input": {{"query": "솔라나 시세"}}}}]
+
+(시스템이 [1], [2], [3] Observation 제공)
+
+Thought: 세 결과를 한 파일로 저장합니다.
+Action: write_file
+Action Input: {{"path": "Desktop/시세.txt", "content": "..."}}
+"""
+
+# 네이티브 도구 호출 모드(REACT_TOOL_MODE="native")의 시스템 프롬프트 — 도구 목록과 인자 형식은 tools= 로 전달
+NATIVE_SYSTEM_PROMPT = """You are a personal AI assistant running on the user's local computer.
+Your job is to help the user with tasks involving their files, the web, and automation.
+
+LANGUAGE RULE: Always respond in Korean (한국어). Do NOT mix English into your answer.
+
+FILE ACCESS:
+- You can read and write any file on the user's computer (except system paths like C:\\Windows, /etc).
+- Relative paths are interpreted from the user's home directory.
+- Use list_dir to explore directories before reading files if the path is unclear.
+- Agent_Workspace is your working directory — save your own output files there.
+
+TOOL RULES:
+- Call the provided tools whenever you need information or need to take an action.
+- Tool calls that do NOT depend on each other's results may be requested together in one turn.
+- Tool results are returned to you as tool messages. Never invent tool results yourself.
+- When the task is done (or no tool is needed), reply with the final answer in Korean without calling any tool.
+"""
+
+# 도구 미지원으로 확인된 모델 — 프로세스 동안 텍스트 모드로 실행 (매번 400 응답을 받지 않도록)
+_NATIVE_UNSUPPORTED: set[str] = set()
+
+
+def _tools_unsupported(error: Exception) -> bool:
+    """Ollama가 '... does not support tools' (HTTP 400) 로 거절했는지"""
+    return getattr(error, "status_code", None) == 400 and "support tools" in str(error)
+
+
+def _tool_arguments(arguments) -> dict:
+    """tool_calls의 arguments — 보통 dict지만 JSON 문자열로 오는 모델도 있음"""
+    if isinstance(arguments, str):
+        try:
+            arguments = json.loads(arguments)
+        except json.JSONDecodeError:
+            return {}
+    return arguments if isinstance(arguments, dict) else {}
+
+
+# ─── 반복 호출 감지 ──────────────────────────────────────────────────────────
+
+REPEAT_HINT = ("[반복 감지] {action} 도구를 같은 입력으로 이미 실행했습니다. 위는 이전 결과이며 다시 실행하지 않았습니다. "
+               "같은 호출을 반복하지 말고 다른 도구나 입력을 시도하거나, 충분하면 Final Answer를 작성하세요.")
+
+FORCE_FINAL_PROMPT = ("같은 도구 호출이 반복되어 더 이상 도구를 실행하지 않습니다. "
+                      "지금까지의 Observation만으로 한국어 최종 답변을 작성하세요. 반드시 \"Final Answer:\" 로 시작하세요.")
+
+_FORMAT_LINE = re.compile(r"^\s*(Thought|Action|Action Input|Actions):.*$", re.MULTILINE)
+
+
+def _normalize_input(action_input: dict) -> dict:
+    """
+    반복 판정용 입력 정규화 — JSON 왕복으로 값 표현만 맞추고(튜플→리스트, 숫자 키→문자열 등) 캐시 우회 플래그 제외.
+    문자열 내용(공백 포함)은 그대로 비교하고, 키 순서는 _call_key의 sort_keys로 무시
+    """
+    try:
+        normalized = json.loads(json.dumps(action_input, ensure_ascii=False, default=str))
+    except (TypeError, ValueError):
+        return action_input
+    if isinstance(normalized, dict):
+        normalized.pop(BYPASS_FLAG, None)
+    return normalized
+
+
+# ─── 도구 결과 선읽기 (REACT_PREFETCH) ──────────────────────────────────────
+
+_URL_LINE = re.compile(r"^\s*URL:\s*(https?://\S+)", re.MULTILINE)
+
+
+def _predict_after_search(observation: str) -> list[tuple[str, dict]]:
+    """web_search 다음 단계는 거의 항상 상위 결과의 web_scrape — 상위 URL을 미리 수집"""
+    return [("web_scrape", {"url": url}) for url in _URL_LINE.findall(observation)[:REACT_PREFETCH_TOP_URLS]]
+
+
+# 도구 이름 → Observation을 받아 다음에 요청될 가능성이 높은 (도구, 입력) 목록을 돌려주는 함수
+PREFETCH_PREDICTORS = {
+    "web_search": _predict_after_search,
+}
+
+
+def _call_key(action: str, action_input: dict) -> str:
+    return f"{action}:{json.dumps(action_input, ensure_ascii=False, sort_keys=True, default=str)}"
+
+
+# ─── 스트리밍 출력 분할 ──────────────────────────────────────────────────────
+
+_ACTION_MARKER = "Action:"
+_ACTIONS_MARKER = "Actions:"   # 병렬 모드의 JSON 배열 형식
+_FINAL_MARKER = "Final Answer:"
+_STOP_MARKER = "Observation:"
+
+
+def _pending_prefix_len(text: str, markers: tuple) -> int:
+    """text 끝부분이 마커의 앞부분일 수 있는 최대 길이 — 다음 청크가 올 때까지 내보내지 않습니다."""
+    longest = 0
+    for marker in markers:
+        for k in range(min(len(marker) - 1, len(text)), longest, -1):
+            if text.endswith(marker[:k]):
+                longest = k
+                break
+    return longest
+
+
+class StreamSplitter:
+    """
+    LLM 토큰 스트림을 프레임(thought / final 델타)으로 나눕니다.
+    - "Action:" 이후 원문은 내보내지 않고, 스트림 종료 후 파싱된 action 프레임으로 대체
+    - "Observation:" 이 나타나면 그 앞에서 잘라내고 stopped=True (정지 시퀀스의 클라이언트 측 처리)
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.mode = "thought"   # thought → action | final
+        self.stopped = False
+        self._pos = 0           # 이미 프레임으로 내보낸 위치
+
+    def feed(self, chunk: str) -> list[dict]:
+        if self.stopped:
+            return []
+        start = max(0, len(self.text) - len(_STOP_MARKER))
+        self.text += chunk
+        stop_at = self.text.find(_STOP_MARKER, start)
+        if stop_at != -1:
+            self.text = self.text[:stop_at]
+            self.stopped = True
+        return self._drain(final=self.stopped)
+
+    def close(self) -> list[dict]:
+        """스트림 종료 — 보류 중인 텍스트를 모두 내보냅니다."""
+        return self._drain(final=True)
+
+    def _emit(self, events: list, end: int):
+        delta = self.text[self._pos:end]
+        if delta:
+            events.append({"type": self.mode, "delta": delta})
+        self._pos = max(self._pos, end)
+
+    def _drain(self, final: bool) -> list[dict]:
+        events = []
+        while True:
+            if self.mode == "action":
+                # Action 뒤에 Final Answer가 오는 경우도 기존 로직과 동일하게 최종 답변으로 취급
+                found = self.text.find(_FINAL_MARKER, self._pos)
+                if found == -1:
+                    return events
+                self.mode, self._pos = "final", found + len(_FINAL_MARKER)
+                continue
+
+            if self.mode == "thought":
+                hits = [i for i in (self.text.find(_ACTION_MARKER, self._pos),
+                                    self.text.find(_ACTIONS_MARKER, self._pos),
+                                    self.text.find(_FINAL_MARKER, self._pos)) if i != -1]
+                if hits:
+                    cut = min(hits)
+                    self._emit(events, cut)
+                    if self.text.startswith(_FINAL_MARKER, cut):
+                        self.mode, self._pos = "final", cut + len(_FINAL_MARKER)
+                    else:
+                        self.mode, self._pos = "action", cut
+                    continue
+                markers = (_ACTION_MARKER, _ACTIONS_MARKER, _FINAL_MARKER, _STOP_MARKER)
+            else:
+                markers = (_STOP_MARKER,)
+
+            end = len(self.text)
+            if not final:
+                end -= _pending_prefix_len(self.text[self._pos:], markers)
+            self._emit(events, end)
+            return events
+
+
 class ReActAgent:
-    def __init__(self, tools: dict, model_name: str = "qwen2.5:7b", memory=None):
+    def __init__(self, tools: dict, model_name: str = "qwen2.5:7b", memory=None,
+                 parallel_actions: bool = REACT_PARALLEL_ACTIONS, tool_mode: str = REACT_TOOL_MODE,
+                 early_action: bool = REACT_EARLY_ACTION, prefetch: bool = REACT_PREFETCH):
         self.tools = tools          # {"tool_name": function}
         self.model_name = model_name
         self.memory = memory        # AgentMemory 인스턴스 (Phase 3)
+        self.parallel_actions = parallel_actions   # True면 "Actions: [...]" 로 독립 도구를 한 번에 실행
+        self.tool_mode = tool_mode  # "text" | "native" (ollama tools API)
+        self.early_action = early_action   # Action Input JSON이 완성되는 즉시 생성을 끊고 도구 실행
+        self.prefetch = prefetch           # PREFETCH_PREDICTORS로 다음 도구 호출을 미리 실행
         self.history = []
 
+        # 도구별 동시 실행 상한 — 스레드에서 획득하므로 이벤트 루프와 무관하게 여러 실행이 공유
+        self._tool_limits = {
+            name: threading.BoundedSemaphore(TOOL_CONCURRENCY_LIMITS.get(name, REACT_MAX_PARALLEL))
+            for name in tools
+        }
+
         # 도구 설명 문자열 생성 (프롬프트 주입용)
         self.tool_desc_str = self._generate_tool_descriptions()
+        # 도구·형식 규칙·예시는 실행마다 같으므로 한 번만 포맷 — 시스템 프롬프트의 고정 접두사
+        self.react_prompt = REACT_SYSTEM_PROMPT.format(
+            tool_descriptions=self.tool_desc_str,
+            multi_action_rule=PARALLEL_ACTION_RULE if parallel_actions else SINGLE_ACTION_RULE,
+        )
+        if parallel_actions:
+            self.react_prompt += PARALLEL_ACTIONS_PROMPT.format()
+        # 네이티브 모드용 — 스키마도 실행마다 같아야 프롬프트 접두사가 유지됨
+        self.native_prompt = NATIVE_SYSTEM_PROMPT
+        self.tool_definitions = build_tool_definitions(tools)
+        self._schema_tokens = estimate_tokens(json.dumps(self.tool_definitions, ensure_ascii=False))
 
     def _generate_tool_descriptions(self) -> str:
         desc = []
@@ -93,99 +329,428 @@ class ReActAgent:
         return "\n".join(desc)
 
     def run(self, task: str) -> str:
-        """사용자 태스크를 받아 ReAct 루프를 실행하고 최종 답변을 반환합니다."""
+        """사용자 태스크를 받아 ReAct 루프를 실행하고 최종 답변을 반환합니다. (arun 의 동기 래퍼)"""
+        return llm.run_sync(self.arun(task))
+
+    async def arun(self, task: str) -> str:
+        answer = ""
+        async for event in self.arun_stream(task):
+            if event["type"] == "done":
+                answer = event["content"]
+        return answer
+
+    async def arun_stream(self, task: str) -> AsyncIterator[dict]:
+        """
+        ReAct 루프를 실행하며 진행 상황을 프레임 단위로 yield 합니다.
+          {"type": "thought", "delta": str}       — Thought 토큰
+          {"type": "action", "tool": str, "input": dict}
+          {"type": "observation", "content": str}
+          {"type": "final", "delta": str}         — Final Answer 토큰
+          {"type": "done", "content": str}        — 최종 답변 (항상 마지막)
+        """
+        # 선읽기 중인 도구 호출 (_call_key → Task) — 실행이 끝나면 쓰이지 않은 것은 취소
+        prefetched: dict[str, asyncio.Task] = {}
+        try:
+            async for event in self._react(task, prefetched):
+                yield event
+        finally:
+            for pending in prefetched.values():
+                pending.cancel()
+
+    async def _react(self, task: str, prefetched: dict) -> AsyncIterator[dict]:
         try:
             print(f"\n[ReAct] Task started: {task}".encode('utf-8', 'replace').decode('utf-8'))
         except:
             pass
 
-        # 시스템 프롬프트 구성: 페르소나+기억 + 도구 설명 결합
-        react_prompt = REACT_SYSTEM_PROMPT.format(tool_descriptions=self.tool_desc_str)
-
+        # 시스템 프롬프트 구성: 고정 내용(도구 설명·형식 규칙·예시 → 페르소나) 뒤에 이번 요청의 기억을 배치
+        # — 앞부분이 매번 같아야 Ollama가 KV 캐시를 재사용해 수천 토큰을 다시 평가하지 않음
+        persona_prompt = ""
         if self.memory:
-            from persona import build_system_prompt
-            persona_prompt = build_system_prompt(task, self.memory)
-            system_prompt = persona_prompt + "\n\n" + react_prompt
-        else:
-            system_prompt = react_prompt
+            from persona import abuild_system_prompt
+            persona_prompt = await abuild_system_prompt(task, self.memory, mode="task")
+
+        # 네이티브 도구 호출 — 도구 미지원으로 확인된 모델은 처음부터 텍스트 모드
+        native = self.tool_mode == "native" and self.model_name not in _NATIVE_UNSUPPORTED
 
         messages = [
-            {"role": "system", "content": system_prompt},
+            {"role": "system", "content": self._system_prompt(native, persona_prompt)},
             {"role": "user", "content": f"Task: {task}"}
         ]
+        # num_ctx 안에 시스템 프롬프트가 항상 남도록 — Observation 자르기, 오래된 단계 압축, num_ctx 확장
+        window = ContextWindow(overhead_tokens=self._schema_tokens if native else 0)
+        # 반복 감지 — 정규화된 (도구, 입력) → 첫 실행 결과. 반복은 재실행 없이 이전 결과 + 교정 힌트로 응답
+        # 결과를 재사용해도 되는 도구(TOOL_CACHE_POLICIES에 정책이 있는 읽기 도구)만 대상이며,
+        # 정책이 없는 도구(write_file 등 부작용)가 실행되면 이전 결과가 달라졌을 수 있으므로 모두 비움
+        seen_calls: dict[str, str] = {}
+        repeats = 0
+        force_final = False   # 반복이 REACT_LOOP_MAX_REPEATS에 도달하면 도구 없이 최종 답변만 요청
         
         for iteration in range(MAX_ITERATIONS):
-            try:
-                print(f"[ReAct] Iteration {iteration + 1}...")
-            except:
-                pass
-            
-            # 1. LLM 호출
-            # stop=["Observation:"] — LLM이 도구 결과를 스스로 만들어내는 환각 방지
-            response = ollama.chat(
-                model=self.model_name,
-                messages=messages,
-                options={
-                    "stop": ["Observation:"],
-                    "temperature": 0.1,   # 낮을수록 지시 준수율 높아짐 (언어 혼입 방지)
-                    "num_ctx": 4096,      # 컨텍스트 상한 고정 (메모리 과부하 방지)
-                },
-            )
-            output = response["message"]["content"]
+            with span("react.iteration", iteration=iteration + 1) as iteration_span:
+                try:
+                    print(f"[ReAct] Iteration {iteration + 1}...")
+                except:
+                    pass
             
-            try:
-                print(f"[ReAct] LLM Output:\n{output}\n".encode('utf-8', 'replace').decode('utf-8'))
-            except:
-                pass
+                # 컨텍스트 사용량 — 예산을 넘으면 fit()이 오래된 단계를 요약으로 바꾸고, 그래도 넘치면 num_ctx를 늘림
+                num_ctx, used_tokens = window.fit(messages)
+                iteration_span.set(context_tokens=used_tokens, num_ctx=num_ctx)
+                try:
+                    print(f"[ReAct] Context: ~{used_tokens}/{num_ctx} tokens ({used_tokens / num_ctx:.0%}), "
+                          f"compressed steps: {window.compressed_steps}")
+                except:
+                    pass
+
+                # 1. LLM 호출 (스트리밍) — 최종 답변 강제 단계는 도구 없이 텍스트로만 요청
+                turn = {}
+                if native and not force_final:
+                    async for event in self._astream_native(messages, turn, num_ctx):
+                        yield event
+                    if turn.get("unsupported"):
+                        # 모델이 tools를 지원하지 않음 — 기억해 두고 이번 반복부터 텍스트 형식으로 다시 요청
+                        print(f"[ReAct] {self.model_name} does not support tools — falling back to text mode")
+                        _NATIVE_UNSUPPORTED.add(self.model_name)
+                        native = False
+                        messages[0] = {"role": "system", "content": self._system_prompt(False, persona_prompt)}
+                        window.overhead_tokens = 0
+                if not native or force_final:
+                    async for event in self._astream_text(messages, turn, num_ctx):
+                        yield event
+                mode = "native" if native else "text"
+                output, native_calls = turn["content"], turn.get("tool_calls", [])
+                iteration_span.set(mode=mode)
             
-            # 대화 기록에 추가 (Assistant의 응답)
-            messages.append({"role": "assistant", "content": output})
-
-            # 2. Final Answer 확인
-            if "Final Answer:" in output:
-                final_answer = output.split("Final Answer:")[-1].strip()
-                # Phase 3: 대화 내용을 장기 기억에 저장
-                if self.memory:
-                    self.memory.save(
-                        f"[Task] {task}\n[Answer] {final_answer}",
-                        metadata={"type": "task", "timestamp": datetime.now().isoformat()}
-                    )
-                return final_answer
-
-            # 3. Action 파싱
-            action, action_input = self._parse_action(output)
+                try:
+                    print(f"[ReAct] LLM Output:\n{output}\n".encode('utf-8', 'replace').decode('utf-8'))
+                except:
+                    pass
             
-            if action:
-                # 4. 도구 실행
-                if action in self.tools:
+                # 대화 기록에 추가 (Assistant의 응답)
+                assistant_message = {"role": "assistant", "content": output}
+                if native_calls:
+                    assistant_message["tool_calls"] = [
+                        {"function": {"name": action, "arguments": action_input}} for action, action_input in native_calls
+                    ]
+                messages.append(assistant_message)
+
+                # 2. Action 파싱 — 네이티브는 구조화된 tool_calls, 없으면 텍스트 형식
+                #    (네이티브 모드에서도 모델이 Action: 텍스트를 쓰는 경우가 있어 함께 확인)
+                calls = native_calls
+                if not calls and "Final Answer:" not in output and not force_final:
+                    calls = self._parse_calls(output)
+
+                # 3. Final Answer 확인 — 네이티브 모드는 도구 호출 없는 응답 자체가 최종 답변
+                final_answer = None
+                if not calls:
+                    if "Final Answer:" in output:
+                        final_answer = output.split("Final Answer:")[-1].strip()
+                    elif native and output.strip():
+                        final_answer = output.strip()
+                if force_final and final_answer is None:
+                    # 형식을 무시했어도 더 진행하지 않음 — 형식 줄을 걷어낸 나머지를 답변으로
+                    final_answer = _FORMAT_LINE.sub("", output).strip() or "같은 도구 호출이 반복되어 작업을 중단했습니다."
+                record_react_iteration(self.model_name, mode, format_failure=not calls and final_answer is None)
+
+                if final_answer is not None:
+                    iteration_span.set(final_answer=True)
+                    self._finish_task(iteration + 1, "forced_final" if force_final else "final", repeats)
+                    # Phase 3: 대화 내용을 장기 기억에 저장
+                    if self.memory:
+                        await self.memory.asave(
+                            f"[Task] {task}\n[Answer] {final_answer}",
+                            metadata={"type": "task", "timestamp": datetime.now().isoformat()}
+                        )
+                    yield {"type": "done", "content": final_answer}
+                    return
+
+                if calls:
+                    iteration_span.set(action=",".join(action for action, _ in calls))
+                    for action, action_input in calls:
+                        yield {"type": "action", "tool": action, "input": action_input}
+                    # 4. 도구 실행 — 이미 실행한 읽기 도구 (도구, 입력)은 재실행 없이 이전 결과 + 교정 힌트
+                    #    새 호출이 여러 개면 동시에 실행하고 번호를 붙여 하나의 Observation으로 합침
+                    keys = [
+                        _call_key(action, _normalize_input(action_input)) if action in TOOL_CACHE_POLICIES else None
+                        for action, action_input in calls
+                    ]
+                    results = [None] * len(calls)
+                    fresh = []
+                    for i, ((action, _), key) in enumerate(zip(calls, keys)):
+                        if key is not None and key in seen_calls:
+                            repeats += 1
+                            record_react_repeat(self.model_name, action)
+                            print(f"[ReAct] Repeated call suppressed: {action} (repeats: {repeats})")
+                            results[i] = f"{seen_calls[key]}\n\n{REPEAT_HINT.format(action=action)}"
+                        else:
+                            fresh.append(i)
+                    if len(fresh) == 1:
+                        results[fresh[0]] = await self._call_tool(*calls[fresh[0]], prefetched=prefetched)
+                    elif fresh:
+                        ran = await self._call_tools_parallel([calls[i] for i in fresh], prefetched)
+                        for i, result in zip(fresh, ran):
+                            results[i] = result
+                    if any(keys[i] is None for i in fresh):
+                        seen_calls.clear()
+                    else:
+                        for i in fresh:
+                            seen_calls.setdefault(keys[i], results[i])
+                    iteration_span.set(repeated_calls=len(calls) - len(fresh))
+
+                    if len(calls) == 1:
+                        observation = results[0]
+                    else:
+                        observation = "\n\n".join(
+                            f"[{i}] {action}: {result}" for i, ((action, _), result) in enumerate(zip(calls, results), start=1)
+                        )
+                
                     try:
-                        print(f"[ReAct] Executing Tool: {action} with input {action_input}".encode('utf-8', 'replace').decode('utf-8'))
+                        print(f"[ReAct] Observation: {observation[:200]}..." if len(observation) > 200 else f"[ReAct] Observation: {observation}".encode('utf-8', 'replace').decode('utf-8'))
                     except:
                         pass
-                    try:
-                        observation = self.tools[action](action_input)
-                    except Exception as e:
-                        observation = f"Tool execution error: {e}"
+                    yield {"type": "observation", "content": observation}
+                    # 다음 단계가 예측 가능하면(검색 → 상위 URL 수집) 모델이 Thought를 쓰는 동안 미리 실행
+                    if self.prefetch:
+                        for i in fresh:
+                            self._start_prefetch(calls[i][0], results[i], prefetched)
+
+                    # 5. 도구 결과를 메시지에 추가 (Self-Correction 유도) — 대화에는 예산 안으로 자른 결과만
+                    #    네이티브: 호출마다 tool 메시지 / 텍스트: Observation을 User 역할로
+                    clipped = [window.clip_observation(result, share=len(calls)) for result in results]
+                    if native_calls:
+                        for (action, _), result in zip(calls, clipped):
+                            messages.append({"role": "tool", "content": result, "tool_name": action})
+                    else:
+                        if len(calls) > 1:
+                            observation = "\n\n".join(
+                                f"[{i}] {action}: {result}" for i, ((action, _), result) in enumerate(zip(calls, clipped), start=1)
+                            )
+                        else:
+                            observation = clipped[0]
+                        obs_message = f"Observation: {observation}"
+                        messages.append({"role": "user", "content": obs_message})
+
+                    # 반복이 한도에 도달 — 다음 반복은 도구 없이 최종 답변만 요청
+                    if repeats >= REACT_LOOP_MAX_REPEATS:
+                        force_final = True
+                        messages.append({"role": "user", "content": FORCE_FINAL_PROMPT})
                 else:
-                    observation = f"Error: Tool '{action}' not found. Available tools: {list(self.tools.keys())}"
-                
-                try:
-                    print(f"[ReAct] Observation: {observation[:200]}..." if len(observation) > 200 else f"[ReAct] Observation: {observation}".encode('utf-8', 'replace').decode('utf-8'))
-                except:
-                    pass
+                    # Action을 찾지 못했지만 Final Answer도 없는 경우
+                    # (LLM이 형식에 맞지 않는 말을 했거나, 네이티브 모드에서 빈 응답)
+                    if iteration == MAX_ITERATIONS - 1:
+                        break
+                    # 계속 진행하도록 유도
+                    if native:
+                        messages.append({"role": "user", "content": "도구를 호출하거나 한국어로 최종 답변을 작성하세요."})
+                    else:
+                        messages.append({"role": "user", "content": "Observation: 형식을 지켜주세요. 반드시 한국어로만 응답하세요. Action과 Action Input을 명시하거나 Final Answer를 작성하세요. 중국어/영어 혼용 금지."})
+
+        self._finish_task(MAX_ITERATIONS, "max_iterations", repeats)
+        yield {"type": "done", "content": "최대 반복 횟수에 도달했습니다. 작업을 완료하지 못했을 수 있습니다."}
+
+    def _finish_task(self, iterations: int, outcome: str, repeats: int):
+        """작업 1건의 LLM 호출 수 기록 — outcome: final | forced_final(반복 한도) | max_iterations"""
+        record_react_task(self.model_name, outcome, iterations)
+        try:
+            print(f"[ReAct] Finished: {outcome} after {iterations} iterations (repeated calls: {repeats})")
+        except:
+            pass
 
-                # 5. Observation을 User 역할로 메시지에 추가 (Self-Correction 유도)
-                obs_message = f"Observation: {observation}"
-                messages.append({"role": "user", "content": obs_message})
-            else:
-                # Action을 찾지 못했지만 Final Answer도 없는 경우
-                # (LLM이 형식에 맞지 않는 말을 했을 때)
-                if iteration == MAX_ITERATIONS - 1:
+    def _system_prompt(self, native: bool, persona_prompt: str) -> str:
+        prefix = self.native_prompt if native else self.react_prompt
+        return prefix + "\n\n" + persona_prompt if persona_prompt else prefix
+
+    async def _astream_text(self, messages: list, turn: dict, num_ctx: int) -> AsyncIterator[dict]:
+        """텍스트 모드 LLM 호출 — thought / final 프레임을 yield 하고 turn["content"]에 원문 저장"""
+        # stop=["Observation:"] — LLM이 도구 결과를 스스로 만들어내는 환각 방지
+        # 서버 측 stop 외에 StreamSplitter가 청크 단위로도 감지하여 즉시 스트림을 닫음
+        splitter = StreamSplitter()
+        stream = await llm.achat(
+            model=self.model_name,
+            site="react",
+            messages=messages,
+            options={
+                "stop": ["Observation:"],
+                "temperature": 0.1,   # 낮을수록 지시 준수율 높아짐 (언어 혼입 방지)
+                "num_ctx": num_ctx,
+            },
+            stream=True,
+        )
+        try:
+            async for chunk in stream:
+                for event in splitter.feed(chunk["message"]["content"]):
+                    yield event
+                if splitter.stopped:
                     break
-                # 계속 진행하도록 유도
-                messages.append({"role": "user", "content": "Observation: 형식을 지켜주세요. 반드시 한국어로만 응답하세요. Action과 Action Input을 명시하거나 Final Answer를 작성하세요. 중국어/영어 혼용 금지."})
-
-        return "최대 반복 횟수에 도달했습니다. 작업을 완료하지 못했을 수 있습니다."
+                # Action Input JSON이 완성되면 남은 생성(개행, "Observation:" 정지 시퀀스 등)을 기다리지 않고
+                # 스트림을 닫아 생성을 중단하고 바로 도구를 실행
+                if self.early_action and self._action_complete(splitter.text):
+                    break
+        finally:
+            if hasattr(stream, "aclose"):
+                await stream.aclose()
+        for event in splitter.close():
+            yield event
+        turn["content"] = splitter.text
+
+    async def _astream_native(self, messages: list, turn: dict, num_ctx: int) -> AsyncIterator[dict]:
+        """
+        네이티브 모드 LLM 호출 (tools=도구 스키마) — 본문은 final 델타로 yield,
+        turn["content"] / turn["tool_calls"]=[(name, arguments)] 저장. 모델이 tools를 지원하지 않으면 turn["unsupported"]=True
+        """
+        try:
+            stream = await llm.achat(
+                model=self.model_name,
+                site="react",
+                messages=messages,
+                tools=self.tool_definitions,
+                options={"temperature": 0.1, "num_ctx": num_ctx},
+                stream=True,
+            )
+        except Exception as e:
+            if _tools_unsupported(e):
+                turn["unsupported"] = True
+                return
+            raise
+        content, tool_calls = "", []
+        try:
+            async for chunk in stream:
+                message = chunk["message"]
+                delta = message.get("content") or ""
+                if delta:
+                    content += delta
+                    yield {"type": "final", "delta": delta}
+                for call in message.get("tool_calls") or []:
+                    function = call["function"]
+                    tool_calls.append((function["name"], _tool_arguments(function.get("arguments"))))
+        except Exception as e:
+            # 스트리밍 응답 도중에 tools 미지원 오류가 오는 서버 버전 대비
+            if not content and not tool_calls and _tools_unsupported(e):
+                turn["unsupported"] = True
+                return
+            raise
+        finally:
+            if hasattr(stream, "aclose"):
+                await stream.aclose()
+        turn["content"], turn["tool_calls"] = content, tool_calls
+
+    async def _call_tool(self, action: str, action_input: dict, prefetched: dict = None) -> str:
+        """도구 1개 실행 — 도구별 동시 실행 상한(TOOL_CONCURRENCY_LIMITS)을 지키며, 오류는 Observation 문자열로 반환"""
+        if action not in self.tools:
+            return f"Error: Tool '{action}' not found. Available tools: {list(self.tools.keys())}"
+        pending = prefetched.pop(_call_key(action, action_input), None) if prefetched else None
+        if pending is not None:
+            # 선읽기가 맞은 경우 — 이미 끝났으면 바로, 진행 중이면 그 결과를 기다림 (같은 요청을 두 번 보내지 않음)
+            with span("tool.call", tool=action, prefetched=True) as tool_span:
+                observation = await pending
+                tool_span.set(observation_chars=len(observation))
+            return observation
+        try:
+            print(f"[ReAct] Executing Tool: {action} with input {action_input}".encode('utf-8', 'replace').decode('utf-8'))
+        except:
+            pass
+        tool, limit = self.tools[action], self._tool_limits[action]
+        with span("tool.call", tool=action) as tool_span:
+            try:
+                if inspect.iscoroutinefunction(tool):
+                    await self._acquire(limit)
+                    try:
+                        observation = await tool(action_input)
+                    finally:
+                        limit.release()
+                else:
+                    # 도구는 동기 함수 — 이벤트 루프를 막지 않도록 스레드에서 실행 (상한 대기도 스레드에서)
+                    observation = await asyncio.to_thread(self._run_limited, tool, limit, action_input)
+                observation = str(observation)
+            except Exception as e:
+                observation = f"Tool execution error: {e}"
+                tool_span.set(error=str(e))
+            tool_span.set(observation_chars=len(observation))
+        return observation
+
+    @staticmethod
+    async def _acquire(limit: threading.BoundedSemaphore):
+        """
+        코루틴 도구용 상한 획득 (대기는 스레드에서). 기다리는 중에 취소돼도(선읽기 취소 등) 스레드의 acquire는
+        끝까지 진행되므로, 그 경우 획득되는 즉시 반납해 자리가 새지 않게 함
+        """
+        acquiring = asyncio.ensure_future(asyncio.to_thread(limit.acquire))
+        try:
+            await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            acquiring.add_done_callback(
+                lambda future: None if future.cancelled() or future.exception() else limit.release()
+            )
+            raise
+
+    @staticmethod
+    def _run_limited(tool, limit: threading.BoundedSemaphore, action_input: dict):
+        with limit:
+            return tool(action_input)
+
+    async def _call_tools_parallel(self, calls: list[tuple[str, dict]], prefetched: dict = None) -> list[str]:
+        """독립적인 도구 호출들을 동시에 실행 (전체 동시 실행 수는 REACT_MAX_PARALLEL), 결과는 입력 순서대로"""
+        gate = asyncio.Semaphore(REACT_MAX_PARALLEL)
+
+        async def run(action: str, action_input: dict) -> str:
+            async with gate:
+                return await self._call_tool(action, action_input, prefetched=prefetched)
+
+        with span("tool.batch", size=len(calls)):
+            return await asyncio.gather(*(run(action, action_input) for action, action_input in calls))
+
+    def _start_prefetch(self, action: str, observation: str, prefetched: dict):
+        predictor = PREFETCH_PREDICTORS.get(action)
+        if predictor is None or observation.startswith(("ERROR", "Tool execution error")):
+            return
+        for tool, tool_input in predictor(observation):
+            key = _call_key(tool, tool_input)
+            if tool in self.tools and key not in prefetched:
+                print(f"[ReAct] Prefetching: {tool} {tool_input}")
+                prefetched[key] = asyncio.create_task(self._prefetch_tool(tool, tool_input))
+
+    async def _prefetch_tool(self, tool: str, tool_input: dict) -> str:
+        with span("tool.prefetch", tool=tool):
+            return await self._call_tool(tool, tool_input)
+
+    def _action_complete(self, text: str) -> bool:
+        """스트리밍 중인 텍스트에 실행 가능한 Action이 완성됐는지 (Final Answer가 있으면 끝까지 받음)"""
+        if _FINAL_MARKER in text:
+            return False
+        if self.parallel_actions and _ACTIONS_MARKER in text:
+            return bool(self._parse_actions(text))
+        found = re.search(r"Action Input:\s*\{", text)
+        if not found:
+            return False
+        try:
+            json.JSONDecoder().raw_decode(text, found.end() - 1)
+        except json.JSONDecodeError:
+            return False
+        return True
+
+    def _parse_calls(self, text: str) -> list[tuple[str, dict]]:
+        """텍스트 형식의 도구 호출 — 병렬 모드면 "Actions: [...]" 배열을 먼저 확인"""
+        calls = self._parse_actions(text) if self.parallel_actions else []
+        if not calls:
+            action, action_input = self._parse_action(text)
+            calls = [(action, action_input)] if action else []
+        return calls
+
+    def _parse_actions(self, text: str) -> list[tuple[str, dict]]:
+        """병렬 모드의 'Actions: [{"tool": ..., "input": {...}}, ...]' 파싱 — 형식이 틀리면 빈 리스트"""
+        found = re.search(r"Actions:\s*(\[)", text)
+        if not found:
+            return []
+        try:
+            batch, _ = json.JSONDecoder().raw_decode(text, found.start(1))
+        except json.JSONDecodeError:
+            return []
+        calls = []
+        for item in batch if isinstance(batch, list) else []:
+            if isinstance(item, dict) and isinstance(item.get("tool"), str):
+                tool_input = item.get("input")
+                calls.append((item["tool"].strip(), tool_input if isinstance(tool_input, dict) else {}))
+        return calls
 
     def _parse_action(self, text: str) -> tuple:
         """
@@ -1,12 +1,18 @@
-from typing import Dict, Any, Optional
-from actor import AgentActor, AgentMessage
+import asyncio
+from typing import Dict, Any, List, Optional
+from actor import AgentActor, AgentMessage, ensure_outside_loop
+import llm
+from tracing import span
 
 class AgentRegistry:
     """
     모든 에이전트를 관리하고 메시지를 중계하는 중앙 허브 (Message Bus)
+    - 메시지를 수신자 mailbox로 라우팅하고, 처리 결과를 송신자의 응답 future로 돌려줌 (실행은 각 에이전트 worker)
     """
-    def __init__(self):
+    def __init__(self, cache=None):
         self._agents: Dict[str, AgentActor] = {}
+        self.cache = cache   # SocietyResultCache — 있으면 같은 하위 작업의 이전 결과를 재사용
+        self._pending: Dict[str, asyncio.Future] = {}   # message_id → 송신자가 기다리는 응답 future
 
     def register(self, agent: AgentActor):
         """에이전트를 레지스트리에 등록"""
@@ -20,15 +26,89 @@ class AgentRegistry:
     def get_agent(self, name: str) -> Optional[AgentActor]:
         return self._agents.get(name)
 
+    def find(self, role: str) -> List[str]:
+        """역할 이름으로 등록된 에이전트 이름 목록 — "Researcher", "Researcher-2", ... 처럼 같은 역할의 풀(pool)"""
+        return [name for name in self._agents if name == role or name.startswith(f"{role}-")]
+
     def dispatch(self, message: AgentMessage) -> Any:
-        """메시지를 수신자에게 전달하고, 처리 결과(있는 경우)를 반환"""
+        """메시지를 보내고 처리 결과까지 기다리는 동기 래퍼 (이벤트 루프 밖에서 사용)"""
         recipient = self._agents.get(message.recipient)
-        
+        ensure_outside_loop(recipient._loop if recipient else None)
+
+        async def _send():
+            return await (await self.adispatch(message))
+        return llm.run_sync(_send())
+
+    async def adispatch(self, message: AgentMessage) -> asyncio.Future:
+        """
+        라우팅만 수행 — 메시지를 수신자 mailbox에 넣고 응답 future를 반환.
+        처리는 수신자의 worker task가 하며, 끝나면 resolve() / reject()로 future를 완료합니다.
+        """
+        recipient = self._agents.get(message.recipient)
+        owner = recipient.owner_loop() if recipient else None
+        if owner is not None:
+            # 수신자가 다른 루프(웹 서버 등)에서 실행 중 — 그 루프에서 라우팅·처리하고 결과만 이 루프의 future로 받음
+            async def _remote():
+                return await (await self.adispatch(message))
+            return asyncio.wrap_future(asyncio.run_coroutine_threadsafe(_remote(), owner))
+        reply = asyncio.get_running_loop().create_future()
+
         print(f" >>> [MSG] {message.sender} -> {message.recipient} ({message.msg_type})")
 
         if not recipient:
             print(f"ERROR: Recipient '{message.recipient}' not found.")
-            return None
+            reply.set_result(None)
+            return reply
+
+        with span("registry.dispatch", sender=message.sender, recipient=message.recipient,
+                  msg_type=message.msg_type, context_id=message.context_id) as dispatch_span:
+            key = self.cache.key_for(message) if self.cache else None
+            embedding = None
+            if key is not None:
+                status, value, embedding = await self.cache.alookup(key)
+                dispatch_span.set(cache=status)
+                if status == "inflight":
+                    print(f" <<< [CACHE] {message.recipient}: same request in flight, waiting for it")
+                    return value
+                if status != "miss":
+                    print(f" <<< [CACHE] {message.recipient}: reused result ({status})")
+                    reply.set_result(value)
+                    return reply
+
+            self._pending[message.message_id] = reply
+            try:
+                await recipient.deliver(message)
+            except BaseException:
+                self._pending.pop(message.message_id, None)
+                raise
+            if key is not None:
+                self.cache.track(key, reply, embedding)
+        return reply
+
+    def resolve(self, message: AgentMessage, result: Any):
+        """수신자가 처리를 마침 — 송신자가 기다리는 응답 future에 결과 전달"""
+        reply = self._pending.pop(message.message_id, None)
+        if reply is not None and not reply.done():
+            reply.set_result(result)
+
+    def reject(self, message: AgentMessage, error: BaseException):
+        reply = self._pending.pop(message.message_id, None)
+        if reply is not None and not reply.done():
+            reply.set_exception(error)
+
+    # ── 런타임 관리 ──────────────────────────────────────────────────────────
+
+    async def astart(self):
+        """모든 에이전트의 mailbox·worker를 현재 이벤트 루프에서 시작 (생략하면 첫 메시지 때 시작)"""
+        for agent in self._agents.values():
+            agent.start()
+
+    async def astop(self):
+        await asyncio.gather(*(agent.astop() for agent in self._agents.values()))
 
-        # 동기식 호출: 수신자의 처리 결과를 반환
-        return recipient.receive_message(message)
+    def stats(self) -> dict:
+        """에이전트별 mailbox 길이·동시 처리 수·처리/실패/재시작 수"""
+        return {
+            "pending_replies": len(self._pending),
+            "agents": {name: agent.stats() for name, agent in self._agents.items()},
+        }
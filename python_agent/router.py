@@ -1,6 +1,31 @@
-import ollama
-import json
-from config import MODEL_NAME
+"""
+router.py — 의도 분류 (3단계 분류기)
+
+역할:
+- 1단계: 컴파일된 정규식 규칙 (경로, URL, "매일 9시에 …해줘" 같은 주기+시각+요청, "보고서 써줘" 등 명백한 경우)
+- 2단계: CLASSIFIER_PROMPT 예시 문장 임베딩의 카테고리 중심(centroid)과 코사인 유사도 비교
+- 3단계: 위 단계의 확신도가 낮을 때만 LLM 분류 호출
+- 규칙 단계 이후 결과 캐시 조회 (정규화된 입력 LRU+TTL, 임베딩 근사 적중 옵션)
+- 단계별 적중 수 / 지연 시간 통계 제공 (get_router_stats)
+
+aclassify_intent 가 본 구현이며, classify_intent 는 CLI용 동기 래퍼입니다.
+"""
+import hashlib
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict, deque
+
+import config
+import llm
+from embed_cache import embedding_cache
+from tracing import span
+from config import (
+    EMBED_MODEL, ROUTER_EMBED_THRESHOLD, ROUTER_EMBED_MARGIN, ROUTER_EMBED_RETRY_SECONDS,
+    INTENT_CACHE_SIZE, INTENT_CACHE_TTL, INTENT_CACHE_SIMILARITY,
+)
 
 CLASSIFIER_PROMPT = """You are a routing classifier. Read the user input and return exactly ONE category word.
 
@@ -41,31 +66,368 @@ EXAMPLES:
 User input: {user_input}
 Category:"""
 
-def classify_intent(user_input: str) -> str:
+VALID_CATEGORIES = {"CHAT", "FILE", "WEB", "TASK", "PERSONA", "VISION", "VOICE", "SCHEDULE", "SOCIETY"}
+
+
+# ─── 1단계: 규칙 기반 분류 ───────────────────────────────────────────────────
+
+# 반복 주기 단어만으로는 판단하지 않음 ("매일 운동하는 게 좋아?", "스케줄 관리 팁 알려줘")
+# — 주기 + 시각 + 요청 동사가 함께 있을 때만 SCHEDULE ("매일 오전 9시에 뉴스 요약해줘")
+_RE_RECURRENCE = re.compile(
+    r"(매일|매주|매월|매달|매시간|평일마다|주말마다|\d+\s*(분|시간)\s*마다|스케줄|cron|크론)",
+    re.IGNORECASE,
+)
+_RE_TIME = re.compile(
+    r"(\d+\s*시|\d{1,2}:\d{2}|오전|오후|아침|점심|저녁|밤|새벽|정오|자정|[월화수목금토일]요일|\d+\s*(분|시간)\s*마다)"
+)
+_RE_REQUEST = re.compile(r"(줘|주세요|줄래|주라|하도록|해\s*[.!]?\s*$)")
+# 보고서·리포트 언급만으로는 Society를 띄우지 않음 ("보고서 작성 요령 알려줘")
+# — 작성 동사와 함께일 때만 ("AI 트렌드 심층 분석 보고서 써줘", "반도체 시장 심층 분석해줘")
+_RE_SOCIETY = re.compile(
+    r"((보고서|리포트)[^.?!\n]*?(써|작성해|만들어)\s*(줘|주세요|줄래)"
+    r"|심층\s*(분석|조사|연구)\s*(을|를)?\s*(좀\s*)?해\s*(줘|주세요|줄래))"
+)
+_RE_URL = re.compile(r"(https?://\S+|www\.\S+)", re.IGNORECASE)
+_RE_IMAGE = re.compile(r"\S+\.(png|jpe?g|gif|bmp|webp)\b", re.IGNORECASE)
+_RE_PATH = re.compile(
+    r"([A-Za-z]:[\\/]|~[\\/]|\.{1,2}[\\/]|(^|\s)/[\w.-]+/|"
+    r"\b[\w-]+\.(txt|md|pdf|csv|json|py|docx?|xlsx?|pptx?|log|ya?ml|hwp)\b)",
+    re.IGNORECASE,
+)
+_RE_SAVE = re.compile(r"(저장|파일로|기록해)")
+
+
+def _rule_classify(user_input: str) -> str | None:
+    """명백한 패턴만 즉시 분류합니다. 확신할 수 없으면 None."""
+    if _RE_RECURRENCE.search(user_input) and _RE_TIME.search(user_input) and _RE_REQUEST.search(user_input):
+        return "SCHEDULE"
+    if _RE_IMAGE.search(user_input):
+        return "VISION"
+
+    has_url = bool(_RE_URL.search(user_input))
+    has_path = bool(_RE_PATH.search(_RE_URL.sub(" ", user_input)))  # "https:/" 를 드라이브 경로로 오인 방지
+    if _RE_SOCIETY.search(user_input):
+        # "보고서 써서 report.md로 저장" 처럼 경로/URL이 섞이면 애매하므로 다음 단계로 넘김
+        return None if (has_url or has_path) else "SOCIETY"
+    if has_url and (has_path or _RE_SAVE.search(user_input)):
+        return "TASK"   # 웹 + 파일 = 복합 작업
+    if has_url:
+        return "WEB"
+    if has_path:
+        return "FILE"
+    return None
+
+
+# ─── 2단계: 임베딩 최근접 중심 분류 ──────────────────────────────────────────
+
+_RE_EXAMPLE = re.compile(r'^"(.+)"\s*→\s*([A-Z]+)\s*$', re.MULTILINE)
+
+_centroids: dict[str, list[float]] | None = None
+_centroid_lock = threading.Lock()
+_embedding_failed_at: float | None = None   # 중심 계산이 마지막으로 실패한 시각 (monotonic)
+
+
+async def _embed(text: str) -> list[float]:
+    """기억 모듈과 같은 임베딩 캐시를 공유 — 분류에 쓴 입력 벡터를 recall()이 재사용"""
+    cached = embedding_cache.get(EMBED_MODEL, text)
+    if cached is not None:
+        return cached
+    embedding = (await llm.aembeddings(model=EMBED_MODEL, prompt=text, site="router.embed"))["embedding"]
+    embedding_cache.put(EMBED_MODEL, text, embedding)
+    return embedding
+
+
+def _normalize(vec: list[float]) -> list[float]:
+    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+    return [v / norm for v in vec]
+
+
+async def _build_centroids() -> dict[str, list[float]]:
+    """CLASSIFIER_PROMPT의 예시 문장을 카테고리별로 임베딩해 정규화된 평균 벡터를 만듭니다."""
+    grouped: dict[str, list[list[float]]] = {}
+    for text, category in _RE_EXAMPLE.findall(CLASSIFIER_PROMPT):
+        if category in VALID_CATEGORIES:
+            grouped.setdefault(category, []).append(_normalize(await _embed(text)))
+
+    centroids = {}
+    for category, vectors in grouped.items():
+        mean = [sum(col) / len(vectors) for col in zip(*vectors)]
+        centroids[category] = _normalize(mean)
+    return centroids
+
+
+def _embedding_cooling_down() -> bool:
+    return _embedding_failed_at is not None and time.monotonic() - _embedding_failed_at < ROUTER_EMBED_RETRY_SECONDS
+
+
+async def _get_centroids() -> dict[str, list[float]] | None:
     """
-    사용자의 입력을 분석하여 의도(Category)를 반환합니다.
+    중심 벡터를 한 번만 계산합니다. 임베딩 서버 오류 시 ROUTER_EMBED_RETRY_SECONDS 동안 2단계를 건너뛰고 그 뒤 다시 시도합니다.
+    (서로 다른 이벤트 루프에서 호출될 수 있어 잠금 없이 계산 — 시작 직후 중복 계산은 무해)
     """
+    global _centroids, _embedding_failed_at
+    if _centroids is not None or _embedding_cooling_down():
+        return _centroids
     try:
-        response = ollama.generate(
-            model=MODEL_NAME,
-            prompt=CLASSIFIER_PROMPT.format(user_input=user_input),
-            options={
-                "temperature": 0.0,  # 결정적인(deterministic) 결과를 위해 0 설정
-                "num_predict": 10    # 짧은 단어 하나만 나오도록 제한
+        centroids = await _build_centroids()
+    except Exception as e:
+        _embedding_failed_at = time.monotonic()
+        print(f"[Router] Embedding tier unavailable, retrying in {ROUTER_EMBED_RETRY_SECONDS}s: {e}")
+        return None
+    _embedding_failed_at = None
+    with _centroid_lock:
+        if _centroids is None:
+            _centroids = centroids
+            print(f"[Router] Embedding centroids ready: {sorted(_centroids)}")
+    return _centroids
+
+
+async def _embedding_classify(user_input: str) -> tuple[str | None, float, float, list[float] | None]:
+    """(카테고리 또는 None, 최고 유사도, 1·2위 차이, 정규화된 입력 벡터)를 반환합니다."""
+    centroids = await _get_centroids()
+    if not centroids:
+        return None, 0.0, 0.0, None
+
+    query = _normalize(await _embed(user_input))
+    scores = sorted(
+        ((sum(q * c for q, c in zip(query, centroid)), category) for category, centroid in centroids.items()),
+        reverse=True,
+    )
+    best_score, best = scores[0]
+    margin = best_score - scores[1][0] if len(scores) > 1 else best_score
+
+    if best_score >= ROUTER_EMBED_THRESHOLD and margin >= ROUTER_EMBED_MARGIN:
+        return best, best_score, margin, query
+    return None, best_score, margin, query
+
+
+# ─── 결과 캐시 ───────────────────────────────────────────────────────────────
+
+_RE_SPACES = re.compile(r"\s+")
+
+
+def normalize_input(text: str) -> str:
+    """대소문자·전각/반각·구두점·공백 차이를 접어 캐시 키로 사용할 형태로 변환합니다."""
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = "".join(" " if unicodedata.category(ch)[0] in "PS" else ch for ch in text)
+    return _RE_SPACES.sub(" ", text).strip()
+
+
+def _classifier_fingerprint() -> str:
+    """모델명 또는 분류 프롬프트가 바뀌면 달라지는 값 — 캐시 무효화 기준."""
+    raw = f"{config.MODEL_NAME}\0{EMBED_MODEL}\0{CLASSIFIER_PROMPT}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class IntentCache:
+    """
+    정규화된 입력 → 카테고리 캐시 (LRU + TTL).
+    임베딩이 주어지면 코사인 유사도가 similarity 이상인 항목도 적중으로 취급합니다.
+    """
+
+    def __init__(self, max_size: int = INTENT_CACHE_SIZE, ttl_sec: float = INTENT_CACHE_TTL,
+                 similarity: float | None = INTENT_CACHE_SIMILARITY):
+        self.max_size = max_size
+        self.ttl_sec = ttl_sec
+        self.similarity = similarity
+        # key → (category, 만료 시각, 정규화된 임베딩 또는 None)
+        self._entries: OrderedDict[str, tuple[str, float, list[float] | None]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._fingerprint = _classifier_fingerprint()
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _check_fingerprint(self):
+        fingerprint = _classifier_fingerprint()
+        if fingerprint != self._fingerprint:
+            self._entries.clear()
+            self._fingerprint = fingerprint
+            self.invalidations += 1
+            print("[Router] Classifier changed — intent cache cleared.")
+
+    def get(self, text: str) -> str | None:
+        key = normalize_input(text)
+        now = time.monotonic()
+        with self._lock:
+            self._check_fingerprint()
+            entry = self._entries.get(key)
+            if entry and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def get_similar(self, embedding: list[float]) -> str | None:
+        """정규화된 임베딩과 가장 가까운 유효 항목을 찾습니다 (similarity 미설정 시 None)."""
+        if self.similarity is None:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            best_key, best_score = None, self.similarity
+            for key, (_, expires, vec) in self._entries.items():
+                if vec is None or expires <= now:
+                    continue
+                score = sum(a * b for a, b in zip(embedding, vec))
+                if score >= best_score:
+                    best_key, best_score = key, score
+            if best_key is None:
+                return None
+            self._entries.move_to_end(best_key)
+            self.similar_hits += 1
+            return self._entries[best_key][0]
+
+    def put(self, text: str, category: str, embedding: list[float] | None = None):
+        key = normalize_input(text)
+        with self._lock:
+            self._check_fingerprint()
+            self._entries[key] = (category, time.monotonic() + self.ttl_sec, embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_sec": self.ttl_sec,
+                "hits": self.hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+# web_ui(REST/WebSocket)와 CLI가 같은 프로세스에서 공유하는 캐시
+intent_cache = IntentCache()
+
+
+# ─── 3단계: LLM 분류 ─────────────────────────────────────────────────────────
+
+async def _llm_classify(user_input: str) -> str:
+    response = await llm.agenerate(
+        model=config.MODEL_NAME,
+        site="router",
+        prompt=CLASSIFIER_PROMPT.format(user_input=user_input),
+        options={
+            "temperature": 0.0,  # 결정적인(deterministic) 결과를 위해 0 설정
+            "num_predict": 10    # 짧은 단어 하나만 나오도록 제한
+        }
+    )
+    category = response['response'].strip().upper()
+
+    # 때때로 LLM이 설명과 함께 답할 수 있으므로, 키워드 포함 여부로 보정
+    for valid in VALID_CATEGORIES:
+        if valid in category:
+            return valid
+
+    return "CHAT"  # 기본값
+
+
+# ─── 통계 ────────────────────────────────────────────────────────────────────
+
+_TIERS = ("rule", "cache", "embedding", "llm")
+_stats_lock = threading.Lock()
+_stats = {tier: {"attempts": 0, "hits": 0, "total_ms": 0.0} for tier in _TIERS}
+_recent_embedding_scores: deque = deque(maxlen=200)   # 임계값 튜닝용 최근 점수
+
+
+def _record(tier: str, hit: bool, elapsed_ms: float):
+    with _stats_lock:
+        entry = _stats[tier]
+        entry["attempts"] += 1
+        entry["hits"] += int(hit)
+        entry["total_ms"] += elapsed_ms
+
+
+def get_router_stats() -> dict:
+    """단계별 시도/적중 수, 평균 지연(ms), 최근 임베딩 점수 분포를 반환합니다."""
+    with _stats_lock:
+        tiers = {
+            tier: {
+                "attempts": s["attempts"],
+                "hits": s["hits"],
+                "avg_ms": round(s["total_ms"] / s["attempts"], 2) if s["attempts"] else 0.0,
             }
-        )
-        category = response['response'].strip().upper()
+            for tier, s in _stats.items()
+        }
+        recent = list(_recent_embedding_scores)
+    return {
+        "tiers": tiers,
+        "embedding_threshold": ROUTER_EMBED_THRESHOLD,
+        "embedding_margin": ROUTER_EMBED_MARGIN,
+        "embedding_enabled": _centroids is not None or not _embedding_cooling_down(),
+        "recent_embedding_scores": recent,
+        "cache": intent_cache.stats(),
+    }
+
 
-        # 유효한 카테고리인지 1차 검증 (필수는 아니지만 안전장치)
-        valid_categories = {"CHAT", "FILE", "WEB", "TASK", "PERSONA", "VISION", "VOICE", "SCHEDULE", "SOCIETY"}
+# ─── 진입점 ──────────────────────────────────────────────────────────────────
 
-        # 때때로 LLM이 설명과 함께 답할 수 있으므로, 키워드 포함 여부로 보정
-        for valid in valid_categories:
-            if valid in category:
-                return valid
+async def aclassify_intent(user_input: str) -> str:
+    """
+    사용자의 입력을 분석하여 의도(Category)를 반환합니다.
+    규칙 → 캐시 → 임베딩 → LLM 순서로 시도하며, 앞 단계가 확신하면 뒤 단계는 호출하지 않습니다.
+    """
+    with span("router.classify_intent") as s:
+        category, tier = await _classify(user_input)
+        s.set(intent=category, tier=tier)
+        return category
 
-        return "CHAT"  # 기본값
 
+async def _classify(user_input: str) -> tuple[str, str]:
+    """(의도, 결정한 단계) 반환"""
+    start = time.perf_counter()
+    category = _rule_classify(user_input)
+    _record("rule", category is not None, (time.perf_counter() - start) * 1000)
+    if category:
+        return category, "rule"
+
+    start = time.perf_counter()
+    category = intent_cache.get(user_input)
+    _record("cache", category is not None, (time.perf_counter() - start) * 1000)
+    if category:
+        return category, "cache"
+
+    start = time.perf_counter()
+    query_vec = None
+    try:
+        category, score, margin, query_vec = await _embedding_classify(user_input)
+        if query_vec is not None:
+            _recent_embedding_scores.append(
+                {"score": round(score, 4), "margin": round(margin, 4), "accepted": category is not None}
+            )
+    except Exception as e:
+        print(f"[Router] Embedding tier failed: {e}")
+        category = None
+    if category is None and query_vec is not None:
+        category = intent_cache.get_similar(query_vec)
+    _record("embedding", category is not None, (time.perf_counter() - start) * 1000)
+    if category:
+        intent_cache.put(user_input, category, query_vec)
+        return category, "embedding"
+
+    start = time.perf_counter()
+    try:
+        category = await _llm_classify(user_input)
+        intent_cache.put(user_input, category, query_vec)
+        return category, "llm"
     except Exception as e:
         print(f"[Router Error] Failed to classify intent: {e}")
-        return "CHAT"  # 에러 시 안전하게 일반 대화로 처리
+        return "CHAT", "fallback"  # 에러 시 안전하게 일반 대화로 처리
+    finally:
+        _record("llm", True, (time.perf_counter() - start) * 1000)
+
+
+def classify_intent(user_input: str) -> str:
+    """aclassify_intent 의 동기 래퍼 (CLI용)."""
+    return llm.run_sync(aclassify_intent(user_input))
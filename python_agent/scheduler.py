@@ -83,6 +83,28 @@ class AgentScheduler:
         except Exception as e:
             print(f"[Scheduler] Failed to register job {rule['id']}: {e}")
 
+    def add_maintenance_job(self, job_id: str, func, cron: str):
+        """
+        시스템 유지보수 작업(기억 압축 등)을 등록합니다.
+        사용자 스케줄과 달리 YAML에 저장되지 않고 목록에도 나타나지 않습니다.
+        func: 인자 없는 동기 함수 — run_in_executor로 실행됩니다.
+        """
+        async def _job():
+            print(f"[Scheduler] Maintenance: {job_id}")
+            try:
+                loop = asyncio.get_event_loop()
+                result = await loop.run_in_executor(None, func)
+                print(f"[Scheduler] Maintenance done: {job_id} → {result}")
+            except Exception as e:
+                print(f"[Scheduler] Maintenance failed: {job_id}: {e}")
+
+        self.scheduler.add_job(
+            _job,
+            CronTrigger.from_crontab(cron),
+            id=f"__maintenance__{job_id}",
+            replace_existing=True,
+        )
+
     # ── 라이프사이클 ─────────────────────────────────────────────────────────
 
     def start(self):
@@ -0,0 +1,208 @@
+"""
+society_cache.py — Society 하위 작업 결과 캐시 (AgentRegistry.adispatch 단계, 프로세스 메모리 LRU + TTL)
+
+Society 요청은 LLM 호출 3~5번과 웹 수집이 필요해 비싼데, 하루 동안 같은(또는 말만 조금 바꾼) 조사 요청이 반복됩니다.
+Manager의 계획이 달라도 Researcher에게 가는 하위 질문이 같으면 이전 결과를 그대로 돌려줍니다.
+
+- 키 = (수신자 역할, 정규화된 지시문, 지시문 속 도구 입력(URL·경로, 원문 그대로))
+  역할 단위("Researcher-3" → "Researcher")라 풀의 어느 인스턴스가 처리했든 재사용
+- 캐시 대상 역할과 TTL: config.SOCIETY_CACHE_TTL. 결과를 바꾸는 메타데이터가 붙은 메시지(sections 인계 큐 등)는 제외
+  — 진행 이벤트 큐(events)처럼 전달 경로일 뿐인 키는 무시
+- SOCIETY_CACHE_SIMILARITY를 주면 정확히 같은 키가 없을 때 같은 역할·같은 도구 입력 중
+  지시문 임베딩의 코사인 유사도가 기준 이상인 항목도 적중 (거의 같은 질문)
+- 같은 키의 요청이 처리 중이면 새로 보내지 않고 그 응답 future를 함께 기다림
+- 오류·실패 문구로 시작하는 결과와 예외는 저장하지 않음
+"""
+import asyncio
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import llm
+from config import (
+    EMBED_MODEL, SOCIETY_CACHE_MAX_ENTRIES, SOCIETY_CACHE_SIMILARITY, SOCIETY_CACHE_TTL,
+)
+from embed_cache import embedding_cache
+from router import normalize_input
+
+_RE_TOOL_INPUT = re.compile(r"https?://[^\s'\"<>)\]]+|(?:[A-Za-z]:[\\/]|~?/)[^\s'\"<>)\]]+")
+_UNCACHEABLE_PREFIXES = ("ERROR", "(조사 실패", "(결과 없음")
+_TRANSPORT_KEYS = {"events"}   # 결과에 영향을 주지 않는 메타데이터 키
+
+
+def _role(name: str) -> str:
+    return name.split("-")[0]
+
+
+def _normalize(vec: list[float]) -> list[float]:
+    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+    return [v / norm for v in vec]
+
+
+async def _embed(text: str) -> list[float]:
+    """기억·라우터와 같은 임베딩 캐시를 공유"""
+    cached = embedding_cache.get(EMBED_MODEL, text)
+    if cached is not None:
+        return cached
+    embedding = (await llm.aembeddings(model=EMBED_MODEL, prompt=text, site="society.embed"))["embedding"]
+    embedding_cache.put(EMBED_MODEL, text, embedding)
+    return embedding
+
+
+class SocietyResultCache:
+    def __init__(self, ttl: dict = SOCIETY_CACHE_TTL, max_entries: int = SOCIETY_CACHE_MAX_ENTRIES,
+                 similarity: float | None = SOCIETY_CACHE_SIMILARITY):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity = similarity
+        # key → {"result", "expires", "role", "instruction", "tool_inputs", "embedding"}
+        self._entries: OrderedDict[tuple, dict] = OrderedDict()
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.similar_hits = 0
+        self.coalesced = 0
+        self.misses = 0
+
+    # ── 조회 ─────────────────────────────────────────────────────────────────
+
+    def key_for(self, message) -> tuple | None:
+        """캐시 대상이 아니면 None"""
+        role = _role(message.recipient)
+        if role not in self.ttl or message.msg_type != "REQUEST" or set(message.metadata) - _TRANSPORT_KEYS:
+            return None
+        tool_inputs = tuple(sorted(set(_RE_TOOL_INPUT.findall(message.content))))
+        return role, normalize_input(message.content), tool_inputs
+
+    async def alookup(self, key: tuple) -> tuple[str, object, list[float] | None]:
+        """
+        (상태, 값, 임베딩) — 상태: "hit"(값=결과) | "similar"(값=결과) | "inflight"(값=처리 중인 future) | "miss"(값=None).
+        임베딩은 유사도 조회를 했을 때만 채워지며 저장 시 재사용
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["expires"] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return "hit", entry["result"], None
+            if entry is not None:
+                del self._entries[key]
+            inflight = self._inflight.get(key)
+            if inflight is not None and not inflight.done() and inflight.get_loop() is asyncio.get_running_loop():
+                self.coalesced += 1
+                return "inflight", inflight, None
+
+        embedding = None
+        if self.similarity is not None:
+            try:
+                embedding = _normalize(await _embed(key[1]))
+            except Exception as e:
+                print(f"[SocietyCache] Embedding failed, exact match only: {e}")
+            if embedding is not None:
+                result = self._similar(key, embedding)
+                if result is not None:
+                    return "similar", result, embedding
+
+        with self._lock:
+            self.misses += 1
+        return "miss", None, embedding
+
+    def _similar(self, key: tuple, embedding: list[float]) -> str | None:
+        role, _, tool_inputs = key
+        now = time.monotonic()
+        with self._lock:
+            best_key, best_score = None, self.similarity
+            for candidate, entry in self._entries.items():
+                if (entry["embedding"] is None or entry["expires"] <= now
+                        or entry["role"] != role or entry["tool_inputs"] != tool_inputs):
+                    continue
+                score = sum(a * b for a, b in zip(embedding, entry["embedding"]))
+                if score >= best_score:
+                    best_key, best_score = candidate, score
+            if best_key is None:
+                return None
+            self._entries.move_to_end(best_key)
+            self.similar_hits += 1
+            return self._entries[best_key]["result"]
+
+    # ── 저장 ─────────────────────────────────────────────────────────────────
+
+    def track(self, key: tuple, reply: asyncio.Future, embedding: list[float] | None = None):
+        """처리 중인 응답 future를 등록하고, 성공하면 결과를 저장"""
+        with self._lock:
+            self._inflight[key] = reply
+
+        def _done(future: asyncio.Future):
+            with self._lock:
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+            if future.cancelled() or future.exception() is not None:
+                return
+            result = future.result()
+            if isinstance(result, str) and result.strip() and not result.startswith(_UNCACHEABLE_PREFIXES):
+                self.put(key, result, embedding)
+        reply.add_done_callback(_done)
+
+    def put(self, key: tuple, result: str, embedding: list[float] | None = None):
+        role, instruction, tool_inputs = key
+        with self._lock:
+            self._entries[key] = {
+                "result": result,
+                "expires": time.monotonic() + self.ttl[role],
+                "role": role,
+                "instruction": instruction,
+                "tool_inputs": tool_inputs,
+                "embedding": embedding,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    # ── 관리 ─────────────────────────────────────────────────────────────────
+
+    def invalidate(self, role: str | None = None, contains: str | None = None) -> int:
+        """역할 / 지시문에 포함된 문구(정규화 후 비교)로 골라 삭제. 둘 다 없으면 전체 삭제. 삭제 수 반환"""
+        needle = normalize_input(contains) if contains else None
+        with self._lock:
+            doomed = [
+                key for key, entry in self._entries.items()
+                if (role is None or entry["role"] == _role(role))
+                and (needle is None or needle in entry["instruction"]
+                     or any(contains in tool_input for tool_input in entry["tool_inputs"]))
+            ]
+            for key in doomed:
+                del self._entries[key]
+        return len(doomed)
+
+    def clear(self) -> int:
+        return self.invalidate()
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            roles: dict[str, int] = {}
+            for entry in self._entries.values():
+                if entry["expires"] > now:
+                    roles[entry["role"]] = roles.get(entry["role"], 0) + 1
+            served = self.hits + self.similar_hits + self.coalesced
+            total = served + self.misses
+            return {
+                "entries": len(self._entries),
+                "entries_by_role": roles,
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "similarity": self.similarity,
+                "inflight": len(self._inflight),
+                "hits": self.hits,
+                "similar_hits": self.similar_hits,
+                "coalesced": self.coalesced,
+                "misses": self.misses,
+                "hit_rate": round(served / total, 3) if total else 0.0,
+            }
+
+
+# core_logic의 Society 레지스트리가 사용 (web_ui / CLI 공유)
+society_cache = SocietyResultCache()
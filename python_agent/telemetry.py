@@ -0,0 +1,213 @@
+"""
+telemetry.py — LLM 호출 계측 (인메모리 카운터 / 히스토그램, Prometheus 텍스트 형식)
+
+역할:
+- llm.py 게이트웨이가 모든 chat / generate / embeddings / embed 호출 결과를 record_llm_call()로 기록
+- 라벨: kind(chat·generate·embed…), model, site(router, react, manager.plan, researcher.synth, writer, vision, memory.embed …)
+- 지표: 호출/오류 수, 벽시계 시간, Ollama가 보고하는 load / prompt_eval / eval 시간과 토큰 수
+- ReAct 루프: 반복 수와 형식 오류 재시도 수 (model, mode=text|native) — 네이티브 도구 호출로 절약한 반복 확인용
+- ReAct 작업: 작업당 LLM 호출 수 분포 (model, outcome=final|forced_final|max_iterations)와 반복 호출 억제 수 (model, tool)
+- Society actor: mailbox 길이(게이지), 대기 시간, 처리 결과(outcome=ok|error), worker 재시작 수 (actor)
+- 기억 저장(write-behind): 기록 건수 (outcome=ok|spilled|replayed) — spilled는 재시도 후에도 실패해 디스크로 보관한 건
+- render_prometheus(): /api/metrics 응답 본문
+
+외부 의존성 없이 프로세스 메모리에만 누적되며 재시작하면 초기화됩니다.
+"""
+import bisect
+import threading
+
+# 초 단위 — 임베딩(수 ms)부터 긴 ReAct 생성(수십 초)까지
+_SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0)
+_TOKEN_BUCKETS = (8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+_ITERATION_BUCKETS = (1, 2, 3, 4, 5, 6, 7, 8, 9, 10)
+
+_LABELS = ("kind", "model", "site")
+
+
+class _Histogram:
+    def __init__(self, name: str, help_text: str, buckets: tuple, label_names: tuple = _LABELS):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        self.label_names = label_names
+        self.series: dict[tuple, list] = {}   # labels → [bucket counts..., +Inf count, sum]
+
+    def observe(self, labels: tuple, value: float):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self.series.items()):
+            base = _format_labels(self.label_names, labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}')
+            cumulative += series[len(self.buckets)]
+            lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{base}}} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{{{base}}} {cumulative}")
+        return lines
+
+
+class _Counter:
+    def __init__(self, name: str, help_text: str, label_names: tuple = _LABELS):
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self.series: dict[tuple, float] = {}
+
+    def inc(self, labels: tuple, value: float = 1):
+        self.series[labels] = self.series.get(labels, 0) + value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.series.items()):
+            lines.append(f"{self.name}{{{_format_labels(self.label_names, labels)}}} {value:g}")
+        return lines
+
+
+class _Gauge:
+    def __init__(self, name: str, help_text: str, label_names: tuple = _LABELS):
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self.series: dict[tuple, float] = {}
+
+    def set(self, labels: tuple, value: float):
+        self.series[labels] = value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for labels, value in sorted(self.series.items()):
+            lines.append(f"{self.name}{{{_format_labels(self.label_names, labels)}}} {value:g}")
+        return lines
+
+
+def _format_labels(names: tuple, values: tuple) -> str:
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return ",".join(f'{k}="{v}"' for k, v in zip(names, escaped))
+
+
+_lock = threading.Lock()
+_requests = _Counter("ageis_llm_requests_total", "LLM calls completed (including errors)")
+_errors = _Counter("ageis_llm_errors_total", "LLM calls that raised")
+_prompt_tokens_total = _Counter("ageis_llm_prompt_tokens_total", "Prompt tokens evaluated (excludes KV-cache reuse)")
+_completion_tokens_total = _Counter("ageis_llm_completion_tokens_total", "Tokens generated")
+_wall = _Histogram("ageis_llm_wall_seconds", "Wall time per call, including streaming", _SECONDS_BUCKETS)
+_load = _Histogram("ageis_llm_load_seconds", "Model load time reported by Ollama", _SECONDS_BUCKETS)
+_prompt_eval = _Histogram("ageis_llm_prompt_eval_seconds", "Prompt evaluation time reported by Ollama", _SECONDS_BUCKETS)
+_eval = _Histogram("ageis_llm_eval_seconds", "Generation time reported by Ollama", _SECONDS_BUCKETS)
+_prompt_tokens = _Histogram("ageis_llm_prompt_tokens", "Prompt tokens evaluated per call", _TOKEN_BUCKETS)
+_completion_tokens = _Histogram("ageis_llm_completion_tokens", "Tokens generated per call", _TOKEN_BUCKETS)
+_react_iterations = _Counter("ageis_react_iterations_total", "ReAct iterations (one LLM call each)",
+                             ("model", "mode"))
+_react_format_failures = _Counter("ageis_react_format_failures_total",
+                                  "ReAct iterations wasted on a reply with no parsable action or answer",
+                                  ("model", "mode"))
+_react_task_iterations = _Histogram("ageis_react_task_iterations", "LLM calls per ReAct task",
+                                    _ITERATION_BUCKETS, ("model", "outcome"))
+_react_repeats = _Counter("ageis_react_repeated_calls_total",
+                          "Tool calls repeated with identical input (answered from history, not re-executed)",
+                          ("model", "tool"))
+_actor_depth = _Gauge("ageis_actor_mailbox_depth", "Messages waiting in an actor mailbox", ("actor",))
+_actor_wait = _Histogram("ageis_actor_queue_wait_seconds", "Time a message waited in the mailbox before handling",
+                         _SECONDS_BUCKETS, ("actor",))
+_actor_messages = _Counter("ageis_actor_messages_total", "Messages handled by an actor", ("actor", "outcome"))
+_actor_restarts = _Counter("ageis_actor_restarts_total", "Actor workers restarted after an exception", ("actor",))
+_memory_writes = _Counter("ageis_memory_writes_total",
+                          "Memory items written by the write-behind worker (spilled = kept on disk after failed retries)",
+                          ("outcome",))
+_METRICS = (_requests, _errors, _prompt_tokens_total, _completion_tokens_total,
+            _wall, _load, _prompt_eval, _eval, _prompt_tokens, _completion_tokens,
+            _react_iterations, _react_format_failures, _react_task_iterations, _react_repeats,
+            _actor_depth, _actor_wait, _actor_messages, _actor_restarts, _memory_writes)
+
+
+def record_llm_call(kind: str, model: str, site: str, wall_seconds: float, response=None, error: bool = False):
+    """
+    호출 1건 기록. response는 Ollama 응답(또는 스트림의 마지막 청크) — 없거나 필드가 비면 시간만 기록.
+    Ollama의 *_duration 값은 나노초입니다.
+    """
+    labels = (kind, model, site)
+    with _lock:
+        _requests.inc(labels)
+        _wall.observe(labels, wall_seconds)
+        if error:
+            _errors.inc(labels)
+        if not response:
+            return
+        for histogram, field in ((_load, "load_duration"), (_prompt_eval, "prompt_eval_duration"),
+                                 (_eval, "eval_duration")):
+            value = response.get(field)
+            if value:
+                histogram.observe(labels, value / 1e9)
+        prompt_tokens = response.get("prompt_eval_count")
+        if prompt_tokens is not None:
+            _prompt_tokens.observe(labels, prompt_tokens)
+            _prompt_tokens_total.inc(labels, prompt_tokens)
+        completion_tokens = response.get("eval_count")
+        if completion_tokens is not None:
+            _completion_tokens.observe(labels, completion_tokens)
+            _completion_tokens_total.inc(labels, completion_tokens)
+
+
+def record_react_iteration(model: str, mode: str, format_failure: bool = False):
+    """ReAct 반복 1회 기록. format_failure=True 는 "형식을 지켜주세요" 재시도로 끝난 반복"""
+    labels = (model, mode)
+    with _lock:
+        _react_iterations.inc(labels)
+        if format_failure:
+            _react_format_failures.inc(labels)
+
+
+def record_react_repeat(model: str, tool: str):
+    """같은 (도구, 입력) 반복 1회 — 각각이 낭비된 LLM 호출 1번"""
+    with _lock:
+        _react_repeats.inc((model, tool))
+
+
+def record_react_task(model: str, outcome: str, iterations: int):
+    """ReAct 작업 1건 종료 — outcome: final | forced_final(반복 한도로 답변 강제) | max_iterations"""
+    with _lock:
+        _react_task_iterations.observe((model, outcome), iterations)
+
+
+def record_actor_depth(actor: str, depth: int):
+    """mailbox에 넣거나 꺼낼 때마다 현재 길이 기록"""
+    with _lock:
+        _actor_depth.set((actor,), depth)
+
+
+def record_actor_message(actor: str, wait_seconds: float, error: bool = False):
+    """메시지 1건 처리 완료 — wait_seconds: mailbox에서 기다린 시간"""
+    with _lock:
+        _actor_wait.observe((actor,), wait_seconds)
+        _actor_messages.inc((actor, "error" if error else "ok"))
+
+
+def record_actor_restart(actor: str):
+    with _lock:
+        _actor_restarts.inc((actor,))
+
+
+def record_memory_write(outcome: str, items: int):
+    """기억 배치 기록 결과 — outcome: ok | spilled(재시도 실패, 디스크 보관) | replayed(보관분 재기록)"""
+    with _lock:
+        _memory_writes.inc((outcome,), items)
+
+
+def render_prometheus() -> str:
+    with _lock:
+        lines = [line for metric in _METRICS for line in metric.render()]
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    with _lock:
+        for metric in _METRICS:
+            metric.series.clear()
@@ -0,0 +1,41 @@
+"""router 1단계(규칙) 분류 — 키워드만 있는 일반 질문은 다음 단계로 넘기고, 명백한 요청만 즉시 분류"""
+import pytest
+
+from router import _rule_classify
+
+
+@pytest.mark.parametrize("text", [
+    "매일 운동하는 게 좋아?",
+    "스케줄 관리 팁 알려줘",
+    "매주 회의를 하면 생산성이 올라갈까?",
+    "매일 아침 일찍 일어나는 방법",
+    "보고서 작성 요령 알려줘",
+    "리포트가 뭐야?",
+    "심층 분석이란 무엇인가요?",
+])
+def test_keyword_only_questions_fall_through(text):
+    assert _rule_classify(text) is None
+
+
+@pytest.mark.parametrize("text", [
+    "매일 오전 9시에 뉴스 요약해줘",
+    "매주 월요일 10시에 디스크 용량 확인해 주세요",
+    "30분마다 서버 상태 확인해줘",
+    "평일마다 18:30에 업무 일지 정리해줘",
+])
+def test_recurring_requests_are_schedule(text):
+    assert _rule_classify(text) == "SCHEDULE"
+
+
+@pytest.mark.parametrize("text", [
+    "AI 트렌드 심층 분석 보고서 써줘",
+    "전기차 시장 리포트 작성해줘",
+    "반도체 업계 동향 보고서를 만들어 주세요",
+    "반도체 시장 심층 분석해줘",
+])
+def test_report_writing_requests_are_society(text):
+    assert _rule_classify(text) == "SOCIETY"
+
+
+def test_report_with_path_falls_through():
+    assert _rule_classify("보고서 써서 report.md로 저장해줘") is None
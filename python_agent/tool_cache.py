@@ -0,0 +1,185 @@
+"""
+tool_cache.py — 도구 실행 결과 캐시 (ReAct 실행·스케줄 작업 간 공유, 프로세스 메모리 LRU)
+
+같은 파일 읽기·디렉토리 목록·URL 수집이 한 실행 안에서도, 매일 도는 스케줄 작업 사이에서도 반복되므로
+core_logic.TOOLS의 각 도구를 wrap_tools()로 감싸 TOOL_CACHE_POLICIES에 따라 결과를 재사용합니다.
+
+정책 종류 (config.TOOL_CACHE_POLICIES):
+- "file": 키 = 도구 입력 + 입력 경로의 (mtime, size). 파일이 바뀌면 자동으로 미스. ttl을 주면 그 시간도 제한
+          (list_dir 처럼 디렉토리 mtime에 드러나지 않는 변화가 있는 도구용)
+- "web" : 키 = 도구 입력(URL). 미스면 도구 함수의 cache_fetch(args) → (결과, ETag / Last-Modified)로 한 번에 받아 저장.
+          ttl 동안 그대로 사용하고, 지난 뒤에만 cache_validators(args, previous)(조건부 HEAD)로 재검증
+          — 바뀌지 않았으면 다시 받지 않음
+- "ttl" : 키 = 도구 입력, ttl 동안 사용 (검색 결과, 재귀 용량 계산 등)
+정책에 없는 도구(write_file, tts_speak, stt_record 등 부작용이 있는 도구, 플러그인)는 절대 캐시하지 않습니다.
+
+"ERROR" / "DENIED" 로 시작하는 결과와 예외는 캐시하지 않습니다. file 정책에서 경로가 없거나 비어 있으면
+캐시를 거치지 않고 실행하며 통계에 uncacheable로 집계합니다 (도구별 calls = 조회 + bypasses + uncacheable).
+도구 입력에 "no_cache": true 를 넣으면 캐시를 건너뛰고 새로 실행한 결과로 갱신합니다 (도구에는 전달 안 됨).
+"""
+import functools
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from config import TOOL_CACHE_ENABLED, TOOL_CACHE_MAX_ENTRIES, TOOL_CACHE_POLICIES
+
+BYPASS_FLAG = "no_cache"
+_UNCACHEABLE_PREFIXES = ("ERROR", "DENIED", "Tool execution error")
+
+
+def _args_key(tool_name: str, args: dict) -> str:
+    canonical = json.dumps(args, ensure_ascii=False, sort_keys=True, default=str)
+    return f"{tool_name}:{hashlib.sha256(canonical.encode('utf-8')).hexdigest()}"
+
+
+def _path_stamp(raw: str) -> tuple | None:
+    """입력 경로의 (mtime_ns, size). 도구마다 상대 경로 기준(홈 / 작업 디렉토리)이 달라 둘 다 확인, 없으면 None"""
+    path = Path(raw.strip() or "~").expanduser()
+    candidates = [path] if path.is_absolute() else [Path.home() / path, Path.cwd() / path]
+    stamps = []
+    for candidate in candidates:
+        try:
+            stat = candidate.stat()
+        except OSError:
+            continue
+        stamps.append((str(candidate), stat.st_mtime_ns, stat.st_size))
+    return tuple(stamps) or None
+
+
+class ToolResultCache:
+    def __init__(self, policies: dict = TOOL_CACHE_POLICIES, max_entries: int = TOOL_CACHE_MAX_ENTRIES,
+                 enabled: bool = TOOL_CACHE_ENABLED):
+        self.policies = policies
+        self.max_entries = max_entries
+        self.enabled = enabled
+        # key → {"result", "stored", "stamp", "validators"}
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats: dict[str, dict[str, int]] = {}
+
+    # ── 도구 감싸기 ──────────────────────────────────────────────────────────
+
+    def wrap(self, name: str, func):
+        """정책이 있는 도구만 감싼 함수를 반환 (docstring·parameters 등 속성 유지). 그 외는 원본 그대로"""
+        policy = self.policies.get(name)
+        if not self.enabled or policy is None:
+            return func
+
+        @functools.wraps(func)
+        def cached_tool(args: dict) -> str:
+            return self.call(name, func, policy, args)
+        return cached_tool
+
+    def call(self, name: str, func, policy: dict, args: dict) -> str:
+        args = dict(args or {})
+        bypass = bool(args.pop(BYPASS_FLAG, False))
+        key = _args_key(name, args)
+        stamp = None
+        if policy["kind"] == "file":
+            stamp = _path_stamp(str(args.get("path") or ""))
+            if stamp is None:
+                # 없는 경로 — 오류 결과는 어차피 저장하지 않으므로 바로 실행 (통계에는 uncacheable로 집계)
+                self._count(name, "uncacheable")
+                return func(args)
+
+        if bypass:
+            self._count(name, "bypasses")
+        else:
+            cached = self._lookup(name, func, policy, key, args, stamp)
+            if cached is not None:
+                return cached
+
+        if policy["kind"] == "web" and hasattr(func, "cache_fetch"):
+            result, validators = func.cache_fetch(args)
+        else:
+            result, validators = func(args), None
+        if isinstance(result, str) and not result.startswith(_UNCACHEABLE_PREFIXES):
+            self._store(key, {"result": result, "stored": time.monotonic(), "stamp": stamp,
+                              "validators": validators})
+        return result
+
+    # ── 조회 / 저장 ──────────────────────────────────────────────────────────
+
+    def _lookup(self, name: str, func, policy: dict, key: str, args: dict, stamp) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            self._count(name, "misses")
+            return None
+
+        ttl = policy.get("ttl")
+        fresh = ttl is None or time.monotonic() - entry["stored"] < ttl
+        if policy["kind"] == "file" and entry["stamp"] != stamp:
+            self._count(name, "invalidations")
+            self._count(name, "misses")
+            return None
+        if fresh:
+            self._count(name, "hits")
+            return entry["result"]
+
+        # TTL 경과 — web 정책은 ETag / Last-Modified 로 재검증
+        previous = entry["validators"]
+        if policy["kind"] == "web" and previous and hasattr(func, "cache_validators"):
+            current = func.cache_validators(args, previous)
+            if current is not None and current == previous:
+                entry["stored"] = time.monotonic()
+                self._count(name, "revalidated")
+                return entry["result"]
+        self._count(name, "expired")
+        self._count(name, "misses")
+        return None
+
+    def _store(self, key: str, entry: dict):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _count(self, name: str, field: str):
+        with self._lock:
+            tool_stats = self._stats.setdefault(
+                name, {"hits": 0, "revalidated": 0, "misses": 0, "expired": 0, "invalidations": 0, "bypasses": 0,
+                       "uncacheable": 0}
+            )
+            tool_stats[field] += 1
+
+    # ── 관리 ─────────────────────────────────────────────────────────────────
+
+    def clear(self) -> int:
+        with self._lock:
+            removed = len(self._entries)
+            self._entries.clear()
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            tools = {name: dict(s) for name, s in self._stats.items()}
+            entries = len(self._entries)
+        for s in tools.values():
+            served = s["hits"] + s["revalidated"]
+            total = served + s["misses"]
+            s["hit_rate"] = round(served / total, 3) if total else 0.0
+            # 실제 도구 호출 수 = 캐시 조회(적중·재검증·미스) + 우회(no_cache) + 캐시 불가(없는 경로)
+            s["calls"] = total + s["bypasses"] + s["uncacheable"]
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "policies": self.policies,
+            "tools": tools,
+        }
+
+
+tool_cache = ToolResultCache()
+
+
+def wrap_tools(tools: dict) -> dict:
+    """{"tool_name": function} 의 각 도구를 정책에 따라 캐시 계층으로 감싼 새 딕셔너리"""
+    return {name: tool_cache.wrap(name, func) for name, func in tools.items()}
@@ -0,0 +1,99 @@
+"""
+tool_schema.py — 도구 함수 → Ollama tools API(JSON Schema) 정의 변환
+
+ReActAgent의 네이티브 도구 호출 모드(REACT_TOOL_MODE="native")가 ollama.chat(tools=...)에 넘길 정의를 만듭니다.
+도구는 모두 `def tool(args: dict) -> str` 형태라 시그니처에 인자 정보가 없으므로 docstring에서 읽습니다.
+
+인식하는 docstring 형식 (tools/ 의 기존 도구들이 쓰는 두 가지):
+    Args:
+        args: {"path": "파일 경로", "top": 10}          ← 예시 값의 타입으로 스키마 타입 결정
+    args:
+        duration (float): 녹음 시간(초), 기본값 5       ← 괄호 안 타입 사용
+
+설명에 "선택" / "기본값" / "optional" 이 있거나 예시 값이 문자열이 아니면(기본값이 있는 숫자 등) 선택 인자로 봅니다.
+플러그인은 TOOL_PARAMETERS(JSON Schema dict)로 직접 지정할 수 있으며, 이 경우 함수의 .parameters 속성이 우선합니다.
+"""
+import json
+import re
+
+_PY_TYPES = {"str": "string", "int": "integer", "float": "number", "bool": "boolean",
+             "dict": "object", "list": "array"}
+_OPTIONAL_HINTS = ("선택", "기본값", "optional", "default")
+
+_DICT_EXAMPLE = re.compile(r"args\s*:\s*(\{.*?\})\s*$", re.MULTILINE)
+_TYPED_ARG = re.compile(r"^\s*([A-Za-z_]\w*)\s*\((\w+)\)\s*:\s*(.*)$", re.MULTILINE)
+
+
+def _json_type(value) -> str:
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "integer"
+    if isinstance(value, float):
+        return "number"
+    if isinstance(value, (list, tuple)):
+        return "array"
+    if isinstance(value, dict):
+        return "object"
+    return "string"
+
+
+def _is_optional(description: str) -> bool:
+    lowered = description.lower()
+    return any(hint in lowered for hint in _OPTIONAL_HINTS)
+
+
+def _description(doc: str) -> str:
+    """docstring에서 Args 블록 앞의 설명 문단"""
+    lines = []
+    for line in doc.strip().splitlines():
+        if line.strip().lower().startswith("args"):
+            break
+        lines.append(line.strip())
+    return " ".join(line for line in lines if line).strip() or "No description."
+
+
+def _parameters(doc: str) -> dict:
+    properties, required = {}, []
+
+    example = _DICT_EXAMPLE.search(doc)
+    if example:
+        try:
+            values = json.loads(example.group(1))
+        except json.JSONDecodeError:
+            values = {}
+        for name, value in values.items() if isinstance(values, dict) else ():
+            schema = {"type": _json_type(value)}
+            if isinstance(value, str):
+                schema["description"] = value
+                if not _is_optional(value):
+                    required.append(name)
+            else:
+                schema["description"] = f"기본값 {json.dumps(value, ensure_ascii=False)}"
+            properties[name] = schema
+
+    for name, py_type, description in _TYPED_ARG.findall(doc):
+        if name in properties:
+            continue
+        properties[name] = {"type": _PY_TYPES.get(py_type.lower(), "string"), "description": description.strip()}
+        if not _is_optional(description):
+            required.append(name)
+
+    return {"type": "object", "properties": properties, "required": required}
+
+
+def tool_definition(name: str, func) -> dict:
+    """도구 1개의 Ollama tools 항목 ({"type": "function", "function": {...}})"""
+    doc = func.__doc__ or ""
+    parameters = getattr(func, "parameters", None)
+    if not isinstance(parameters, dict):
+        parameters = _parameters(doc)
+    return {
+        "type": "function",
+        "function": {"name": name, "description": _description(doc), "parameters": parameters},
+    }
+
+
+def build_tool_definitions(tools: dict) -> list[dict]:
+    """{"tool_name": function} → ollama.chat(tools=...) 인자. 순서는 tools 딕셔너리 순서 그대로 (프롬프트 접두사 고정)"""
+    return [tool_definition(name, func) for name, func in tools.items()]
@@ -7,7 +7,7 @@ vision_tool.py — Phase 6-A: 이미지 분석 도구 (llava 모델 사용)
 """
 import base64
 import os
-import ollama
+import llm
 
 VISION_MODEL = "llava"  # ollama pull llava 필요
 
@@ -40,8 +40,9 @@ def analyze_image_tool(args: dict) -> str:
                 return f"ERROR: 파일을 찾을 수 없습니다: {image_path}"
             b64_data = _load_image_as_base64(image_path)
 
-        response = ollama.chat(
+        response = llm.chat(
             model=VISION_MODEL,
+            site="vision",
             messages=[
                 {
                     "role": "user",
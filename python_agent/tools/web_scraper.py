@@ -1,42 +1,125 @@
+import asyncio
+
 import httpx
 from bs4 import BeautifulSoup
 
-def web_scrape_tool(args: dict) -> str:
+_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+
+def _normalize_url(url: str) -> str:
+    # http/https 프로토콜 없으면 추가
+    if not url.startswith("http"):
+        url = "https://" + url
+    return url
+
+
+def _extract_text(html: str) -> str:
+    soup = BeautifulSoup(html, "html.parser")
+
+    # 불필요한 태그 제거
+    for tag in soup(["script", "style", "nav", "footer", "header", "aside", "meta", "noscript"]):
+        tag.decompose()
+
+    return soup.get_text(separator="\n", strip=True)
+
+
+def _response_validators(resp) -> dict | None:
+    """응답 헤더의 ETag / Last-Modified (tool_cache 재검증용). 둘 다 없으면 None"""
+    validators = {
+        key: resp.headers[header]
+        for key, header in (("etag", "ETag"), ("last_modified", "Last-Modified"))
+        if header in resp.headers
+    }
+    return validators or None
+
+
+def scrape_with_validators(args: dict) -> tuple[str, dict | None]:
     """
-    URL에서 본문 텍스트만 추출 (최대 2000자 제한)
-    
-    Args:
-        args: {"url": "https://example.com"}
+    web_scrape_tool 본체 — (본문, GET 응답의 ETag / Last-Modified).
+    tool_cache가 미스일 때 이 함수를 호출해 검증자를 따로 HEAD로 묻지 않고 같은 응답에서 얻음
     """
     url = args.get("url", "")
     if not url:
-        return "ERROR: 'url' argument is required."
+        return "ERROR: 'url' argument is required.", None
 
-    # http/https 프로토콜 없으면 추가
-    if not url.startswith("http"):
-        url = "https://" + url
+    url = _normalize_url(url)
 
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        resp = httpx.get(url, headers=headers, timeout=10, follow_redirects=True, verify=False)
+        resp = httpx.get(url, headers=_HEADERS, timeout=10, follow_redirects=True, verify=False)
         resp.raise_for_status() # 4xx, 5xx 에러 체크
-        
-        soup = BeautifulSoup(resp.text, "html.parser")
-        
-        # 불필요한 태그 제거
-        for tag in soup(["script", "style", "nav", "footer", "header", "aside", "meta", "noscript"]):
-            tag.decompose()
-            
-        text = soup.get_text(separator="\n", strip=True)
-        
+
+        text = _extract_text(resp.text)
+
         # 너무 긴 텍스트는 잘라서 반환 (토큰 절약)
         if len(text) > 2000:
-            return text[:2000] + "\n... (content truncated)"
-        return text
+            text = text[:2000] + "\n... (content truncated)"
+        return text, _response_validators(resp)
         
+    except httpx.HTTPError as e:
+        return f"ERROR: HTTP Request failed - {e}", None
+    except Exception as e:
+        return f"ERROR: Scraper failed - {e}", None
+
+
+def web_scrape_tool(args: dict) -> str:
+    """
+    URL에서 본문 텍스트만 추출 (최대 2000자 제한)
+    
+    Args:
+        args: {"url": "https://example.com"}
+    """
+    return scrape_with_validators(args)[0]
+
+
+def new_async_client(timeout: float = 10) -> httpx.AsyncClient:
+    """여러 페이지를 동시에 가져올 때 함께 쓰는 클라이언트 (커넥션 재사용). async with 로 사용"""
+    return httpx.AsyncClient(headers=_HEADERS, timeout=timeout, follow_redirects=True, verify=False)
+
+
+async def afetch_page(client: httpx.AsyncClient, url: str, max_chars: int = 20000) -> str:
+    """
+    web_scrape_tool의 비동기 버전 — 본문 전체를 가져옴 (조각 선별은 호출자가 하므로 2000자로 자르지 않음).
+    실패하면 "ERROR: ..." 문자열
+    """
+    try:
+        resp = await client.get(_normalize_url(url))
+        resp.raise_for_status()
+        # HTML 파싱은 CPU 작업 — 다른 페이지 다운로드를 막지 않도록 스레드에서
+        return (await asyncio.to_thread(_extract_text, resp.text))[:max_chars]
     except httpx.HTTPError as e:
         return f"ERROR: HTTP Request failed - {e}"
     except Exception as e:
         return f"ERROR: Scraper failed - {e}"
+
+
+def page_validators(args: dict, previous: dict | None = None) -> dict | None:
+    """
+    tool_cache 재검증용 (TTL이 지난 항목에만 호출) — HEAD 요청으로 페이지의 ETag / Last-Modified 조회.
+    previous가 있으면 조건부 요청(If-None-Match / If-Modified-Since)을 보내고 304면 previous를 그대로 반환.
+    검증자가 없거나 요청이 실패하면 None (다시 받음)
+    """
+    url = args.get("url", "")
+    if not url:
+        return None
+    headers = dict(_HEADERS)
+    if previous:
+        if previous.get("etag"):
+            headers["If-None-Match"] = previous["etag"]
+        if previous.get("last_modified"):
+            headers["If-Modified-Since"] = previous["last_modified"]
+    try:
+        resp = httpx.head(_normalize_url(url), headers=headers, timeout=5, follow_redirects=True, verify=False)
+    except httpx.HTTPError:
+        return None
+    if resp.status_code == 304:
+        return previous
+    if resp.status_code >= 400:
+        return None
+    return _response_validators(resp)
+
+
+# tool_cache 연동 — 미스: cache_fetch로 본문과 검증자를 한 번의 GET으로, TTL 경과: cache_validators로 조건부 HEAD
+web_scrape_tool.cache_fetch = scrape_with_validators
+web_scrape_tool.cache_validators = page_validators
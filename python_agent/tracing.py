@@ -0,0 +1,242 @@
+"""
+tracing.py — 요청 단위 트레이스 스팬 (OpenTelemetry 호환 모델, 로컬 JSONL 내보내기)
+
+역할:
+- span("react.iteration", iteration=2): with 블록 하나가 스팬 하나. 부모-자식 관계는 contextvars로 전파
+  (await, asyncio.to_thread 모두 같은 트레이스로 이어짐)
+- 끝난 스팬은 Agent_Workspace/.traces.jsonl 에 한 줄씩 기록 (컬렉터 불필요, TRACE_MAX_FILE_BYTES 초과 시 .1로 교체)
+  — 요청 경로에서는 큐에 넣기만 하고, 파일을 열어 둔 백그라운드 스레드 하나가 기록·교체를 맡음
+- 최근 TRACE_KEEP_IN_MEMORY개 트레이스는 메모리에도 보관 → get_trace(trace_id) / /api/traces/{id}
+
+스팬 필드는 OTel 이름을 따릅니다: trace_id(32 hex), span_id(16 hex), parent_span_id, name,
+start_time_unix_nano, end_time_unix_nano, attributes, status ("OK" | "ERROR").
+"""
+import atexit
+import contextvars
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from config import TRACE_ENABLED, TRACE_KEEP_IN_MEMORY, TRACE_MAX_FILE_BYTES
+
+
+def _default_trace_path() -> Path:
+    if getattr(sys, 'frozen', False):
+        base = Path(sys.executable).parent
+    else:
+        base = Path(__file__).resolve().parent.parent
+    return base / "Agent_Workspace" / ".traces.jsonl"
+
+
+_current: contextvars.ContextVar["Span | None"] = contextvars.ContextVar("ageis_span", default=None)
+
+
+class Span:
+    def __init__(self, name: str, attributes: dict):
+        parent = _current.get()
+        self.name = name
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_span_id = parent.span_id if parent else None
+        self.attributes = dict(attributes)
+        self.status = "OK"
+        self.status_message = ""
+        self.start_ns = 0
+        self.end_ns = 0
+        self._token = None
+        self._parent = parent
+
+    def set(self, **attributes):
+        """실행 중 알게 된 값(결과 의도, 적중 수 등)을 속성에 추가"""
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> "Span":
+        self.start_ns = time.time_ns()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        if exc is not None and not isinstance(exc, GeneratorExit):
+            self.status = "ERROR"
+            self.status_message = f"{exc_type.__name__}: {exc}"
+        try:
+            _current.reset(self._token)
+        except ValueError:
+            # async generator가 다른 컨텍스트에서 재개된 경우 — 토큰 대신 부모를 직접 복원
+            _current.set(self._parent)
+        _exporter.export(self)
+        return False
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "name": self.name,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "attributes": self.attributes,
+            "status": self.status,
+            "status_message": self.status_message,
+        }
+
+
+class _NoopSpan:
+    trace_id = ""
+    span_id = ""
+
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_STOP = object()   # 기록 스레드 종료 신호
+
+
+class _JsonlExporter:
+    # 기록 스레드가 밀릴 때 쌓아 둘 최대 스팬 수 — 넘치면 파일 기록만 버림 (메모리 보관·요청은 영향 없음)
+    _QUEUE_MAX = 10000
+
+    def __init__(self, path: Path, keep: int, max_bytes: int):
+        self.path = path
+        self.keep = keep
+        self.max_bytes = max_bytes
+        self._recent: "OrderedDict[str, list[dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue(maxsize=self._QUEUE_MAX)
+        self._writer: threading.Thread | None = None
+        self.dropped = 0
+
+    def export(self, span: Span):
+        """메모리 보관은 바로, 파일 기록은 큐에 넣고 반환 (직렬화·쓰기·교체는 기록 스레드)"""
+        record = span.to_dict()
+        with self._lock:
+            spans = self._recent.setdefault(span.trace_id, [])
+            spans.append(record)
+            self._recent.move_to_end(span.trace_id)
+            while len(self._recent) > self.keep:
+                self._recent.popitem(last=False)
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._writer_loop, name="trace-writer", daemon=True)
+                self._writer.start()
+                atexit.register(self.close)
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _writer_loop(self):
+        f = None
+        while True:
+            record = self._queue.get()
+            try:
+                if record is _STOP:
+                    return
+                if f is None:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    f = open(self.path, "a", encoding="utf-8")
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                if f.tell() > self.max_bytes:
+                    f.close()
+                    f = None
+                    os.replace(self.path, self.path.with_suffix(".jsonl.1"))
+                elif self._queue.empty():
+                    f.flush()   # 몰려온 스팬은 모아서, 한가해지면 바로 파일에 반영
+            except OSError as e:
+                print(f"[Tracing] Export failed: {e}")
+                if f is not None:
+                    f.close()
+                    f = None
+            finally:
+                self._queue.task_done()
+                if record is _STOP and f is not None:
+                    f.close()
+
+    def close(self):
+        """남은 스팬을 기록하고 기록 스레드를 종료 (atexit)"""
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join(timeout=5)
+
+    def get(self, trace_id: str) -> list[dict]:
+        with self._lock:
+            if trace_id in self._recent:
+                return list(self._recent[trace_id])
+        # 메모리에서 밀려난 트레이스는 파일에서 찾음
+        spans = []
+        for path in (self.path.with_suffix(".jsonl.1"), self.path):
+            if not path.exists():
+                continue
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if trace_id in line:
+                        try:
+                            spans.append(json.loads(line))
+                        except json.JSONDecodeError:
+                            continue
+        return [s for s in spans if s.get("trace_id") == trace_id]
+
+
+_exporter = _JsonlExporter(_default_trace_path(), TRACE_KEEP_IN_MEMORY, TRACE_MAX_FILE_BYTES)
+
+
+def span(name: str, **attributes) -> Span | _NoopSpan:
+    """현재 스팬의 자식 스팬 (없으면 새 트레이스의 루트). with 블록으로 사용합니다."""
+    if not TRACE_ENABLED:
+        return _NoopSpan()
+    return Span(name, attributes)
+
+
+def current_trace_id() -> str:
+    current = _current.get()
+    return current.trace_id if current else ""
+
+
+def get_trace(trace_id: str) -> dict | None:
+    """트레이스의 스팬을 깊이 우선(부모 → 자식, 시작 시각 순)으로 정렬하고 depth/offset_ms/duration_ms를 붙여 반환"""
+    spans = _exporter.get(trace_id)
+    if not spans:
+        return None
+    children: dict[str | None, list[dict]] = {}
+    ids = {s["span_id"] for s in spans}
+    for s in spans:
+        parent = s["parent_span_id"] if s["parent_span_id"] in ids else None
+        children.setdefault(parent, []).append(s)
+    start = min(s["start_time_unix_nano"] for s in spans)
+    end = max(s["end_time_unix_nano"] for s in spans)
+
+    ordered = []
+
+    def walk(parent, depth):
+        for s in sorted(children.get(parent, []), key=lambda s: s["start_time_unix_nano"]):
+            ordered.append({
+                **s,
+                "depth": depth,
+                "offset_ms": round((s["start_time_unix_nano"] - start) / 1e6, 2),
+                "duration_ms": round((s["end_time_unix_nano"] - s["start_time_unix_nano"]) / 1e6, 2),
+            })
+            walk(s["span_id"], depth + 1)
+
+    walk(None, 0)
+    return {"trace_id": trace_id, "duration_ms": round((end - start) / 1e6, 2), "spans": ordered}
+
+
+def render_waterfall(trace: dict) -> str:
+    """get_trace() 결과를 들여쓰기 텍스트로 — 어느 단계가 오래 걸렸는지 한눈에 보기 위함"""
+    lines = [f"trace {trace['trace_id']}  total {trace['duration_ms']:.1f} ms"]
+    for s in trace["spans"]:
+        attrs = " ".join(f"{k}={v}" for k, v in s["attributes"].items())
+        status = "" if s["status"] == "OK" else f"  !! {s['status_message']}"
+        lines.append(f"{s['offset_ms']:>9.1f} ms {s['duration_ms']:>9.1f} ms  {'  ' * s['depth']}{s['name']}  {attrs}{status}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,463 @@
+"""
+vector_store.py — AgentMemory 저장소 백엔드
+
+역할:
+- VectorStore: AgentMemory가 사용하는 저장소 인터페이스 (add / delete / get_all / query / count)
+- match_where: 메타데이터 필터 ({"type": {"$in": [...]}, "timestamp": {"$gte": "2026-01-01"}} 형식)
+- ChromaStore: ChromaDB PersistentClient (기존 Agent_Workspace/.chroma)
+- NumpyStore : 정규화된 float32 행렬을 메모리 맵 파일에, 문서·메타데이터를 JSONL 사이드카에 저장하는 인프로세스 인덱스.
+               코사인 검색은 행렬 곱 1회(brute-force)이며, 문서 수가 MEMORY_IVF_MIN_ROWS 이상이면
+               IVF(k-means 버킷)로 후보를 좁힙니다. SQLite/HNSW 초기화가 없어 시작이 빠릅니다.
+
+config.MEMORY_BACKEND ("chroma" | "numpy")로 선택하며, 기존 기억은 다음 명령으로 옮깁니다:
+  cd python_agent
+  python vector_store.py migrate --from chroma --to numpy
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from config import MEMORY_BACKEND, MEMORY_IVF_MIN_ROWS, MEMORY_IVF_NPROBE
+
+_STORE_DIRS = {"chroma": ".chroma", "numpy": ".vecstore"}
+
+
+def default_store_dir(backend: str) -> str:
+    """번들(frozen) 여부에 따라 백엔드별 저장 경로 반환."""
+    if getattr(sys, 'frozen', False):
+        base = Path(sys.executable).parent
+    else:
+        base = Path(__file__).resolve().parent.parent
+    return str(base / "Agent_Workspace" / _STORE_DIRS[backend])
+
+
+_OPERATORS = {
+    "$eq": lambda v, x: v == x,
+    "$ne": lambda v, x: v != x,
+    "$in": lambda v, x: v in x,
+    "$nin": lambda v, x: v not in x,
+    "$gt": lambda v, x: v is not None and v > x,
+    "$gte": lambda v, x: v is not None and v >= x,
+    "$lt": lambda v, x: v is not None and v < x,
+    "$lte": lambda v, x: v is not None and v <= x,
+}
+
+
+def match_where(metadata: dict, where: dict) -> bool:
+    """
+    Chroma 스타일 where 필터 평가 — 키끼리는 AND, 값이 dict가 아니면 $eq.
+    timestamp는 ISO 문자열이므로 문자열 비교로 범위 조건이 동작합니다.
+    """
+    for key, condition in where.items():
+        value = metadata.get(key)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for op, operand in condition.items():
+            if not _OPERATORS[op](value, operand):
+                return False
+    return True
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+class VectorStore:
+    """AgentMemory 저장소 인터페이스. 문서 수 관리와 n_results 상한 처리는 AgentMemory가 담당합니다."""
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def add(self, ids: list[str], embeddings: list[list[float]], documents: list[str], metadatas: list[dict]):
+        raise NotImplementedError
+
+    def delete(self, ids: list[str]) -> int:
+        """존재하는 문서만 삭제하고 실제 삭제된 개수를 반환"""
+        raise NotImplementedError
+
+    def get_all(self, include_embeddings: bool = False) -> list[dict]:
+        """전체 문서를 [{id, document, metadata, embedding?}] 로 반환"""
+        raise NotImplementedError
+
+    def query(self, embedding: list[float], n_results: int, where: dict = None) -> list[tuple[str, str]]:
+        """where를 만족하는 문서 중 코사인 유사도 상위 n_results개의 (id, document). n_results는 문서 수 이하로 전달됨"""
+        raise NotImplementedError
+
+
+# ── ChromaDB ─────────────────────────────────────────────────────────────────
+
+class ChromaStore(VectorStore):
+    def __init__(self, path: str):
+        # chromadb import 자체가 수백 ms 걸리므로 이 백엔드를 쓸 때만 로드
+        import chromadb
+
+        self.client = chromadb.PersistentClient(path=path)
+        self.collection = self.client.get_or_create_collection(
+            name="agent_memory",
+            metadata={"hnsw:space": "cosine"}
+        )
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def add(self, ids, embeddings, documents, metadatas):
+        self.collection.add(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    def delete(self, ids: list[str]) -> int:
+        existing = self.collection.get(ids=ids, include=[])["ids"]
+        if existing:
+            self.collection.delete(ids=existing)
+        return len(existing)
+
+    def get_all(self, include_embeddings: bool = False, page_size: int = 5000) -> list[dict]:
+        include = ["documents", "metadatas"] + (["embeddings"] if include_embeddings else [])
+        records, offset = [], 0
+        while True:
+            page = self.collection.get(include=include, limit=page_size, offset=offset)
+            if not page["ids"]:
+                break
+            for i, id_ in enumerate(page["ids"]):
+                record = {"id": id_, "document": page["documents"][i], "metadata": page["metadatas"][i] or {}}
+                if include_embeddings:
+                    record["embedding"] = page["embeddings"][i]
+                records.append(record)
+            offset += len(page["ids"])
+        return records
+
+    @staticmethod
+    def _split_where(where: dict) -> tuple[dict | None, dict]:
+        """Chroma가 직접 처리할 수 있는 조건(문자열 일치/포함)과 나머지(범위 비교)로 분리"""
+        native, residual = [], {}
+        for key, condition in where.items():
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            for op, operand in condition.items():
+                if op in ("$eq", "$ne", "$in", "$nin"):
+                    native.append({key: {op: operand}})
+                else:
+                    residual.setdefault(key, {})[op] = operand
+        if not native:
+            return None, residual
+        return (native[0] if len(native) == 1 else {"$and": native}), residual
+
+    def query(self, embedding: list[float], n_results: int, where: dict = None) -> list[tuple[str, str]]:
+        native, residual = self._split_where(where) if where else (None, {})
+        # Chroma는 숫자만 범위 비교가 가능하므로 timestamp 범위 조건은 넉넉히 가져와 후처리
+        fetch = n_results * 4 if residual else n_results
+        results = self.collection.query(
+            query_embeddings=[embedding],
+            n_results=min(fetch, self.collection.count()) if residual else fetch,
+            where=native,
+            include=["documents", "metadatas"],
+        )
+        if not results["ids"] or not results["ids"][0]:
+            return []
+        hits = zip(results["ids"][0], results["documents"][0], results["metadatas"][0])
+        return [(id_, doc) for id_, doc, meta in hits if match_where(meta or {}, residual)][:n_results]
+
+
+# ── NumPy 메모리 맵 ──────────────────────────────────────────────────────────
+
+class _IVFIndex:
+    """k-means 중심점(√N개)과 버킷별 행 번호. 쿼리는 가까운 nprobe개 버킷의 행만 비교합니다."""
+
+    def __init__(self, centroids: np.ndarray, lists: list[np.ndarray], rows: int):
+        self.centroids = centroids
+        self.lists = lists
+        self.rows = rows   # 색인에 포함된 행 범위 [0, rows) — 이후 추가된 행은 brute-force로 비교
+
+    @classmethod
+    def build(cls, matrix: np.ndarray, alive: np.ndarray, iterations: int = 8) -> "_IVFIndex":
+        rows = np.flatnonzero(alive)
+        n_lists = max(1, int(np.sqrt(len(rows))))
+        rng = np.random.default_rng(0)
+        sample = np.asarray(matrix[np.sort(rng.choice(rows, size=min(len(rows), n_lists * 64), replace=False))])
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            filled = np.bincount(assign, minlength=n_lists) > 0
+            centroids[filled] = _normalize(sums[filled])
+
+        assign = np.empty(len(rows), dtype=np.int64)
+        for start in range(0, len(rows), 65536):
+            chunk = rows[start:start + 65536]
+            assign[start:start + len(chunk)] = np.argmax(matrix[chunk] @ centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(n_lists + 1))
+        lists = [rows[order[bounds[c]:bounds[c + 1]]] for c in range(n_lists)]
+        return cls(centroids, lists, len(alive))
+
+    def probe(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        nearest = np.argsort(-(self.centroids @ query))[:nprobe]
+        return np.concatenate([self.lists[c] for c in nearest])
+
+
+class NumpyStore(VectorStore):
+    """
+    디렉터리 구성:
+      index.json            — {"dim", "generation"} (현재 세대 파일을 가리킴)
+      vectors-<gen>.f32     — 정규화된 float32 행렬 (메모리 맵, 용량은 2배씩 증가)
+      docs-<gen>.jsonl      — 추가/삭제 로그 {"op": "add", id, document, metadata} | {"op": "delete", ids}
+
+    add 순서가 곧 행 번호입니다. 벡터를 먼저 flush한 뒤 로그를 기록하므로 중간에 종료돼도
+    로그에 없는 행은 무시되고 다음 add가 덮어씁니다. 삭제는 tombstone 처리 후, 삭제 행이
+    살아있는 행보다 많아지면 새 세대 파일로 재작성(vacuum)합니다.
+    """
+
+    _INITIAL_ROWS = 1024
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._dim: int | None = None
+        self._generation = 0
+        self._matrix: np.memmap | None = None
+        self._alive = np.zeros(0, dtype=bool)
+        self._ids: list[str | None] = []
+        self._documents: list[str | None] = []
+        self._metadatas: list[dict | None] = []
+        self._rows: dict[str, int] = {}
+        self._ivf: _IVFIndex | None = None
+
+        header = self.path / "index.json"
+        if header.exists():
+            info = json.loads(header.read_text(encoding="utf-8"))
+            self._dim, self._generation = info["dim"], info["generation"]
+            self._replay()
+            self._open_matrix(len(self._ids))
+
+    # ── 파일 ────────────────────────────────────────────────────────────────
+
+    def _vectors_file(self, generation: int = None) -> Path:
+        return self.path / f"vectors-{self._generation if generation is None else generation}.f32"
+
+    def _docs_file(self, generation: int = None) -> Path:
+        return self.path / f"docs-{self._generation if generation is None else generation}.jsonl"
+
+    def _write_header(self):
+        tmp = self.path / "index.json.tmp"
+        tmp.write_text(json.dumps({"dim": self._dim, "generation": self._generation}), encoding="utf-8")
+        os.replace(tmp, self.path / "index.json")
+
+    def _replay(self):
+        docs = self._docs_file()
+        if not docs.exists():
+            return
+        with open(docs, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break   # 기록 도중 종료된 마지막 줄
+                if entry["op"] == "add":
+                    self._append_row(entry["id"], entry["document"], entry["metadata"])
+                else:
+                    self._drop_rows(entry["ids"])
+
+    def _append_row(self, id_: str, document: str, metadata: dict):
+        if id_ in self._rows:
+            self._drop_rows([id_])
+        self._rows[id_] = len(self._ids)
+        self._ids.append(id_)
+        self._documents.append(document)
+        self._metadatas.append(metadata)
+
+    def _drop_rows(self, ids: list[str]) -> list[int]:
+        dropped = []
+        for id_ in ids:
+            row = self._rows.pop(id_, None)
+            if row is None:
+                continue
+            self._ids[row] = self._documents[row] = self._metadatas[row] = None
+            if row < len(self._alive):
+                self._alive[row] = False
+            dropped.append(row)
+        return dropped
+
+    def _open_matrix(self, min_rows: int):
+        """필요하면 벡터 파일을 늘리고 메모리 맵을 (다시) 엽니다."""
+        file = self._vectors_file()
+        row_bytes = self._dim * 4
+        capacity = file.stat().st_size // row_bytes if file.exists() else 0
+        if capacity < min_rows or capacity == 0:
+            capacity = max(min_rows, capacity * 2, self._INITIAL_ROWS)
+            self._matrix = None   # 기존 맵을 닫은 뒤 파일 크기 변경 (Windows)
+            with open(file, "r+b" if file.exists() else "w+b") as f:
+                f.truncate(capacity * row_bytes)
+        self._matrix = np.memmap(file, dtype=np.float32, mode="r+", shape=(capacity, self._dim))
+
+        alive = np.zeros(capacity, dtype=bool)
+        used = len(self._ids)
+        alive[:used] = [id_ is not None for id_ in self._ids]
+        self._alive = alive
+
+    def _vacuum(self):
+        """살아있는 행만 새 세대 파일로 재작성하고 index.json을 원자적으로 교체"""
+        live = np.flatnonzero(self._alive[:len(self._ids)])
+        vectors = np.asarray(self._matrix[live])
+        records = [(self._ids[r], self._documents[r], self._metadatas[r]) for r in live]
+        old_vectors, old_docs = self._vectors_file(), self._docs_file()
+        generation = self._generation + 1
+
+        vectors.tofile(self._vectors_file(generation))
+        with open(self._docs_file(generation), "w", encoding="utf-8") as f:
+            for id_, document, metadata in records:
+                f.write(json.dumps({"op": "add", "id": id_, "document": document, "metadata": metadata},
+                                   ensure_ascii=False) + "\n")
+
+        self._matrix = None
+        self._generation = generation
+        self._write_header()
+        old_vectors.unlink(missing_ok=True)
+        old_docs.unlink(missing_ok=True)
+
+        self._ids, self._documents, self._metadatas, self._rows = [], [], [], {}
+        for id_, document, metadata in records:
+            self._append_row(id_, document, metadata)
+        self._open_matrix(len(records))
+        self._ivf = None
+        print(f"[VectorStore] Vacuumed to {len(records)} row(s) (generation {generation})")
+
+    # ── VectorStore ─────────────────────────────────────────────────────────
+
+    def count(self) -> int:
+        return len(self._rows)
+
+    def add(self, ids, embeddings, documents, metadatas):
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+        with self._lock:
+            if self._dim is None:
+                self._dim = vectors.shape[1]
+                self._write_header()
+                self._open_matrix(len(ids))
+            elif vectors.shape[1] != self._dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} != store dimension {self._dim}")
+
+            start = len(self._ids)
+            if start + len(ids) > len(self._matrix):
+                self._matrix.flush()
+                self._open_matrix(start + len(ids))
+            self._matrix[start:start + len(ids)] = vectors
+            self._matrix.flush()
+
+            with open(self._docs_file(), "a", encoding="utf-8") as f:
+                for id_, document, metadata in zip(ids, documents, metadatas):
+                    f.write(json.dumps({"op": "add", "id": id_, "document": document, "metadata": metadata},
+                                       ensure_ascii=False) + "\n")
+            for id_, document, metadata in zip(ids, documents, metadatas):
+                self._append_row(id_, document, metadata)
+            self._alive[start:start + len(ids)] = True
+
+    def delete(self, ids: list[str]) -> int:
+        with self._lock:
+            existing = [id_ for id_ in ids if id_ in self._rows]
+            if not existing:
+                return 0
+            with open(self._docs_file(), "a", encoding="utf-8") as f:
+                f.write(json.dumps({"op": "delete", "ids": existing}) + "\n")
+            self._drop_rows(existing)
+            dead = len(self._ids) - len(self._rows)
+            if dead >= self._INITIAL_ROWS and dead > len(self._rows):
+                self._vacuum()
+            return len(existing)
+
+    def get_all(self, include_embeddings: bool = False) -> list[dict]:
+        """include_embeddings의 벡터는 정규화된 값입니다 (코사인 비교 전용)."""
+        with self._lock:
+            records = []
+            for row, id_ in enumerate(self._ids):
+                if id_ is None:
+                    continue
+                record = {"id": id_, "document": self._documents[row], "metadata": self._metadatas[row]}
+                if include_embeddings:
+                    record["embedding"] = np.array(self._matrix[row])
+                records.append(record)
+            return records
+
+    def _candidates(self, query: np.ndarray) -> np.ndarray | None:
+        """IVF 후보 행 번호 (None이면 전체 brute-force)"""
+        used = len(self._ids)
+        if len(self._rows) < MEMORY_IVF_MIN_ROWS:
+            return None
+        # 색인 이후 추가된 행이 25%를 넘으면 재구축
+        if self._ivf is None or used - self._ivf.rows > self._ivf.rows // 4:
+            self._ivf = _IVFIndex.build(self._matrix[:used], self._alive[:used])
+        return np.concatenate([self._ivf.probe(query, MEMORY_IVF_NPROBE), np.arange(self._ivf.rows, used)])
+
+    def query(self, embedding: list[float], n_results: int, where: dict = None) -> list[tuple[str, str]]:
+        q = _normalize(np.asarray([embedding], dtype=np.float32))[0]
+        with self._lock:
+            if not self._rows:
+                return []
+            if where:
+                # 필터가 걸리면 조건에 맞는 행만 brute-force (보통 전체의 일부라 IVF보다 정확·충분히 빠름)
+                rows = np.array([r for r, meta in enumerate(self._metadatas)
+                                 if meta is not None and match_where(meta, where)], dtype=np.int64)
+                if not len(rows):
+                    return []
+            else:
+                rows = self._candidates(q)
+                if rows is None:
+                    rows = np.arange(len(self._ids))
+            scores = self._matrix[rows] @ q
+            scores[~self._alive[rows]] = -np.inf
+            k = min(n_results, len(rows))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self._ids[rows[i]], self._documents[rows[i]]) for i in top if np.isfinite(scores[i])]
+
+
+# ── 선택 / 마이그레이션 ──────────────────────────────────────────────────────
+
+_BACKENDS = {"chroma": ChromaStore, "numpy": NumpyStore}
+
+
+def open_store(backend: str = MEMORY_BACKEND, path: str = None) -> VectorStore:
+    if backend not in _BACKENDS:
+        raise ValueError(f"Unknown memory backend '{backend}' (expected one of {sorted(_BACKENDS)})")
+    return _BACKENDS[backend](path or default_store_dir(backend))
+
+
+def migrate(source: VectorStore, target: VectorStore, batch_size: int = 1000) -> int:
+    """source의 모든 문서를 임베딩 재계산 없이 target으로 복사 (이미 있는 id는 건너뜀). 복사한 개수 반환."""
+    existing = {r["id"] for r in target.get_all()}
+    records = [r for r in source.get_all(include_embeddings=True) if r["id"] not in existing]
+    for start in range(0, len(records), batch_size):
+        batch = records[start:start + batch_size]
+        target.add(
+            ids=[r["id"] for r in batch],
+            embeddings=[list(map(float, r["embedding"])) for r in batch],
+            documents=[r["document"] for r in batch],
+            metadatas=[r["metadata"] for r in batch],
+        )
+        print(f"[VectorStore] Migrated {start + len(batch)}/{len(records)}")
+    return len(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AgentMemory vector store tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    m = sub.add_parser("migrate", help="copy all memories between backends")
+    m.add_argument("--from", dest="src_backend", default="chroma", choices=sorted(_BACKENDS))
+    m.add_argument("--to", dest="dst_backend", default="numpy", choices=sorted(_BACKENDS))
+    m.add_argument("--src", help="source directory (default: Agent_Workspace/<backend dir>)")
+    m.add_argument("--dst", help="target directory (default: Agent_Workspace/<backend dir>)")
+    args = parser.parse_args()
+
+    if args.src_backend == args.dst_backend and (args.src or "") == (args.dst or ""):
+        parser.error("source and target are the same store")
+    copied = migrate(open_store(args.src_backend, args.src), open_store(args.dst_backend, args.dst))
+    print(f"[VectorStore] Done — {copied} document(s) copied. Set MEMORY_BACKEND = \"{args.dst_backend}\" in config.py to use it.")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,7 +16,21 @@ web_ui.py — Ageis Agent Web UI (Phase 7: 자율성 & 스케줄링)
   POST /api/watch              — 감시 규칙 등록 (Phase 7-B)
   GET  /api/watches            — 감시 규칙 목록 (Phase 7-B)
   DELETE /api/watch/{id}       — 감시 규칙 삭제 (Phase 7-B)
-  WS   /ws                     — WebSocket 채팅 (텍스트)
+  GET  /api/router/stats       — 의도 분류 단계별 적중/지연 통계
+  DELETE /api/router/cache     — 의도 분류 캐시 비우기
+  GET  /api/memory/stats       — 장기 기억 / 임베딩 캐시 통계
+  POST /api/memory/compact     — 기억 압축(중복 제거·요약·보존 정책) 즉시 실행
+  POST /api/society?stream=true — Society 처리 진행·보고서 토큰 스트리밍 (NDJSON)
+  GET  /api/society/actors     — Society 에이전트별 mailbox 길이·처리/실패/재시작 통계
+  GET  /api/society/cache      — Society 하위 작업 결과 캐시 통계 (역할별 항목 수, 적중/유사 적중/합류/미스)
+  DELETE /api/society/cache    — Society 결과 캐시 무효화 (?role=Researcher&contains=문구 로 선택, 없으면 전체)
+  GET  /api/tools/cache        — 도구 결과 캐시 도구별 적중/미스/재검증 통계
+  DELETE /api/tools/cache      — 도구 결과 캐시 비우기
+  GET  /api/traces/{id}        — 요청 트레이스 (JSON, ?format=text 이면 단계별 워터폴 텍스트)
+  GET  /api/metrics            — LLM 호출 지표 (Prometheus 텍스트 형식)
+  GET  /api/persona            — 현재 페르소나 설정
+  PUT  /api/persona            — 페르소나 부분 수정 (persona.yaml 저장, 재시작 없이 적용)
+  WS   /ws                     — WebSocket 채팅 (타입별 JSON 프레임 스트리밍)
 """
 import os
 import sys
@@ -26,13 +40,27 @@ import base64
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File, Form
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import uvicorn
 
-from core_logic import handle_chat, handle_task, handle_vision, handle_voice, handle_society
-from router import classify_intent
+from core_logic import (
+    handle_task, handle_vision, handle_voice,
+    ahandle_chat, ahandle_task, ahandle_society,
+    ahandle_chat_stream, ahandle_task_stream, ahandle_society_stream,
+    memory, society_registry,
+)
+from router import aclassify_intent, get_router_stats, intent_cache
+import llm
+from embed_cache import embedding_cache
+from tool_cache import tool_cache
+from society_cache import society_cache
+from telemetry import render_prometheus
+from tracing import span, get_trace, render_waterfall
+from memory_compaction import MemoryCompactor
+from persona import persona_manager
+from config import MEMORY_COMPACTION_CRON
 from scheduler import AgentScheduler
 from event_monitor import EventMonitor
 
@@ -40,6 +68,7 @@ from event_monitor import EventMonitor
 
 _scheduler = AgentScheduler(task_runner=handle_task)
 _monitor = EventMonitor(task_runner=handle_task)
+_compactor = MemoryCompactor(memory)
 
 
 @asynccontextmanager
@@ -47,11 +76,16 @@ async def lifespan(app: FastAPI):
     """FastAPI lifespan — 스케줄러 & 이벤트 모니터 시작/종료 관리."""
     # startup
     _scheduler.start()
+    _scheduler.add_maintenance_job("memory-compaction", _compactor.run, MEMORY_COMPACTION_CRON)
     _monitor.start(asyncio.get_event_loop())
+    await society_registry.astart()         # 에이전트 mailbox·worker를 서버 이벤트 루프에서 시작
     yield
     # shutdown
     _scheduler.stop()
     _monitor.stop()
+    await society_registry.astop()          # 처리 중이던 Society 요청에 실패 통지
+    await asyncio.to_thread(memory.close)   # write-behind 큐에 남은 기억 기록
+    await llm.close_async_client()
 
 
 app = FastAPI(title="Ageis Agent UI", lifespan=lifespan)
@@ -78,6 +112,7 @@ class ChatRequest(BaseModel):
 class ChatResponse(BaseModel):
     response: str
     intent: str
+    trace_id: str = ""   # /api/traces/{trace_id} 로 단계별 소요 시간 조회
 
 
 class VisionRequest(BaseModel):
@@ -96,6 +131,10 @@ class ScheduleRequest(BaseModel):
     task: str        # e.g. "주식 시장 요약해줘"
 
 
+class PersonaUpdate(BaseModel):
+    changes: dict    # e.g. {"name": "Nova", "personality": {"tone": "casual"}}
+
+
 class WatchRequest(BaseModel):
     path: str        # e.g. "Agent_Workspace/downloads"
     pattern: str     # e.g. "*.pdf"
@@ -452,10 +491,38 @@ ws.onclose = () => {
     disableInput();
     if (wsPingInterval) { clearInterval(wsPingInterval); wsPingInterval = null; }
 };
+// 스트리밍 프레임: intent / thought / action / observation / final(델타) / done / error
+let streamDiv = null, streamText = "", traceDiv = null;
 ws.onmessage = (e) => {
     if (e.data === "__pong__") return; // 킵얼라이브 응답 무시
-    addMsg(e.data, "agent");
-    enableInput();
+    let frame;
+    try { frame = JSON.parse(e.data); } catch (_) { frame = { type: "done", content: e.data }; }
+    switch (frame.type) {
+        case "thought":
+            if (!traceDiv) traceDiv = addMsg("", "system");
+            traceDiv.textContent += frame.delta;
+            break;
+        case "action":
+            addMsg(`🔧 ${frame.tool} ${JSON.stringify(frame.input)}`, "system");
+            traceDiv = null;
+            break;
+        case "observation":
+            addMsg(`👁 ${frame.content.slice(0, 300)}`, "system");
+            break;
+        case "final":
+            if (!streamDiv) { streamDiv = addMsg("", "agent"); streamText = ""; }
+            streamText += frame.delta;
+            streamDiv.innerHTML = streamText.replace(/\\n/g, "<br>");
+            break;
+        case "done":
+        case "error":
+            if (streamDiv) streamDiv.innerHTML = frame.content.replace(/\\n/g, "<br>");
+            else addMsg(frame.content, "agent");
+            streamDiv = traceDiv = null;
+            enableInput();
+            break;
+    }
+    chatBox.scrollTop = chatBox.scrollHeight;
 };
 
 function setStatus(ok) {
@@ -481,6 +548,7 @@ function addMsg(text, sender, imgSrc) {
     }
     chatBox.appendChild(div);
     chatBox.scrollTop = chatBox.scrollHeight;
+    return div;
 }
 
 // ─── 텍스트 전송 ──────────────────────────────────────────────────────────
@@ -749,30 +817,30 @@ async def health_check():
 
 @app.post("/api/chat", response_model=ChatResponse)
 async def api_chat(req: ChatRequest):
-    intent = classify_intent(req.message)
+    with span("api.chat") as root:
+        intent = await aclassify_intent(req.message)
+        root.set(intent=intent)
 
-    # Intent-based Routing
-    loop = asyncio.get_running_loop()
-    
-    if intent == "SOCIETY":
-        # Multi-Agent
-        response = await loop.run_in_executor(None, handle_society, req.message)
-    elif intent in ["FILE", "WEB", "TASK"]:
-        # ReAct Single Agent
-        response = await loop.run_in_executor(None, handle_task, req.message)
-    else:
-        # Simple Chat
-        response = handle_chat(req.message)
-        
-    return ChatResponse(response=response, intent=intent)
+        # Intent-based Routing — 모두 async 핸들러를 직접 await (스레드풀 미사용)
+        if intent == "SOCIETY":
+            # Multi-Agent
+            response = await ahandle_society(req.message)
+        elif intent in ["FILE", "WEB", "TASK"]:
+            # ReAct Single Agent
+            response = await ahandle_task(req.message)
+        else:
+            # Simple Chat
+            response = await ahandle_chat(req.message)
+
+    return ChatResponse(response=response, intent=intent, trace_id=root.trace_id)
 
 
 @app.post("/api/task", response_model=ChatResponse)
 async def api_task(req: ChatRequest):
-    intent = classify_intent(req.message)
-    loop = asyncio.get_running_loop()
-    response = await loop.run_in_executor(None, handle_task, req.message)
-    return ChatResponse(response=response, intent=intent)
+    with span("api.task") as root:
+        intent = await aclassify_intent(req.message)
+        response = await ahandle_task(req.message)
+    return ChatResponse(response=response, intent=intent, trace_id=root.trace_id)
 
 
 # ── Phase 6-A: Vision ────────────────────────────────────────────────────
@@ -818,11 +886,10 @@ async def api_voice_upload(
         tmp_path = tmp.name
     try:
         from tools.stt_tool import transcribe_file_tool
-        transcribed = transcribe_file_tool({"path": tmp_path, "language": language})
+        transcribed = await asyncio.to_thread(transcribe_file_tool, {"path": tmp_path, "language": language})
         if transcribed.startswith("ERROR:"):
             return {"response": transcribed, "transcribed": ""}
-        loop = asyncio.get_running_loop()
-        answer = await loop.run_in_executor(None, handle_chat, transcribed)
+        answer = await ahandle_chat(transcribed)
         return {"response": answer, "transcribed": transcribed}
     finally:
         os.unlink(tmp_path)
@@ -883,17 +950,121 @@ async def api_delete_watch(watch_id: str):
     return {"deleted": watch_id}
 
 
+# ── 라우터 통계 ──────────────────────────────────────────────────────────
+
+@app.get("/api/router/stats")
+async def api_router_stats():
+    """규칙/임베딩/LLM 단계별 적중 수와 평균 지연 — 임베딩 임계값 튜닝용."""
+    return get_router_stats()
+
+
+@app.delete("/api/router/cache")
+async def api_clear_router_cache():
+    intent_cache.clear()
+    return {"cleared": True}
+
+
+# ── 지표 / 트레이스 ──────────────────────────────────────────────────────
+
+@app.get("/api/traces/{trace_id}")
+async def api_get_trace(trace_id: str, format: str = "json"):
+    """라우터 분류 · ReAct 반복 · 도구 호출 · 기억 검색/저장 · 에이전트 메시지 스팬을 시간순 트리로 반환."""
+    trace = await asyncio.to_thread(get_trace, trace_id)
+    if trace is None:
+        from fastapi import HTTPException
+        raise HTTPException(status_code=404, detail="Trace not found")
+    if format == "text":
+        return PlainTextResponse(render_waterfall(trace))
+    return trace
+
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def api_metrics():
+    """모델·호출 위치(site)별 LLM 호출 수, 토큰, Ollama 시간/벽시계 시간 히스토그램 — Prometheus scrape 용."""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+# ── 장기 기억 ────────────────────────────────────────────────────────────
+
+@app.get("/api/memory/stats")
+async def api_memory_stats():
+    return {"documents": memory.count, "embedding_cache": embedding_cache.stats()}
+
+
+@app.post("/api/memory/compact")
+async def api_memory_compact():
+    """중복 제거 · 오래된 기억 요약 · type별 보존 기간 적용 후 회수량 보고."""
+    return await asyncio.to_thread(_compactor.run)
+
+
+# ── 도구 결과 캐시 ───────────────────────────────────────────────────────
+
+@app.get("/api/tools/cache")
+async def api_tool_cache_stats():
+    """도구별 hits / revalidated(ETag·Last-Modified 확인 후 재사용) / misses / expired / bypasses(no_cache) 와 적중률."""
+    return tool_cache.stats()
+
+
+@app.delete("/api/tools/cache")
+async def api_clear_tool_cache():
+    return {"removed": tool_cache.clear()}
+
+
+# ── 페르소나 ─────────────────────────────────────────────────────────────
+
+@app.get("/api/persona")
+async def api_get_persona():
+    return persona_manager.get()
+
+
+@app.put("/api/persona")
+async def api_update_persona(req: PersonaUpdate):
+    """중첩 항목은 키 단위로 병합됩니다. 다음 요청부터 바로 적용."""
+    try:
+        return await asyncio.to_thread(persona_manager.update, req.changes)
+    except ValueError as e:
+        from fastapi import HTTPException
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 # ── Phase 8: Multi-Agent Society ─────────────────────────────────────────
 
 @app.post("/api/society")
-async def api_society(req: ChatRequest):
+async def api_society(req: ChatRequest, stream: bool = False):
     """
     Phase 8: 멀티에이전트(Manager → Researcher/Writer) 파이프라인.
     복잡한 조사·작성 태스크를 여러 전문 에이전트가 협력하여 처리합니다.
+    ?stream=true 이면 WebSocket과 같은 프레임(action / observation / final 델타 / done)을 NDJSON으로 스트리밍 —
+    Writer가 먼저 끝난 조사 결과부터 작성하므로 첫 문단이 전체 조사 완료 전에 도착합니다.
     """
-    loop = asyncio.get_running_loop()
-    result = await loop.run_in_executor(None, handle_society, req.message)
-    return {"response": result, "intent": "SOCIETY"}
+    if stream:
+        async def frames():
+            with span("api.society", stream=True):
+                async for frame in ahandle_society_stream(req.message):
+                    yield json.dumps(frame, ensure_ascii=False) + "\n"
+        return StreamingResponse(frames(), media_type="application/x-ndjson")
+
+    with span("api.society") as root:
+        result = await ahandle_society(req.message)
+    return {"response": result, "intent": "SOCIETY", "trace_id": root.trace_id}
+
+
+@app.get("/api/society/actors")
+async def api_society_actors():
+    """에이전트별 mailbox 길이·용량, 동시 처리 수, 처리/실패/재시작 수와 응답 대기 중인 메시지 수."""
+    return society_registry.stats()
+
+
+@app.get("/api/society/cache")
+async def api_society_cache_stats():
+    """hits(같은 지시) / similar_hits(임베딩 유사 지시) / coalesced(처리 중인 같은 요청에 합류) / misses 와 적중률."""
+    return society_cache.stats()
+
+
+@app.delete("/api/society/cache")
+async def api_invalidate_society_cache(role: str | None = None, contains: str | None = None):
+    """role(예: Researcher)과 contains(지시문 문구 또는 URL·경로 일부)로 골라 삭제. 둘 다 없으면 전체 삭제."""
+    return {"removed": society_cache.invalidate(role=role, contains=contains)}
 
 
 # ─── WebSocket ────────────────────────────────────────────────────────────
@@ -924,6 +1095,7 @@ def log_info(msg):
 # 백그라운드 태스크가 가비지 컬렉터(GC)에 의해 강제 종료되는 것을 방지하기 위한 참조 Set
 active_ws_tasks = set()
 
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
@@ -941,29 +1113,34 @@ async def websocket_endpoint(websocket: WebSocket):
 
             # 1. 메시지 처리 함수 분리 (Background Task용)
             async def process_message(user_text: str):
-                loop = asyncio.get_running_loop()
+                async def send_frame(frame: dict):
+                    await websocket.send_text(json.dumps(frame, ensure_ascii=False))
+
                 try:
-                    # A. 분류
-                    intent = await loop.run_in_executor(None, classify_intent, user_text)
-                    log_info(f"Received: {user_text[:50]}... -> Intent: {intent}")
-                    
-                    # B. 처리 (Intent에 따라 분기)
-                    if intent == "SOCIETY":
-                        response = await loop.run_in_executor(None, handle_society, user_text)
-                    elif intent in ["FILE", "WEB", "TASK"]:
-                        response = await loop.run_in_executor(None, handle_task, user_text)
-                    else:
-                        response = await loop.run_in_executor(None, handle_chat, user_text)
-                        
-                    await websocket.send_text(response)
-                    
+                    with span("ws.message") as root:
+                        # A. 분류
+                        intent = await aclassify_intent(user_text)
+                        root.set(intent=intent)
+                        log_info(f"Received: {user_text[:50]}... -> Intent: {intent}")
+                        await send_frame({"type": "intent", "intent": intent, "trace_id": root.trace_id})
+
+                        # B. 처리 (Intent에 따라 분기) — 모두 토큰 단위 스트리밍
+                        if intent == "SOCIETY":
+                            stream_fn = ahandle_society_stream
+                        elif intent in ["FILE", "WEB", "TASK"]:
+                            stream_fn = ahandle_task_stream
+                        else:
+                            stream_fn = ahandle_chat_stream
+                        async for frame in stream_fn(user_text):
+                            await send_frame(frame)
+
                 except Exception as e:
                     err_msg = f"Processing Error: {str(e)}"
                     log_error(err_msg)
                     import traceback
                     log_error(traceback.format_exc())
                     try:
-                        await websocket.send_text(f"Error: {str(e)}")
+                        await send_frame({"type": "error", "content": f"Error: {str(e)}"})
                     except Exception:
                         pass  # 웹소켓이 이미 닫혔으면 무시
 